@@ -0,0 +1,169 @@
+# backend/app/asset_fingerprint.py
+"""
+Сборка frontend с хешами содержимого в именах файлов.
+
+JS и CSS копируются в frontend/dist/ под именами вида app.<hash>.js,
+импорты между модулями переписываются на хешированные имена, index.html
+ссылается на них. Имя файла меняется только при изменении содержимого,
+поэтому браузер и Telegram держат скрипты в кэше до следующего релиза.
+
+Запуск (без зависимостей приложения, только stdlib):
+    cd backend && python -m app.asset_fingerprint
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+DIST_DIR_NAME = "dist"
+MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_DIRS = ("js", "css")
+HASH_LENGTH = 10
+STATIC_PREFIX = "/static/"
+
+# import ... from '/static/js/x.js', import '/static/js/x.js', import('/static/js/x.js')
+_IMPORT_PATTERN = re.compile(
+    r"""(?P<prefix>\bfrom\s*|\bimport\s*\(?\s*)(?P<quote>['"])/static/(?P<path>[^'"]+)(?P=quote)"""
+)
+
+
+class AssetBuildError(Exception):
+    """Ошибка сборки (например, циклический импорт)"""
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _hashed_name(relative_path: str, digest: str) -> str:
+    path = Path(relative_path)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def _collect_sources(frontend_dir: Path) -> Dict[str, str]:
+    """Исходники для хеширования: {"js/app.js": текст}"""
+    sources = {}
+    for directory in FINGERPRINT_DIRS:
+        for file_path in sorted((frontend_dir / directory).glob("*")):
+            if file_path.is_file() and file_path.suffix in (".js", ".css"):
+                sources[file_path.relative_to(frontend_dir).as_posix()] = file_path.read_text(encoding="utf-8")
+    return sources
+
+
+def _topological_order(sources: Dict[str, str]) -> List[str]:
+    """
+    Порядок хеширования: зависимости раньше зависящих от них модулей
+
+    Хеш модуля включает хешированные имена его импортов, поэтому
+    изменение i18n.js меняет и имена ui.js и app.js.
+    """
+    dependencies = {
+        path: [m["path"] for m in _IMPORT_PATTERN.finditer(text) if m["path"] in sources]
+        for path, text in sources.items()
+    }
+    order: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(path: str, chain: List[str]):
+        if state.get(path) == "done":
+            return
+        if state.get(path) == "visiting":
+            raise AssetBuildError(f"Циклический импорт: {' -> '.join(chain + [path])}")
+        state[path] = "visiting"
+        for dependency in dependencies[path]:
+            visit(dependency, chain + [path])
+        state[path] = "done"
+        order.append(path)
+
+    for path in sorted(sources):
+        visit(path, [])
+    return order
+
+
+def _rewrite_imports(text: str, manifest: Dict[str, str]) -> str:
+    def replace(match):
+        hashed = manifest.get(match["path"])
+        if hashed is None:
+            return match.group(0)
+        return f"{match['prefix']}{match['quote']}{STATIC_PREFIX}{hashed}{match['quote']}"
+    return _IMPORT_PATTERN.sub(replace, text)
+
+
+def _rewrite_index(html: str, manifest: Dict[str, str]) -> str:
+    """Заменяет ссылки на /static/<исходник> в index.html на хешированные"""
+    for source, hashed in manifest.items():
+        html = re.sub(
+            rf"""(["']){re.escape(STATIC_PREFIX + source)}(?:\?[^"']*)?\1""",
+            lambda m: f"{m.group(1)}{STATIC_PREFIX}{hashed}{m.group(1)}",
+            html
+        )
+    return html
+
+
+def _prune_old_builds(dist_dir: Path, keep: set) -> int:
+    """Удаляет хешированные файлы, которых нет ни в текущей, ни в прошлой сборке"""
+    removed = 0
+    for file_path in dist_dir.rglob("*"):
+        relative_path = file_path.relative_to(dist_dir.parent).as_posix()
+        if file_path.is_file() and file_path.suffix in (".js", ".css") and relative_path not in keep:
+            file_path.unlink()
+            removed += 1
+    return removed
+
+
+def build_assets(frontend_dir: Path = FRONTEND_DIR) -> Dict[str, str]:
+    """
+    Собирает хешированные JS/CSS и index.html в frontend/dist/
+
+    Returns:
+        Манифест {"js/app.js": "dist/js/app.<hash>.js"}
+    """
+    dist_dir = frontend_dir / DIST_DIR_NAME
+    manifest_path = dist_dir / MANIFEST_NAME
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+
+    sources = _collect_sources(frontend_dir)
+    manifest: Dict[str, str] = {}
+    for source in _topological_order(sources):
+        content = _rewrite_imports(sources[source], manifest).encode("utf-8")
+        hashed = f"{DIST_DIR_NAME}/{_hashed_name(source, _content_hash(content))}"
+        target = frontend_dir / hashed
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + ".part")
+            tmp_path.write_bytes(content)
+            tmp_path.replace(target)
+        manifest[source] = hashed
+
+    index_source = frontend_dir / "index.html"
+    if index_source.exists():
+        html = _rewrite_index(index_source.read_text(encoding="utf-8"), manifest)
+        tmp_path = dist_dir / "index.html.part"
+        dist_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(html, encoding="utf-8")
+        tmp_path.replace(dist_dir / "index.html")
+
+    # Прошлую сборку оставляем: ее может запросить закэшированный index.html
+    removed = _prune_old_builds(dist_dir, set(manifest.values()) | set(previous.values()))
+
+    tmp_path = manifest_path.with_name(MANIFEST_NAME + ".part")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(manifest_path)
+
+    logger.info(f"🔖 Хешированные ассеты: {len(manifest)} файлов, удалено устаревших: {removed}")
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for source, hashed in build_assets().items():
+        print(f"{source} -> {hashed}")
@@ -1,5 +1,6 @@
 # backend/app/core/config.py
 from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,6 +13,42 @@ class Settings(BaseSettings):
     API_BASE_URL: str
     ENVIRONMENT: str = "development"  # Добавляем отсутствующий атрибут
 
+    # Бюджет диска для сгенерированных медиа (LRU вытеснение по расписанию)
+    MEDIA_AUDIO_BUDGET_MB: int = 512
+    MEDIA_IMAGES_BUDGET_MB: int = 1024
+    MEDIA_EVICTION_INTERVAL_MINUTES: int = 60
+    MEDIA_EVICTION_GRACE_HOURS: int = 24  # Свежие файлы могут ждать сохранения карточки
+    MEDIA_ACCESS_LOG_PATH: Optional[str] = None  # access log nginx, раздающего /static
+
+    # Telegram webhook: секрет из setWebhook приходит в X-Telegram-Bot-Api-Secret-Token
+    TELEGRAM_WEBHOOK_SECRET: Optional[str] = None
+    TELEGRAM_UPDATE_WORKERS: int = 4  # Параллельных обработчиков обновлений на воркер
+
+    # Ежедневные напоминания о карточках (время UTC, ЧЧ:ММ).
+    # Выключены по умолчанию: рассылка уходит всем пользователям с карточками к повторению
+    NOTIFICATIONS_ENABLED: bool = False
+    DAILY_REMINDER_TIME: str = "09:00"
+    TELEGRAM_SEND_RATE_PER_SECOND: float = 25  # Лимит Telegram ~30 сообщений в секунду
+
+    # Журнал медленных SQL запросов (планы EXPLAIN снимаются в фоне)
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+
+    # Админские эндпоинты /api/admin (заголовок X-Admin-Token); без токена выключены
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Профилирование запросов по заголовку X-Profile или выборке из админки (app/profiling.py)
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_RATE: float = 0.0  # Доля запросов по умолчанию, 0 - только по требованию
+    PROFILING_INTERVAL_MS: int = 5
+    PROFILING_MAX_SECONDS: float = 30
+    PROFILING_MAX_FILES: int = 50
+
+    # Rate limiting API (token bucket в Redis, стоимость маршрутов - app/middleware.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CAPACITY: int = 100
+    RATE_LIMIT_REFILL_PER_MINUTE: int = 100
+
     class Config:
         env_file = "../.env"  # Путь к .env файлу в корневой директории проекта
         # Эта опция позволяет Pydantic не падать, если .env файл не найден
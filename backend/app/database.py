@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import get_settings
+from app.monitoring import instrument_engine
 
 Base = declarative_base()
 
@@ -27,6 +28,7 @@ def init_db():
             sync_url = sync_url.replace("postgresql+psycopg://", "postgresql://")
         
         engine = create_engine(sync_url, echo=True)
+        instrument_engine(engine)
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         
         # Async engine for FastAPI endpoints (только для PostgreSQL)
@@ -40,6 +42,7 @@ def init_db():
                 async_url = async_url.replace("postgresql+psycopg://", "postgresql+asyncpg://")
             
             async_engine = create_async_engine(async_url, echo=True)
+            instrument_engine(async_engine.sync_engine)
             AsyncSessionLocal = async_sessionmaker(
                 bind=async_engine,
                 class_=AsyncSession,
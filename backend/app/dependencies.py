@@ -4,11 +4,14 @@
 Централизованное место для функций аутентификации и авторизации.
 """
 
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from .core.config import get_settings
 from .database import get_db
 from .models.user import User
 from .services.auth_service import auth_service
@@ -113,4 +116,19 @@ def get_optional_user(
         return get_current_user(token, db)
     except HTTPException:
         # Если токен недействителен, возвращаем None вместо ошибки
-        return None
\ No newline at end of file
+        return None
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency для админских эндпоинтов: заголовок X-Admin-Token.
+    
+    Raises:
+        HTTPException: 404, если ADMIN_TOKEN не задан (админка выключена),
+            403, если токен неверный
+    """
+    admin_token = get_settings().ADMIN_TOKEN
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
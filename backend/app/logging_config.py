@@ -1,12 +1,43 @@
 # backend/app/logging_config.py
 """
 Конфигурация логирования для приложения.
+
+Логгеры не пишут в файлы и консоль сами: корневой логгер получает одну
+QueueHandler, а фоновый поток QueueListener раздает записи настоящим
+обработчикам (файлы с ротацией, консоль) по таблице маршрутов из
+get_logging_config(). Ввод-вывод не блокирует event loop и потоки
+запросов; при переполнении очереди записи отбрасываются и считаются.
+
+Подробные дампы (сырой ответ Gemini, параметры синтеза) пишутся в логгер
+app.payload и проходят выборку LOG_PAYLOAD_SAMPLE_RATE.
+
+Под gunicorn (LOG_TO_FILES=0, см. gunicorn.conf.py) файлов нет, все идет
+в stdout: RotatingFileHandler нескольких процессов на одних файлах
+ротирует их независимо и теряет записи.
 """
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
 import os
-from typing import Dict, Any
+import queue
+import random
+from typing import Dict, Any, List, Optional
+
+try:
+    import pythonjsonlogger  # noqa: F401
+    JSON_LOGGER_AVAILABLE = True
+except ImportError:
+    JSON_LOGGER_AVAILABLE = False
+
+LOG_QUEUE_SIZE = 10000
+PAYLOAD_LOGGER = "app.payload"
+
+
+def log_to_files() -> bool:
+    """Пишутся ли логи в logs/ (только для одного процесса)"""
+    return os.getenv("LOG_TO_FILES", "1") != "0"
 
 
 def get_logging_config() -> Dict[str, Any]:
@@ -27,6 +58,9 @@ def get_logging_config() -> Dict[str, Any]:
     )
     
     simple_format = "%(asctime)s - %(levelname)s - %(message)s"
+
+    # Доля подробных дампов, которые попадут в лог
+    payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
     
     config = {
         "version": 1,
@@ -39,10 +73,12 @@ def get_logging_config() -> Dict[str, Any]:
             "simple": {
                 "format": simple_format,
                 "datefmt": "%Y-%m-%d %H:%M:%S"
-            },
-            "json": {
-                "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
-                "format": "%(asctime)s %(name)s %(levelname)s %(filename)s %(lineno)d %(message)s"
+            }
+        },
+        "filters": {
+            "payload_sampling": {
+                "()": "app.logging_config.SamplingFilter",
+                "rate": payload_sample_rate
             }
         },
         "handlers": {
@@ -105,6 +141,13 @@ def get_logging_config() -> Dict[str, Any]:
                 "handlers": ["console", "file"],
                 "propagate": False
             },
+            # Подробные дампы ответов и параметров (выборка)
+            PAYLOAD_LOGGER: {
+                "level": "INFO",
+                "filters": ["payload_sampling"],
+                "handlers": ["file"],
+                "propagate": False
+            },
             # Логгер для аутентификации
             "app.auth": {
                 "level": "INFO",
@@ -132,23 +175,132 @@ def get_logging_config() -> Dict[str, Any]:
     }
     
     # В продакшене используем JSON формат для лучшей обработки логов
-    if os.getenv("ENVIRONMENT") == "production":
+    if JSON_LOGGER_AVAILABLE:
+        config["formatters"]["json"] = {
+            "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
+            "format": "%(asctime)s %(name)s %(levelname)s %(filename)s %(lineno)d %(message)s"
+        }
+    if os.getenv("ENVIRONMENT") == "production" and JSON_LOGGER_AVAILABLE:
         config["handlers"]["console"]["formatter"] = "json"
         config["handlers"]["file"]["formatter"] = "json"
+
+    if not log_to_files():
+        file_handlers = [name for name, handler in config["handlers"].items() if "filename" in handler]
+        for name in file_handlers:
+            del config["handlers"][name]
+        for logger_config in config["loggers"].values():
+            handlers = [name for name in logger_config["handlers"] if name not in file_handlers]
+            logger_config["handlers"] = handlers or ["console"]
     
     return config
 
 
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю rate записей (подробные дампы на горячих путях).
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не ждет место в очереди: сверх maxsize записи
+    отбрасываются. SimpleQueue написана на C и не берет блокировку Python
+    на put - это заметная часть цены записи в потоке запроса.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class RoutingHandler(logging.Handler):
+    """
+    Обработчик потока QueueListener: отдает запись обработчикам ее логгера.
+
+    Маршрут - обработчики ближайшего настроенного предка по имени логгера
+    (app.services.ai_service -> app.services), как при propagate=False.
+    """
+
+    def __init__(self, routes: Dict[str, List[logging.Handler]]):
+        super().__init__()
+        self.routes = routes
+        self._resolved: Dict[str, List[logging.Handler]] = {}
+
+    def _handlers_for(self, name: str) -> List[logging.Handler]:
+        handlers = self._resolved.get(name)
+        if handlers is None:
+            prefix = name
+            while prefix and prefix not in self.routes:
+                prefix = prefix.rpartition(".")[0]
+            handlers = self.routes.get(prefix, self.routes.get("", []))
+            self._resolved[name] = handlers
+        return handlers
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self._handlers_for(record.name):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def close(self) -> None:
+        for handler in {id(h): h for hs in self.routes.values() for h in hs}.values():
+            handler.close()
+        super().close()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+queue_handler: Optional[DroppingQueueHandler] = None
+
+
 def setup_logging():
     """
-    Настраивает логирование для приложения.
+    Настраивает логирование для приложения (один раз на процесс).
     """
+    global _listener, queue_handler
+
     # Создаем директорию для логов если её нет
-    os.makedirs("logs", exist_ok=True)
+    if log_to_files():
+        os.makedirs("logs", exist_ok=True)
+    stop_logging()
     
-    # Применяем конфигурацию
+    # Применяем конфигурацию: dictConfig создает обработчики и уровни
     config = get_logging_config()
     logging.config.dictConfig(config)
+
+    # Обработчики логгеров переезжают в поток слушателя, сами логгеры
+    # передают записи корню, а корень - в очередь. Логгер с фильтром
+    # (выборка дампов) ставит в очередь сам: фильтр логгера не действует
+    # на записи, дошедшие до корня от потомков
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DroppingQueueHandler(log_queue)
+    routes: Dict[str, List[logging.Handler]] = {}
+    for name in config["loggers"]:
+        configured = logging.getLogger(name or None)
+        routes[name] = list(configured.handlers)
+        for handler in routes[name]:
+            configured.removeHandler(handler)
+        if not name or configured.filters:
+            configured.addHandler(queue_handler)
+            configured.propagate = False
+        else:
+            configured.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, RoutingHandler(routes))
+    _listener.start()
     
     # Получаем логгер для приложения
     logger = logging.getLogger("app")
@@ -157,6 +309,25 @@ def setup_logging():
     return logger
 
 
+def stop_logging() -> None:
+    """
+    Дописывает очередь и закрывает обработчики (при выходе процесса).
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    for configured in [logging.getLogger()] + list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(configured, logging.Logger):
+            configured.removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_logging)
+
+
 class StructuredLogger:
     """
     Структурированный логгер для лучшего мониторинга.
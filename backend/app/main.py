@@ -1,13 +1,22 @@
 # backend/app/main.py
 
 import os
+import asyncio
+import importlib
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
+from app.static_assets import static_assets, StaticAssetApp, EXCLUDED_DIRS
+from app.workers import leader_election, run_worker_sync, ASSETS_BUILT_ENV
+from app.logging_config import setup_logging
+
+# Логирование настраивается до импорта роутеров, чтобы их сообщения шли через очередь
+setup_logging()
+
 # Безопасные импорты с обработкой ошибок
 try:
     from app.core.config import get_settings
@@ -58,7 +67,12 @@ try:
 except Exception as e:
     logging.warning(f"Не удалось загрузить tts router: {e}")
 
-logging.basicConfig(level=logging.INFO)
+try:
+    from app.routers import admin
+    routers_to_include.append(('admin', admin.router))
+except Exception as e:
+    logging.warning(f"Не удалось загрузить admin router: {e}")
+
 logging.info(f"Загружено роутеров: {len(routers_to_include)}")
 
 @asynccontextmanager
@@ -66,18 +80,79 @@ async def lifespan(app: FastAPI):
     # Startup
     logging.info("🚀 Запуск PhraseWeaver API")
     
-    # Инициализация Telegram webhook
+    # Хешированные имена JS/CSS и index.html (под gunicorn их уже собрал master),
+    # затем статика читается и сжимается один раз на воркер
+    if not os.environ.get(ASSETS_BUILT_ENV):
+        try:
+            from app.asset_fingerprint import build_assets
+            await asyncio.to_thread(build_assets)
+        except Exception as e:
+            logging.error(f"❌ Ошибка сборки хешированных ассетов: {e}")
     try:
-        from app.services.telegram_bot import set_webhook
-        await set_webhook()
-        logging.info("✅ Telegram webhook установлен")
+        await asyncio.to_thread(static_assets.load)
     except Exception as e:
-        logging.error(f"❌ Ошибка установки Telegram webhook: {e}")
+        logging.error(f"❌ Ошибка загрузки статики: {e}")
+    
+    # Webhook и планировщик - один раз на сервис, их запускает воркер-лидер
+    leader_election.start(on_elected=start_leader_tasks, on_demoted=stop_leader_tasks)
+    worker_sync_task = asyncio.create_task(run_worker_sync())
+    # CPU, память и диск замеряются в фоне, health читает последний замер
+    from app.monitoring import run_system_sampler
+    system_sampler_task = asyncio.create_task(run_system_sampler())
+    
+    # Обновления Telegram принимает любой воркер, обрабатывает фоновый пул
+    try:
+        from app.services.telegram_updates import telegram_update_queue
+        telegram_update_queue.start()
+    except Exception as e:
+        logging.error(f"❌ Ошибка запуска очереди обновлений Telegram: {e}")
+    
+    # Тяжелые SDK не импортируются при старте; догружаем их в фоне,
+    # чтобы воркер сразу принимал запросы, а первый запрос не ждал импорта
+    from app.services.providers import preload
+    preload_task = asyncio.create_task(asyncio.to_thread(preload))
     
     yield
     # Shutdown
+    preload_task.cancel()
+    try:
+        from app.services.telegram_updates import telegram_update_queue
+        await telegram_update_queue.stop()
+    except Exception as e:
+        logging.error(f"❌ Ошибка остановки очереди обновлений Telegram: {e}")
+    worker_sync_task.cancel()
+    system_sampler_task.cancel()
+    if leader_election.is_leader:
+        await stop_leader_tasks()
+    await leader_election.stop()
     logging.info("🛑 Остановка PhraseWeaver API")
 
+async def start_leader_tasks():
+    """Задачи, которые выполняет только один воркер"""
+    # Инициализация Telegram webhook
+    try:
+        # aiogram импортируется долго - в потоке, не блокируя event loop
+        telegram_bot = await asyncio.to_thread(importlib.import_module, "app.services.telegram_bot")
+        await telegram_bot.set_webhook()
+        logging.info("✅ Telegram webhook установлен")
+    except Exception as e:
+        logging.error(f"❌ Ошибка установки Telegram webhook: {e}")
+    
+    # Фоновые задачи по расписанию (вытеснение медиа, напоминания)
+    try:
+        from app.scheduler import start_scheduler
+        start_scheduler()
+    except Exception as e:
+        logging.error(f"❌ Ошибка запуска планировщика: {e}")
+
+async def stop_leader_tasks():
+    """Лидерство перешло к другому воркеру или процесс завершается"""
+    try:
+        from app.scheduler import shutdown_scheduler
+        shutdown_scheduler()
+    except Exception as e:
+        logging.error(f"❌ Ошибка остановки планировщика: {e}")
+
 app = FastAPI(
     title="PhraseWeaver API",
     description="API для изучения языков через Telegram Mini App",
@@ -103,6 +178,24 @@ allowed_origins = [
     "*"  # Разрешаем все для совместимости
 ]
 
+# Порядок middleware (снаружи внутрь): логирование -> профилирование ->
+# заголовки безопасности -> сжатие -> CORS -> rate limiting. add_middleware оборачивает приложение,
+# поэтому подключаем в обратном порядке. Логирование снаружи видит полное
+# время ответа и ответы 429; rate limiting внутри CORS, чтобы 429 получил
+# CORS заголовки; сжатие снаружи CORS и заголовков, которые оно не меняет.
+
+# Rate limiting API (token bucket в Redis)
+if getattr(settings, "RATE_LIMIT_ENABLED", False):
+    try:
+        from app.middleware import RateLimitMiddleware
+        app.add_middleware(
+            RateLimitMiddleware,
+            capacity=settings.RATE_LIMIT_CAPACITY,
+            refill_per_minute=settings.RATE_LIMIT_REFILL_PER_MINUTE
+        )
+    except Exception as e:
+        logging.warning(f"⚠️ Не удалось подключить rate limiting: {e}")
+
 # Добавляем CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -115,11 +208,24 @@ app.add_middleware(
         "X-Requested-With",
         "Accept",
         "Origin",
-        "User-Agent"
+        "User-Agent",
+        "X-Profile"
     ],
-    expose_headers=["X-Request-ID"]
+    expose_headers=["X-Request-ID", "X-Profile-Id"]
 )
 
+# Сжатие ответов API (gzip, brotli/zstd при наличии библиотек)
+try:
+    from app.middleware import CompressionMiddleware, SecurityHeadersMiddleware, RequestLoggingMiddleware
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
+    if settings.PROFILING_ENABLED:
+        # Внутри логирования: профиль получает request id запроса
+        from app.profiling import ProfilingMiddleware
+        app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+except Exception as e:
+    logging.warning(f"⚠️ Не удалось подключить middleware: {e}")
 
 
 # Базовые роуты
@@ -148,38 +254,54 @@ for router_name, router in routers_to_include:
     except Exception as e:
         logging.error(f"❌ Ошибка подключения роутера {router_name}: {e}")
 
-# Статические файлы
+# Статические файлы: frontend из индекса в памяти, сгенерированные медиа с диска
 try:
-    app.mount("/static", StaticFiles(directory="frontend"), name="static")
+    app.mount(
+        "/static",
+        StaticAssetApp(static_assets, fallback=StaticFiles(directory="frontend")),
+        name="static"
+    )
     logging.info("✅ Статические файлы подключены")
 except Exception as e:
     logging.warning(f"⚠️ Не удалось подключить статические файлы: {e}")
 
+# Метрики всех воркеров для Prometheus (до SPA fallback, иначе его перехватит /{path})
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    from app.monitoring import get_prometheus_metrics, PROMETHEUS_CONTENT_TYPE
+    return PlainTextResponse(get_prometheus_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Обслуживание frontend приложения
 @app.get("/app")
-async def frontend():
-    try:
-        return FileResponse("frontend/index.html")
-    except Exception as e:
-        logging.error(f"Ошибка загрузки frontend: {e}")
-        return {"error": "Frontend недоступен", "message": str(e)}
+async def frontend(request: Request):
+    response = static_assets.respond("index.html", request)
+    if response is None:
+        logging.error("Ошибка загрузки frontend: index.html не найден")
+        return {"error": "Frontend недоступен"}
+    return response
 
 # Fallback для SPA роутинга
 @app.get("/{path:path}")
-async def serve_spa(path: str):
+async def serve_spa(path: str, request: Request):
     """Обслуживание SPA - все неизвестные пути перенаправляем на index.html"""
     try:
-        # Проверяем, существует ли файл
-        import os
-        file_path = f"frontend/{path}"
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
+        # Файл frontend - поиск по словарю без обращения к диску
+        response = static_assets.respond(path, request)
+        if response is not None:
+            return response
+        
+        # Сгенерированные медиа в индекс не входят
+        if path.startswith(EXCLUDED_DIRS) and ".." not in path:
+            file_path = f"frontend/{path}"
+            if os.path.isfile(file_path):
+                return FileResponse(file_path)
         
         # Если файл не найден, возвращаем index.html для SPA
-        if os.path.exists("frontend/index.html"):
-            return FileResponse("frontend/index.html")
+        response = static_assets.respond("index.html", request)
+        if response is not None:
+            return response
         
         return {"error": "File not found", "path": path}
     except Exception as e:
         logging.error(f"Ошибка обслуживания SPA: {e}")
-        return {"error": "SPA routing error", "message": str(e)}
\ No newline at end of file
+        return {"error": "SPA routing error", "message": str(e)}
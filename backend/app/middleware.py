@@ -1,79 +1,167 @@
 # backend/app/middleware.py
 """
-Middleware для безопасности и rate limiting.
+Middleware для безопасности, rate limiting, логирования и сжатия ответов.
+
+Все middleware написаны как чистые ASGI приложения (без BaseHTTPMiddleware):
+без лишней задачи и обертки потока на каждый запрос, потоковые ответы
+проходят без буферизации.
 """
 
+import logging
+import math
 import time
-import redis
-from typing import Dict, Optional
-from fastapi import Request, Response, HTTPException, status
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, List, Tuple
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .timing import current_timing, finish_request_timing, start_request_timing
+
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+
+
+# Стоимость запроса в токенах: генерация через AI и TTS стоит много дороже чтения
+ROUTE_COSTS: Tuple[Tuple[str, int], ...] = (
+    ("/api/cards/enrich", 20),
+    ("/api/cards/add-phrase", 20),
+    ("/api/tts/sprite", 10),
+    ("/api/cards/generate-audio", 5),
+    ("/api/tts/", 2),
+)
+DEFAULT_ROUTE_COST = 1
+
+# Не ограничиваются: webhook приходит от Telegram, статика и health - не API
+RATE_LIMIT_EXEMPT_PREFIXES = ("/api/telegram/webhook",)
+
+# Токенов, которые воркер берет из Redis за раз, и время их жизни
+RATE_LIMIT_LEASE_TOKENS = 5
+RATE_LIMIT_LEASE_SECONDS = 2.0
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+# Token bucket в Redis: пополнение, списание и TTL за один вызов.
+# Выдает до ARGV[4] токенов (аренда), если в ведре есть хотя бы ARGV[3] (стоимость).
+# Возвращает {выдано токенов, через сколько мс хватит на запрос}.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local granted = 0
+local retry_ms = 0
+if tokens >= cost then
+    granted = math.floor(math.min(math.max(cost, lease), tokens))
+    tokens = tokens - granted
+else
+    retry_ms = math.ceil((cost - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {granted, retry_ms}
+"""
 
-from .core.config import get_settings
 
-settings = get_settings()
+def route_cost(path: str) -> int:
+    """Стоимость запроса к пути в токенах"""
+    for prefix, cost in ROUTE_COSTS:
+        if path.startswith(prefix):
+            return cost
+    return DEFAULT_ROUTE_COST
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class _LocalBucket:
+    """Токены клиента в памяти воркера: аренда из Redis или собственное ведро"""
+
+    __slots__ = ("tokens", "updated_at", "expires_at")
+
+    def __init__(self, tokens: float, now: float, expires_at: float = float("inf")):
+        self.tokens = tokens
+        self.updated_at = now
+        self.expires_at = expires_at
+
+
+class RateLimitMiddleware:
     """
-    Rate limiting middleware using Redis for storage.
-    Implements sliding window rate limiting.
+    Чистый ASGI rate limiting по алгоритму token bucket.
+
+    Общее ведро клиента живет в Redis и обновляется одним Lua скриптом
+    (атомарно, без гонок между воркерами). Воркер берет из него сразу
+    несколько токенов и тратит их локально, поэтому частые дешевые
+    запросы обходятся без обращения к Redis. Без Redis каждый воркер
+    ведет собственное ведро в памяти.
     """
-    
+
     def __init__(
         self,
         app: ASGIApp,
-        calls: int = 100,  # Количество запросов
-        period: int = 60,  # Период в секундах
-        redis_url: Optional[str] = None
+        capacity: int = 100,  # Размер ведра (допустимый всплеск)
+        refill_per_minute: int = 100,  # Скорость пополнения
+        lease_tokens: int = RATE_LIMIT_LEASE_TOKENS
     ):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        
-        # Инициализируем Redis клиент
-        try:
-            import redis.asyncio as aioredis
-            self.redis = aioredis.from_url(
-                redis_url or settings.REDIS_URL,
-                decode_responses=True
-            )
-        except Exception:
-            # Fallback к in-memory storage если Redis недоступен
-            self.redis = None
-            self._memory_storage: Dict[str, list] = {}
-    
-    async def dispatch(self, request: Request, call_next):
-        # Получаем идентификатор клиента
-        client_id = self._get_client_id(request)
-        
-        # Проверяем rate limit
-        if not await self._check_rate_limit(client_id):
-            return JSONResponse(
+        self.app = app
+        self.capacity = capacity
+        self.rate = refill_per_minute / 60.0
+        self.lease_tokens = lease_tokens
+        self._leases: "OrderedDict[str, _LocalBucket]" = OrderedDict()
+        self._buckets: "OrderedDict[str, _LocalBucket]" = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or not path.startswith("/api/") or path.startswith(RATE_LIMIT_EXEMPT_PREFIXES)):
+            await self.app(scope, receive, send)
+            return
+
+        client_id = self._get_client_id(scope)
+        retry_after = await self.acquire(client_id, route_cost(path))
+        if retry_after is not None:
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
-                    "detail": f"Rate limit exceeded. Max {self.calls} requests per {self.period} seconds.",
-                    "retry_after": self.period
+                    "detail": "Rate limit exceeded. Try again later.",
+                    "retry_after": retry_after
                 },
-                headers={"Retry-After": str(self.period)}
+                headers={"Retry-After": str(retry_after)}
             )
-        
-        # Записываем запрос
-        await self._record_request(client_id)
-        
-        # Продолжаем обработку запроса
-        response = await call_next(request)
-        return response
-    
-    def _get_client_id(self, request: Request) -> str:
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def _get_client_id(self, scope: Scope) -> str:
         """
         Получает идентификатор клиента для rate limiting.
-        Использует IP адрес или user_id из токена.
+        Использует user_id из токена или IP адрес.
         """
+        headers = Headers(scope=scope)
         # Пытаемся получить user_id из заголовка Authorization
-        auth_header = request.headers.get("Authorization")
+        auth_header = headers.get("authorization")
         if auth_header and auth_header.startswith("Bearer "):
             try:
                 from .services.auth_service import auth_service
@@ -84,136 +172,406 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     return f"user:{user_id}"
             except Exception:
                 pass
-        
+
         # Fallback к IP адресу
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        forwarded_for = headers.get("x-forwarded-for")
         if forwarded_for:
             client_ip = forwarded_for.split(",")[0].strip()
-        
+
         return f"ip:{client_ip}"
-    
-    async def _check_rate_limit(self, client_id: str) -> bool:
-        """
-        Проверяет, не превышен ли rate limit для клиента.
-        """
-        current_time = time.time()
-        window_start = current_time - self.period
-        
-        if self.redis:
-            # Используем Redis для хранения
-            key = f"rate_limit:{client_id}"
-            
-            # Удаляем старые записи
-            await self.redis.zremrangebyscore(key, 0, window_start)
-            
-            # Считаем текущие запросы
-            current_requests = await self.redis.zcard(key)
-            
-            return current_requests < self.calls
-        else:
-            # Используем in-memory storage
-            if client_id not in self._memory_storage:
-                self._memory_storage[client_id] = []
-            
-            # Удаляем старые записи
-            self._memory_storage[client_id] = [
-                timestamp for timestamp in self._memory_storage[client_id]
-                if timestamp > window_start
-            ]
-            
-            return len(self._memory_storage[client_id]) < self.calls
-    
-    async def _record_request(self, client_id: str):
+
+    @staticmethod
+    def _remember(storage: "OrderedDict[str, _LocalBucket]", client_id: str, bucket: _LocalBucket) -> None:
+        storage[client_id] = bucket
+        storage.move_to_end(client_id)
+        if len(storage) > RATE_LIMIT_MAX_CLIENTS:
+            storage.popitem(last=False)
+
+    async def acquire(self, client_id: str, cost: int) -> Optional[int]:
         """
-        Записывает новый запрос для клиента.
+        Списывает токены за запрос.
+
+        Returns:
+            None, если запрос разрешен, иначе через сколько секунд повторить
         """
-        current_time = time.time()
-        
-        if self.redis:
-            # Используем Redis
-            key = f"rate_limit:{client_id}"
-            await self.redis.zadd(key, {str(current_time): current_time})
-            await self.redis.expire(key, self.period + 1)
-        else:
-            # Используем in-memory storage
-            if client_id not in self._memory_storage:
-                self._memory_storage[client_id] = []
-            
-            self._memory_storage[client_id].append(current_time)
+        now = time.monotonic()
+
+        # Локальная проверка: арендованных токенов хватает - Redis не нужен
+        lease = self._leases.get(client_id)
+        if lease is not None and lease.expires_at > now and lease.tokens >= cost:
+            lease.tokens -= cost
+            return None
+
+        from .services.utils import redis_client
+        result = await redis_client.eval(
+            _TOKEN_BUCKET_SCRIPT,
+            [f"rate_limit:{client_id}"],
+            [self.capacity, self.rate, cost, max(cost, self.lease_tokens)]
+        )
+        if result is None:
+            return self._acquire_local(client_id, cost, now)
+
+        granted, retry_ms = int(result[0]), int(result[1])
+        if granted < cost:
+            return max(1, -(-retry_ms // 1000))
+        self._remember(
+            self._leases, client_id,
+            _LocalBucket(granted - cost, now, expires_at=now + RATE_LIMIT_LEASE_SECONDS)
+        )
+        return None
+
+    def _acquire_local(self, client_id: str, cost: int, now: float) -> Optional[int]:
+        """Ведро в памяти воркера, когда Redis недоступен"""
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = _LocalBucket(self.capacity, now)
+        bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated_at) * self.rate)
+        bucket.updated_at = now
+        self._remember(self._buckets, client_id, bucket)
+
+        if bucket.tokens < cost:
+            return max(1, math.ceil((cost - bucket.tokens) / self.rate))
+        bucket.tokens -= cost
+        return None
+
 
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+# Content Security Policy для страниц и статики frontend. Внешние источники
+# frontend (telegram-web-app.js, Google Fonts, API из js/api.js) сверяет
+# tests/test_middleware.py. Mini App открывается в iframe веб-клиента
+# Telegram, поэтому вместо X-Frame-Options: DENY встраивание разрешено
+# только Telegram
+CONTENT_SECURITY_POLICY = (
+    b"default-src 'self'; "
+    b"script-src 'self' 'unsafe-inline' https://telegram.org; "
+    b"style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+    b"font-src 'self' https://fonts.gstatic.com; "
+    b"img-src 'self' data: https:; "
+    b"connect-src 'self' https://api.telegram.org https://pw-new.club; "
+    b"frame-ancestors 'self' https://web.telegram.org;"
+)
+
+# API не встраивается никуда, страницы - только в Telegram
+API_SECURITY_HEADERS = SECURITY_HEADERS + [(b"x-frame-options", b"DENY")]
+PAGE_SECURITY_HEADERS = SECURITY_HEADERS + [(b"content-security-policy", CONTENT_SECURITY_POLICY)]
+
+
+class SecurityHeadersMiddleware:
     """
-    Middleware для добавления заголовков безопасности.
+    Чистый ASGI middleware для добавления заголовков безопасности.
+    Заголовки дописываются в http.response.start, тело ответа не трогается.
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Добавляем заголовки безопасности
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        # Content Security Policy для дополнительной защиты
-        if request.url.path.startswith("/static/") or request.url.path == "/app":
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' https://telegram.org; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data: https:; "
-                "connect-src 'self' https://api.telegram.org;"
-            )
-        
-        return response
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Все, что не /api, может оказаться страницей Mini App (/, /app, SPA fallback)
+        if scope["path"].startswith("/api/"):
+            extra_headers = API_SECURITY_HEADERS
+        else:
+            extra_headers = PAGE_SECURITY_HEADERS
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def record_request_metrics(scope: Scope, duration: float, status_code: int) -> None:
+    """Время запроса в гистограмму маршрута (шаблон пути ставит роутер Starlette)"""
+    from .monitoring import metrics_collector
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+    route = scope.get("route")
+    metrics_collector.record_request(
+        duration, status_code, endpoint=scope["path"], method=scope["method"],
+        route=getattr(route, "path", None) or "unmatched"
+    )
+
+
+class RequestLoggingMiddleware:
     """
-    Middleware для логирования запросов.
+    Чистый ASGI middleware для логирования запросов.
+
+    Время считается до отправки последнего чанка тела, поэтому для
+    потоковых ответов учитывается вся передача. Ответ получает
+    заголовки X-Request-ID и Server-Timing (этапы из app.timing),
+    разбивка по этапам пишется JSON строкой с тем же request id.
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        import logging
-        import uuid
-        
-        # Генерируем уникальный ID для запроса
-        request_id = str(uuid.uuid4())[:8]
-        
-        # Логируем входящий запрос
-        logger = logging.getLogger("api.requests")
-        start_time = time.time()
-        
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
-        
-        logger.info(
-            f"[{request_id}] {request.method} {request.url.path} - "
-            f"Client: {client_ip} - User-Agent: {request.headers.get('User-Agent', 'unknown')}"
-        )
-        
-        # Обрабатываем запрос
-        try:
-            response = await call_next(request)
-            
-            # Логируем ответ
-            process_time = time.time() - start_time
-            logger.info(
-                f"[{request_id}] Response: {response.status_code} - "
-                f"Time: {process_time:.3f}s"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.logger = logging.getLogger("api.requests")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Генерируем уникальный ID для запроса и контекст разбивки времени
+        request_id = uuid.uuid4().hex[:8]
+        timing_token = start_request_timing(request_id)
+        timing = current_timing()
+        start_time = time.perf_counter()
+        path = scope["path"]
+        status_code = 500
+
+        if self.logger.isEnabledFor(logging.INFO):
+            headers = Headers(scope=scope)
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+            forwarded_for = headers.get("x-forwarded-for")
+            if forwarded_for:
+                client_ip = forwarded_for.split(",")[0].strip()
+            self.logger.info(
+                f"[{request_id}] {scope['method']} {path} - "
+                f"Client: {client_ip} - User-Agent: {headers.get('user-agent', 'unknown')}"
             )
-            
-            return response
-            
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"x-request-id", request_id.encode()),
+                        (b"server-timing", timing.server_timing().encode()),
+                    ]
+                }
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                process_time = time.perf_counter() - start_time
+                self.logger.info(f"[{request_id}] Response: {status_code} - Time: {process_time:.3f}s")
+                if timing.spans:
+                    self.logger.info(timing.as_log_record(method=scope["method"], path=path, status=status_code))
+                record_request_metrics(scope, process_time, status_code)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
             # Логируем ошибки
-            process_time = time.time() - start_time
-            logger.error(
-                f"[{request_id}] Error: {str(e)} - Time: {process_time:.3f}s"
-            )
-            raise
\ No newline at end of file
+            process_time = time.perf_counter() - start_time
+            self.logger.error(f"[{request_id}] Error: {str(e)} - Time: {process_time:.3f}s")
+            self.logger.error(timing.as_log_record(method=scope["method"], path=path, status=500))
+            record_request_metrics(scope, process_time, 500)
+            raise
+        finally:
+            finish_request_timing(timing_token)
+
+
+# Типы, которые имеет смысл сжимать; аудио и картинки уже сжаты
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+COMPRESSION_MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # Для динамических ответов: почти как gzip -9, но быстрее
+ZSTD_LEVEL = 3
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+def available_encodings() -> List[str]:
+    """Кодировки в порядке предпочтения сервера"""
+    encodings = []
+    if ZSTD_AVAILABLE:
+        encodings.append("zstd")
+    if BROTLI_AVAILABLE:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def select_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """
+    Выбирает кодировку по Accept-Encoding
+
+    Из принятых клиентом (q > 0) выбирается кодировка с наибольшим q,
+    при равенстве - первая в порядке предпочтения сервера.
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip()
+        if not name:
+            continue
+        quality = 1.0
+        param_name, _, value = params.strip().partition("=")
+        if param_name == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(encoding, wildcard), -index, encoding)
+        for index, encoding in enumerate(supported)
+    ]
+    candidates = [candidate for candidate in candidates if candidate[0] > 0]
+    return max(candidates)[2] if candidates else None
+
+
+class CompressionMiddleware:
+    """
+    Чистый ASGI middleware для сжатия ответов (gzip, brotli и zstd при наличии библиотек).
+
+    Ответ сжимается потоково: чанки StreamingResponse (например NDJSON)
+    отправляются сразу после сжатия. Маленькие ответы, уже сжатые типы
+    и ответы с Content-Encoding или Content-Range пропускаются.
+    """
+
+    STREAMS = {"gzip": _GzipStream, "br": _BrotliStream, "zstd": _ZstdStream}
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.STREAMS[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Состояние сжатия одного ответа"""
+
+    def __init__(self, send: Send, encoding: str, stream_class, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.stream_class = stream_class
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.stream = None
+        self.passthrough = False
+        self.original_bytes = 0
+        self.compressed_bytes = 0
+        self.cpu_seconds = 0.0
+
+    def _should_compress(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+    def _compress(self, body: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        compressed = self.stream.compress(body, final)
+        self.cpu_seconds += time.thread_time() - started
+        self.original_bytes += len(body)
+        self.compressed_bytes += len(compressed)
+        return compressed
+
+    async def _start(self, headers_to_update: List[Tuple[str, str]]) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        for name, value in headers_to_update:
+            headers[name] = value
+        headers.add_vary_header("Accept-Encoding")
+        await self._send(self.start_message)
+
+    def _record_metrics(self) -> None:
+        from .monitoring import metrics_collector
+        metrics_collector.record_compression(
+            self.encoding, self.original_bytes, self.compressed_bytes, self.cpu_seconds
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Копия с изменяемым списком заголовков
+            message = {**message, "headers": list(message.get("headers", []))}
+            self.start_message = message
+            self.passthrough = not self._should_compress(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None:
+            # Первый чанк: решаем, стоит ли сжимать
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.stream = self.stream_class()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if "content-length" in headers:
+                del headers["content-length"]
+            compressed = self._compress(body, final=not more_body)
+            update = [("Content-Encoding", self.encoding)]
+            if not more_body:
+                update.append(("Content-Length", str(len(compressed))))
+            await self._start(update)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+        else:
+            compressed = self._compress(body, final=not more_body)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        if not more_body:
+            self._record_metrics()
+
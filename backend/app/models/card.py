@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, JSON
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from app.database import Base
 
@@ -12,7 +13,7 @@ class Card(Base):
     gap_fill = Column(String)  # Фраза с пропущенным ключевым словом
     audio_path = Column(String)
     image_path = Column(String)
-    examples = Column(JSON)  # List of additional examples
+    examples = deferred(Column(JSON))  # List of additional examples (грузится только при обращении)
     due_date = Column(DateTime, default=datetime.utcnow)
     interval = Column(Float, default=1.0)  # Days
     ease_factor = Column(Float, default=2.5)
\ No newline at end of file
@@ -12,4 +12,5 @@ class Deck(Base):
     lang_to = Column(String)
     cards_count = Column(Integer, default=0)
     due_count = Column(Integer, default=0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Растет при любом изменении карточек (ETag)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
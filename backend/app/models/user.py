@@ -13,4 +13,5 @@ class User(Base):
     is_premium = Column(Boolean, default=False)
     is_bot = Column(Boolean, default=False)
     last_active = Column(DateTime, default=datetime.utcnow)
-    settings = Column(JSON, default={})
\ No newline at end of file
+    settings = Column(JSON, default={})
+    decks_version = Column(Integer, nullable=False, default=1, server_default="1")  # Версия списка колод (ETag)
\ No newline at end of file
@@ -1,19 +1,198 @@
 # backend/app/monitoring.py
 """
 Мониторинг и метрики приложения.
+
+Счетчики и гистограммы задержек пишут RequestLoggingMiddleware (маршруты),
+события SQLAlchemy (запросы и пул соединений) и RedisClient (кэш).
+Сводка по всем воркерам отдается в /metrics в текстовом формате Prometheus.
+
+Память сборщика не растет со временем: поминутные счетчики лежат в
+кольцевых буферах, задержки - в логарифмических скетчах (p50/p95/p99),
+которые складываются между воркерами.
 """
 
+import os
+import json
+import math
 import time
-import psutil
 import asyncio
-from typing import Dict, Any, Optional
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from contextlib import asynccontextmanager
 
 from .logging_config import app_logger
 
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+# Границы бакетов гистограмм задержки в секундах (как в prometheus_client)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Интервал фонового замера CPU, памяти и диска
+SYSTEM_METRICS_INTERVAL_SECONDS = 5
+
+
+def new_histogram() -> Dict[str, Any]:
+    """Пустая гистограмма: число попаданий в каждый бакет (не накопительно), count и sum"""
+    return {"buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0}
+
+
+def observe(histogram: Dict[str, Any], value: float):
+    """Добавляет значение в гистограмму (бакет le - первая граница >= value)"""
+    index = bisect_left(LATENCY_BUCKETS, value)
+    if index < len(LATENCY_BUCKETS):
+        histogram["buckets"][index] += 1
+    histogram["count"] += 1
+    histogram["sum"] += value
+
+
+def copy_histogram(histogram: Dict[str, Any]) -> Dict[str, Any]:
+    return {**histogram, "buckets": list(histogram["buckets"])}
+
+
+def merge_histogram(target: Dict[str, Any], source: Dict[str, Any]):
+    target["buckets"] = [mine + theirs for mine, theirs in zip(target["buckets"], source["buckets"])]
+    target["count"] += source["count"]
+    target["sum"] += source["sum"]
+
+
+# Поминутные счетчики хранятся за последний час
+MINUTE_RING_SIZE = 60
+
+# Скетч задержек: бакеты растут в SKETCH_GAMMA раз, от 0.1 мс до 1000 с.
+# Оценка квантиля - середина бакета, относительная ошибка (γ-1)/(γ+1) ≈ 2%
+SKETCH_GAMMA = 1.04
+SKETCH_MIN_SECONDS = 1e-4
+SKETCH_MAX_SECONDS = 1e3
+_SKETCH_LOG_GAMMA = math.log(SKETCH_GAMMA)
+SKETCH_BUCKETS = int(math.ceil(math.log(SKETCH_MAX_SECONDS / SKETCH_MIN_SECONDS) / _SKETCH_LOG_GAMMA)) + 1
+
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+# Сколько отпечатков медленных запросов хранить (вытесняются давно не встречавшиеся)
+SLOW_QUERY_FINGERPRINTS = 200
+
+
+def current_minute() -> int:
+    """Номер текущей минуты с начала эпохи (UTC)"""
+    return int(time.time() // 60)
+
+
+class MinuteRing:
+    """
+    Поминутные значения за последние size минут в массиве фиксированного размера.
+    
+    Ячейка minute % size хранит значение и номер своей минуты;
+    ячейка прошлого круга обнуляется при первой записи в новую минуту.
+    """
+    
+    __slots__ = ("size", "minutes", "values")
+    
+    def __init__(self, size: int = MINUTE_RING_SIZE, typecode: str = "q"):
+        self.size = size
+        self.minutes = array("q", [-1] * size)
+        self.values = array(typecode, [0] * size)
+    
+    def add(self, minute: int, value: float = 1):
+        slot = minute % self.size
+        if self.minutes[slot] != minute:
+            if self.minutes[slot] > minute:
+                # Минута старше окна (снимок другого воркера) - уже не учитывается
+                return
+            self.minutes[slot] = minute
+            self.values[slot] = 0
+        self.values[slot] += value
+    
+    def sum_recent(self, minutes: int, now: Optional[int] = None) -> float:
+        """Сумма за последние minutes минут, включая текущую"""
+        now = current_minute() if now is None else now
+        oldest = now - minutes + 1
+        return sum(value for minute, value in zip(self.minutes, self.values) if oldest <= minute <= now)
+    
+    def snapshot(self) -> List[List[float]]:
+        return [[minute, value] for minute, value in zip(self.minutes, self.values) if minute >= 0]
+    
+    def merge_snapshot(self, entries: List[List[float]]):
+        for minute, value in entries:
+            self.add(int(minute), value)
+
+
+class LatencySketch:
+    """
+    Скетч распределения задержек с логарифмическими бакетами (как DDSketch/HDR).
+    
+    Память постоянна (SKETCH_BUCKETS счетчиков), два скетча складываются
+    поэлементно, поэтому квантили по всем воркерам считаются точно так же,
+    как по одному.
+    """
+    
+    __slots__ = ("counts", "count", "sum", "max")
+    
+    def __init__(self):
+        self.counts = array("q", [0] * SKETCH_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def add(self, value: float):
+        if value <= SKETCH_MIN_SECONDS:
+            index = 0
+        else:
+            index = min(SKETCH_BUCKETS - 1, int(math.ceil(math.log(value / SKETCH_MIN_SECONDS) / _SKETCH_LOG_GAMMA)))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+    
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля q (0..1) в секундах"""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative > rank:
+                # Бакет (MIN·γ^(i-1), MIN·γ^i], оценка с минимальной относительной ошибкой
+                estimate = SKETCH_MIN_SECONDS * SKETCH_GAMMA ** index * 2 / (1 + SKETCH_GAMMA)
+                return min(estimate, self.max)
+        return self.max
+    
+    def percentiles(self) -> Dict[str, float]:
+        """{"p50", "p95", "p99", "count", "mean", "max"}"""
+        result = {f"p{round(q * 100)}": self.quantile(q) for q in REPORTED_QUANTILES}
+        result.update(count=self.count, mean=self.sum / self.count if self.count else 0.0, max=self.max)
+        return result
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "counts": {str(index): count for index, count in enumerate(self.counts) if count},
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max
+        }
+    
+    def merge_snapshot(self, data: Dict[str, Any]):
+        for index, count in data["counts"].items():
+            self.counts[int(index)] += count
+        self.count += data["count"]
+        self.sum += data["sum"]
+        self.max = max(self.max, data["max"])
+
 
 @dataclass
 class SystemMetrics:
@@ -37,32 +216,78 @@ class ApplicationMetrics:
     database_connections: int
     redis_connections: int
     timestamp: datetime
+    response_time_p50: float = 0.0
+    response_time_p95: float = 0.0
+    response_time_p99: float = 0.0
 
 
 class MetricsCollector:
     """
     Сборщик метрик приложения.
+    
+    Записывают метрики event loop и потоки (sync эндпоинты, SQL, EXPLAIN),
+    а snapshot() читают из потока (/metrics, write_snapshot), поэтому
+    изменения и снимок идут под одной блокировкой.
     """
     
     def __init__(self):
-        self.request_times = deque(maxlen=1000)  # Последние 1000 запросов
-        self.request_counts = defaultdict(int)  # Счетчики запросов по минутам
-        self.error_counts = defaultdict(int)    # Счетчики ошибок по минутам
+        self._lock = threading.Lock()
+        
+        # Поминутные счетчики за последний час (кольцевые буферы)
+        self.request_counts = MinuteRing()
+        self.error_counts = MinuteRing()
+        self.response_time_sums = MinuteRing(typecode="d")
+        self.total_requests = 0
+        
+        # Распределение задержек: всего и по маршрутам ("METHOD route")
+        self.latency = LatencySketch()
+        self.route_sketches = defaultdict(LatencySketch)
         self.active_users = set()               # Активные пользователи
         self.user_last_seen = {}               # Последняя активность пользователей
         
         # Метрики производительности
         self.slow_queries = deque(maxlen=100)   # Медленные запросы к БД
+        self.slow_query_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # По отпечатку SQL
         self.cache_hits = 0
         self.cache_misses = 0
         
+        # Сжатие ответов по кодировкам (gzip, br, zstd)
+        self.compression = defaultdict(lambda: {
+            "responses": 0,
+            "original_bytes": 0,
+            "compressed_bytes": 0,
+            "cpu_seconds": 0.0
+        })
+        
+        # Вытеснение медиафайлов по классам (audio, images)
+        self.media_eviction = defaultdict(lambda: {
+            "runs": 0,
+            "evicted_files": 0,
+            "reclaimed_bytes": 0,
+            "total_bytes": 0
+        })
+        
+        # Гистограммы задержки: маршруты ("METHOD route status") и SQL по типу запроса
+        self.route_latency = defaultdict(new_histogram)
+        self.db_query_latency = defaultdict(new_histogram)
+        self.db_pool_checkouts = 0
+        
+        # Текущие значения (соединения пулов), обновляет refresh_gauges()
+        self.gauges = {
+            "db_pool_size": 0,
+            "db_pool_checked_out": 0,
+            "db_pool_overflow": 0,
+            "redis_connections": 0
+        }
+        
         # Системные метрики
         self.system_metrics_history = deque(maxlen=60)  # Последние 60 измерений
         
         self._start_time = datetime.utcnow()
     
     def record_request(self, duration: float, status_code: int, 
-                      user_id: Optional[int] = None, endpoint: str = ""):
+                      user_id: Optional[int] = None, endpoint: str = "",
+                      method: str = "", route: str = ""):
         """
         Записывает метрики запроса.
         
@@ -71,24 +296,32 @@ class MetricsCollector:
             status_code: HTTP статус код
             user_id: ID пользователя (если авторизован)
             endpoint: Эндпоинт API
+            method: HTTP метод
+            route: Шаблон маршрута (/api/decks/{deck_id}), а не путь - ограничивает число серий
         """
         current_time = datetime.utcnow()
-        minute_key = current_time.replace(second=0, microsecond=0)
-        
-        # Записываем время ответа
-        self.request_times.append(duration)
+        minute = current_minute()
         
-        # Увеличиваем счетчик запросов
-        self.request_counts[minute_key] += 1
-        
-        # Записываем ошибки
-        if status_code >= 400:
-            self.error_counts[minute_key] += 1
-        
-        # Обновляем активных пользователей
-        if user_id:
-            self.active_users.add(user_id)
-            self.user_last_seen[user_id] = current_time
+        with self._lock:
+            # Записываем время ответа
+            self.latency.add(duration)
+            self.response_time_sums.add(minute, duration)
+            if route:
+                observe(self.route_latency[f"{method} {route} {status_code}"], duration)
+                self.route_sketches[f"{method} {route}"].add(duration)
+            
+            # Увеличиваем счетчик запросов
+            self.request_counts.add(minute)
+            self.total_requests += 1
+            
+            # Записываем ошибки
+            if status_code >= 400:
+                self.error_counts.add(minute)
+            
+            # Обновляем активных пользователей
+            if user_id:
+                self.active_users.add(user_id)
+                self.user_last_seen[user_id] = current_time
         
         # Логируем медленные запросы
         if duration > 1.0:  # Запросы дольше 1 секунды
@@ -108,19 +341,84 @@ class MetricsCollector:
             duration: Время выполнения в секундах
             query: SQL запрос (опционально)
         """
-        if duration > 0.5:  # Медленные запросы (больше 500ms)
+        with self._lock:
+            observe(self.db_query_latency[query_type], duration)
+    
+    def record_slow_query(self, fingerprint: str, query: str, duration: float):
+        """
+        Записывает медленный запрос (порог - SLOW_QUERY_THRESHOLD_MS, см. app/slow_queries.py).
+        
+        Args:
+            fingerprint: SQL без литералов и параметров
+            query: Исходный SQL
+            duration: Время выполнения в секундах
+        """
+        query_type = query.lstrip().split(None, 1)[0].upper() if query.strip() else "OTHER"
+        now = datetime.utcnow()
+        with self._lock:
             self.slow_queries.append({
                 "type": query_type,
                 "duration": duration,
-                "query": query[:200] if query else "",  # Первые 200 символов
-                "timestamp": datetime.utcnow()
+                "query": query[:200],  # Первые 200 символов
+                "fingerprint": fingerprint,
+                "timestamp": now
             })
             
-            app_logger.log_performance(
-                f"Slow database query ({query_type})",
-                duration,
-                {"query_preview": query[:100] if query else ""}
-            )
+            stats = self.slow_query_stats.get(fingerprint)
+            if stats is None:
+                stats = {
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "sample": query[:2000],
+                    "plan": None,
+                    "plan_captured_at": None
+                }
+                self.slow_query_stats[fingerprint] = stats
+                if len(self.slow_query_stats) > SLOW_QUERY_FINGERPRINTS:
+                    self.slow_query_stats.popitem(last=False)
+            else:
+                self.slow_query_stats.move_to_end(fingerprint)
+            stats["count"] += 1
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+            stats["last_seen"] = now.isoformat()
+        
+        app_logger.log_performance(
+            f"Slow database query ({query_type})",
+            duration,
+            {"query_preview": query[:100], "fingerprint": fingerprint[:200]}
+        )
+    
+    def attach_query_plan(self, fingerprint: str, plan: str):
+        """
+        Сохраняет план выполнения (EXPLAIN) для отпечатка.
+        
+        Args:
+            fingerprint: Отпечаток запроса
+            plan: Текст плана
+        """
+        with self._lock:
+            stats = self.slow_query_stats.get(fingerprint)
+            if stats is not None:
+                stats["plan"] = plan
+                stats["plan_captured_at"] = datetime.utcnow().isoformat()
+    
+    def get_slow_query_report(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Медленные запросы по отпечаткам, самые затратные (по суммарному времени) первыми.
+        
+        Args:
+            limit: Сколько отпечатков вернуть
+            
+        Returns:
+            List: [{"fingerprint", "count", "total_seconds", "mean_seconds", "max_seconds", "sample", "plan", ...}]
+        """
+        ranked = sorted(self.slow_query_stats.items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        return [
+            {"fingerprint": fingerprint, **stats, "mean_seconds": stats["total_seconds"] / stats["count"]}
+            for fingerprint, stats in ranked[:limit]
+        ]
     
     def record_cache_operation(self, operation: str, hit: bool):
         """
@@ -130,10 +428,195 @@ class MetricsCollector:
             operation: Тип операции (get, set, delete)
             hit: True если попадание в кэш, False если промах
         """
-        if hit:
-            self.cache_hits += 1
-        else:
-            self.cache_misses += 1
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+    
+    def record_compression(self, encoding: str, original_bytes: int,
+                           compressed_bytes: int, cpu_seconds: float):
+        """
+        Записывает сжатие одного ответа.
+        
+        Args:
+            encoding: Кодировка (gzip, br, zstd)
+            original_bytes: Размер до сжатия
+            compressed_bytes: Размер после сжатия
+            cpu_seconds: Процессорное время сжатия
+        """
+        with self._lock:
+            totals = self.compression[encoding]
+            totals["responses"] += 1
+            totals["original_bytes"] += original_bytes
+            totals["compressed_bytes"] += compressed_bytes
+            totals["cpu_seconds"] += cpu_seconds
+    
+    def get_compression_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Статистика сжатия с коэффициентом по каждой кодировке.
+        
+        Returns:
+            Dict: {encoding: {..., "ratio"}}
+        """
+        return {
+            encoding: {
+                **totals,
+                "ratio": (
+                    totals["original_bytes"] / totals["compressed_bytes"]
+                    if totals["compressed_bytes"] else 0.0
+                )
+            }
+            for encoding, totals in self.compression.items()
+        }
+    
+    def record_media_eviction(self, media_class: str, stats: Dict[str, int]):
+        """
+        Записывает результат прохода вытеснения медиафайлов.
+        
+        Args:
+            media_class: Класс медиа (audio, images)
+            stats: {"total_bytes", "evicted_files", "reclaimed_bytes"}
+        """
+        with self._lock:
+            totals = self.media_eviction[media_class]
+            totals["runs"] += 1
+            totals["evicted_files"] += stats["evicted_files"]
+            totals["reclaimed_bytes"] += stats["reclaimed_bytes"]
+            totals["total_bytes"] = stats["total_bytes"]
+    
+    def record_pool_checkout(self):
+        """Соединение выдано из пула SQLAlchemy."""
+        with self._lock:
+            self.db_pool_checkouts += 1
+    
+    def refresh_gauges(self):
+        """Читает текущее состояние пулов соединений БД и Redis этого процесса."""
+        from . import database
+        from .services.utils import redis_client
+        
+        size = checked_out = overflow = 0
+        engines = [database.engine]
+        if database.async_engine is not None:
+            engines.append(database.async_engine.sync_engine)
+        for engine in engines:
+            if engine is None:
+                continue
+            # У пулов SQLite (StaticPool, SingletonThreadPool) нет этих счетчиков
+            pool = engine.pool
+            size += pool.size() if hasattr(pool, "size") else 0
+            checked_out += pool.checkedout() if hasattr(pool, "checkedout") else 0
+            overflow += max(0, pool.overflow()) if hasattr(pool, "overflow") else 0
+        self.gauges["db_pool_size"] = size
+        self.gauges["db_pool_checked_out"] = checked_out
+        self.gauges["db_pool_overflow"] = overflow
+        self.gauges["redis_connections"] = redis_client.connection_count()
+    
+    def snapshot(self, refresh_gauges: bool = True) -> Dict[str, Any]:
+        """
+        Снимок счетчиков воркера для сводки по всем процессам.
+        
+        Args:
+            refresh_gauges: Перечитать пулы соединений этого процесса
+            
+        Returns:
+            Dict: JSON-совместимое состояние сборщика
+        """
+        if refresh_gauges:
+            self.refresh_gauges()
+        # Копии, а не ссылки: json.dumps снимка идет уже без блокировки
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "start_time": self._start_time.isoformat(),
+                "request_counts": self.request_counts.snapshot(),
+                "error_counts": self.error_counts.snapshot(),
+                "response_time_sums": self.response_time_sums.snapshot(),
+                "total_requests": self.total_requests,
+                "latency": self.latency.snapshot(),
+                "route_sketches": {route: sketch.snapshot() for route, sketch in self.route_sketches.items()},
+                "user_last_seen": {str(user_id): seen.isoformat() for user_id, seen in self.user_last_seen.items()},
+                "slow_queries": [
+                    {**query, "timestamp": query["timestamp"].isoformat()} for query in self.slow_queries
+                ],
+                "slow_query_stats": {fingerprint: dict(stats) for fingerprint, stats in self.slow_query_stats.items()},
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "compression": {encoding: dict(totals) for encoding, totals in self.compression.items()},
+                "media_eviction": {media_class: dict(totals) for media_class, totals in self.media_eviction.items()},
+                "route_latency": {key: copy_histogram(histogram) for key, histogram in self.route_latency.items()},
+                "db_query_latency": {key: copy_histogram(histogram) for key, histogram in self.db_query_latency.items()},
+                "db_pool_checkouts": self.db_pool_checkouts,
+                "gauges": dict(self.gauges)
+            }
+    
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """
+        Добавляет к сборщику счетчики другого воркера.
+        
+        Args:
+            snapshot: Результат snapshot() другого процесса
+        """
+        self._start_time = min(self._start_time, datetime.fromisoformat(snapshot["start_time"]))
+        self.request_counts.merge_snapshot(snapshot["request_counts"])
+        self.error_counts.merge_snapshot(snapshot["error_counts"])
+        self.response_time_sums.merge_snapshot(snapshot["response_time_sums"])
+        self.total_requests += snapshot["total_requests"]
+        self.latency.merge_snapshot(snapshot["latency"])
+        for route, sketch in snapshot["route_sketches"].items():
+            self.route_sketches[route].merge_snapshot(sketch)
+        for user_id, seen in snapshot["user_last_seen"].items():
+            seen = datetime.fromisoformat(seen)
+            if seen > self.user_last_seen.get(int(user_id), datetime.min):
+                self.user_last_seen[int(user_id)] = seen
+                self.active_users.add(int(user_id))
+        for query in snapshot["slow_queries"]:
+            self.slow_queries.append({**query, "timestamp": datetime.fromisoformat(query["timestamp"])})
+        for fingerprint, stats in snapshot.get("slow_query_stats", {}).items():
+            merged = self.slow_query_stats.get(fingerprint)
+            if merged is None:
+                self.slow_query_stats[fingerprint] = dict(stats)
+                continue
+            merged["count"] += stats["count"]
+            merged["total_seconds"] += stats["total_seconds"]
+            merged["max_seconds"] = max(merged["max_seconds"], stats["max_seconds"])
+            merged["last_seen"] = max(merged["last_seen"], stats["last_seen"])
+            # Берем самый свежий план из всех воркеров
+            if stats["plan"] and (merged["plan_captured_at"] or "") < stats["plan_captured_at"]:
+                merged["plan"] = stats["plan"]
+                merged["plan_captured_at"] = stats["plan_captured_at"]
+        self.cache_hits += snapshot["cache_hits"]
+        self.cache_misses += snapshot["cache_misses"]
+        for encoding, totals in snapshot["compression"].items():
+            for name, value in totals.items():
+                self.compression[encoding][name] += value
+        for media_class, totals in snapshot["media_eviction"].items():
+            merged = self.media_eviction[media_class]
+            merged["runs"] += totals["runs"]
+            merged["evicted_files"] += totals["evicted_files"]
+            merged["reclaimed_bytes"] += totals["reclaimed_bytes"]
+            merged["total_bytes"] = max(merged["total_bytes"], totals["total_bytes"])
+        for key, histogram in snapshot.get("route_latency", {}).items():
+            merge_histogram(self.route_latency[key], histogram)
+        for query_type, histogram in snapshot.get("db_query_latency", {}).items():
+            merge_histogram(self.db_query_latency[query_type], histogram)
+        self.db_pool_checkouts += snapshot.get("db_pool_checkouts", 0)
+        # Соединения разных процессов не пересекаются - суммируем
+        for name, value in snapshot.get("gauges", {}).items():
+            self.gauges[name] = self.gauges.get(name, 0) + value
+    
+    def write_snapshot(self, directory: Path):
+        """
+        Атомарно сохраняет снимок воркера в <directory>/<pid>.json.
+        
+        Args:
+            directory: Общий каталог снимков всех воркеров
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f"{os.getpid()}.json"
+        tmp_path = target.with_name(target.name + ".part")
+        tmp_path.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        tmp_path.replace(target)
     
     def cleanup_old_users(self, inactive_minutes: int = 30):
         """
@@ -144,27 +627,33 @@ class MetricsCollector:
         """
         cutoff_time = datetime.utcnow() - timedelta(minutes=inactive_minutes)
         
-        inactive_users = [
-            user_id for user_id, last_seen in self.user_last_seen.items()
-            if last_seen < cutoff_time
-        ]
-        
-        for user_id in inactive_users:
-            self.active_users.discard(user_id)
-            del self.user_last_seen[user_id]
+        with self._lock:
+            inactive_users = [
+                user_id for user_id, last_seen in self.user_last_seen.items()
+                if last_seen < cutoff_time
+            ]
+            
+            for user_id in inactive_users:
+                self.active_users.discard(user_id)
+                del self.user_last_seen[user_id]
     
-    def get_system_metrics(self) -> SystemMetrics:
+    def sample_system_metrics(self) -> SystemMetrics:
         """
-        Получает текущие системные метрики.
+        Замеряет системные метрики и добавляет их в историю.
+        Не ждет: CPU считается с предыдущего замера (run_system_sampler).
         
         Returns:
             SystemMetrics: Метрики системы
         """
+        if not PSUTIL_AVAILABLE:
+            # Без psutil системные метрики недоступны, метрики приложения работают
+            return SystemMetrics(0.0, 0.0, 0.0, 0.0, 0.0, datetime.utcnow())
+        
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
         metrics = SystemMetrics(
-            cpu_percent=psutil.cpu_percent(interval=1),
+            cpu_percent=psutil.cpu_percent(interval=None),
             memory_percent=memory.percent,
             memory_used_mb=memory.used / 1024 / 1024,
             memory_available_mb=memory.available / 1024 / 1024,
@@ -177,6 +666,17 @@ class MetricsCollector:
         
         return metrics
     
+    def get_system_metrics(self) -> SystemMetrics:
+        """
+        Последний замер фонового сэмплера (O(1), без ожидания).
+        
+        Returns:
+            SystemMetrics: Метрики системы (нули, пока замеров нет)
+        """
+        if self.system_metrics_history:
+            return self.system_metrics_history[-1]
+        return SystemMetrics(0.0, 0.0, 0.0, 0.0, 0.0, datetime.utcnow())
+    
     def get_application_metrics(self) -> ApplicationMetrics:
         """
         Получает текущие метрики приложения.
@@ -190,24 +690,18 @@ class MetricsCollector:
         self.cleanup_old_users()
         
         # Вычисляем запросы в минуту (за последние 5 минут)
-        five_minutes_ago = current_time - timedelta(minutes=5)
-        recent_requests = sum(
-            count for minute, count in self.request_counts.items()
-            if minute >= five_minutes_ago
-        )
+        minute = current_minute()
+        recent_requests = self.request_counts.sum_recent(5, minute)
         requests_per_minute = recent_requests / 5.0
         
-        # Вычисляем среднее время ответа
+        # Вычисляем среднее время ответа (за те же 5 минут)
         avg_response_time = (
-            sum(self.request_times) / len(self.request_times)
-            if self.request_times else 0.0
+            self.response_time_sums.sum_recent(5, minute) / recent_requests
+            if recent_requests else 0.0
         )
         
         # Вычисляем процент ошибок
-        recent_errors = sum(
-            count for minute, count in self.error_counts.items()
-            if minute >= five_minutes_ago
-        )
+        recent_errors = self.error_counts.sum_recent(5, minute)
         error_rate = (
             (recent_errors / recent_requests * 100) 
             if recent_requests > 0 else 0.0
@@ -215,15 +709,27 @@ class MetricsCollector:
         
         return ApplicationMetrics(
             active_users=len(self.active_users),
-            total_requests=sum(self.request_counts.values()),
+            total_requests=self.total_requests,
             requests_per_minute=requests_per_minute,
             average_response_time=avg_response_time,
             error_rate=error_rate,
-            database_connections=0,  # TODO: Получать из пула соединений
-            redis_connections=0,     # TODO: Получать из Redis клиента
-            timestamp=current_time
+            database_connections=self.gauges["db_pool_checked_out"],
+            redis_connections=self.gauges["redis_connections"],
+            timestamp=current_time,
+            response_time_p50=self.latency.quantile(0.5),
+            response_time_p95=self.latency.quantile(0.95),
+            response_time_p99=self.latency.quantile(0.99)
         )
     
+    def get_latency_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """
+        Квантили задержки по маршрутам.
+        
+        Returns:
+            Dict: {"METHOD route": {"p50", "p95", "p99", "count", "mean", "max"}}
+        """
+        return {route: sketch.percentiles() for route, sketch in sorted(self.route_sketches.items())}
+    
     def get_health_status(self) -> Dict[str, Any]:
         """
         Получает статус здоровья приложения.
@@ -270,7 +776,13 @@ class MetricsCollector:
                 ),
                 "total_operations": self.cache_hits + self.cache_misses
             },
-            "slow_queries_count": len(self.slow_queries)
+            "latency": {
+                "overall": self.latency.percentiles(),
+                "routes": self.get_latency_percentiles()
+            },
+            "slow_queries_count": len(self.slow_queries),
+            "compression": self.get_compression_stats(),
+            "media": dict(self.media_eviction)
         }
 
 
@@ -319,11 +831,344 @@ async def async_performance_monitor(operation_name: str,
 metrics_collector = MetricsCollector()
 
 
+async def run_system_sampler(interval: float = SYSTEM_METRICS_INTERVAL_SECONDS):
+    """
+    Фоновый замер системных метрик (запускается в lifespan каждого воркера).
+    Health эндпоинты читают последний замер и не блокируют event loop.
+    
+    Args:
+        interval: Секунд между замерами
+    """
+    if not PSUTIL_AVAILABLE:
+        return
+    # Первый вызов cpu_percent(None) только запоминает точку отсчета
+    psutil.cpu_percent(interval=None)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(metrics_collector.sample_system_metrics)
+        except Exception as e:
+            app_logger.log_error(e, {"operation": "system_metrics_sample"})
+
+# Снимки старше этого срока остались от завершившихся воркеров
+SNAPSHOT_MAX_AGE_SECONDS = 60
+# Накопленные счетчики завершившихся воркеров (см. retire_worker_snapshot)
+RETIRED_SNAPSHOT_NAME = "retired.json"
+
+
+def load_worker_snapshots(directory: Path, max_age: float = SNAPSHOT_MAX_AGE_SECONDS) -> List[Dict[str, Any]]:
+    """
+    Читает свежие снимки других воркеров.
+    
+    Args:
+        directory: Каталог снимков
+        max_age: Максимальный возраст файла в секундах
+        
+    Returns:
+        List: Снимки всех воркеров, кроме текущего, и счетчики завершившихся
+    """
+    snapshots = []
+    if not directory.exists():
+        return snapshots
+    now = time.time()
+    for file_path in directory.glob("*.json"):
+        if file_path.stem == str(os.getpid()) or file_path.name == RETIRED_SNAPSHOT_NAME:
+            continue
+        try:
+            if now - file_path.stat().st_mtime > max_age:
+                continue
+            snapshots.append(json.loads(file_path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # Файл удален или перезаписывается прямо сейчас
+            continue
+    retired = _read_snapshot(directory / RETIRED_SNAPSHOT_NAME)
+    if retired is not None:
+        snapshots.append(retired)
+    return snapshots
+
+
+def count_workers(snapshots: List[Dict[str, Any]]) -> int:
+    """Число живых воркеров в наборе снимков (без накопителя завершившихся)"""
+    return sum(1 for snapshot in snapshots if not snapshot.get("retired"))
+
+
+def _read_snapshot(file_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(file_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def retire_worker_snapshot(directory: Path, pid: int):
+    """
+    Переносит последний снимок завершившегося воркера в накопитель.
+    
+    Без этого после перезапуска воркера (max_requests) счетчики в /metrics
+    уменьшались бы, и Prometheus считал бы это сбросом. Текущие значения
+    (gauges) умершего процесса не переносятся. Вызывается из master
+    gunicorn (child_exit) последовательно, поэтому без блокировок.
+    
+    Args:
+        directory: Каталог снимков
+        pid: PID завершившегося воркера
+    """
+    worker_path = directory / f"{pid}.json"
+    worker = _read_snapshot(worker_path)
+    if worker is None:
+        worker_path.unlink(missing_ok=True)
+        return
+    worker["gauges"] = {}
+    retired_path = directory / RETIRED_SNAPSHOT_NAME
+    retired = _read_snapshot(retired_path)
+    merged = aggregate_metrics([worker] + ([retired] if retired is not None else []))
+    merged.gauges = {name: 0 for name in merged.gauges}
+    snapshot = {**merged.snapshot(refresh_gauges=False), "retired": True}
+    tmp_path = retired_path.with_name(retired_path.name + ".part")
+    tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+    tmp_path.replace(retired_path)
+    worker_path.unlink(missing_ok=True)
+
+
+def aggregate_metrics(snapshots: List[Dict[str, Any]]) -> MetricsCollector:
+    """
+    Сводный сборщик из снимков нескольких воркеров.
+    
+    Args:
+        snapshots: Снимки воркеров (включая текущий)
+        
+    Returns:
+        MetricsCollector: Новый сборщик с суммой счетчиков
+    """
+    aggregated = MetricsCollector()
+    for snapshot in snapshots:
+        aggregated.merge_snapshot(snapshot)
+    return aggregated
+
+
 def get_metrics_summary() -> Dict[str, Any]:
     """
     Получает сводку всех метрик для отображения в админке.
+    Счетчики суммируются по всем воркерам gunicorn.
     
     Returns:
         Dict: Сводка метрик
     """
-    return metrics_collector.get_health_status()
\ No newline at end of file
+    from .workers import METRICS_SNAPSHOT_DIR
+    
+    snapshots = [metrics_collector.snapshot()] + load_worker_snapshots(METRICS_SNAPSHOT_DIR)
+    aggregated = aggregate_metrics(snapshots)
+    # Система у воркеров общая - берем замеры текущего процесса
+    aggregated.system_metrics_history = metrics_collector.system_metrics_history
+    return {**aggregated.get_health_status(), "workers": count_workers(snapshots)}
+
+def instrument_engine(engine):
+    """
+    Подключает метрики к движку SQLAlchemy: время запросов по типу
+    (SELECT, INSERT, ...), интервал "db" запроса (Server-Timing), журнал
+    медленных запросов и выдачу соединений из пула. Одна пара слушателей
+    на движок: замер делается один раз для всех потребителей.
+    
+    Args:
+        engine: Синхронный Engine (для async - engine.sync_engine)
+    """
+    from sqlalchemy import event
+    from .slow_queries import slow_query_log
+    from .timing import record_span
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            duration = time.perf_counter() - started
+            query_type = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            record_span("db", duration)
+            metrics_collector.record_database_query(query_type, duration, statement)
+            slow_query_log.record(engine, statement, parameters, duration, executemany)
+    
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics_collector.record_pool_checkout()
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    """Метки Prometheus с экранированием значений"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """Текстовый формат экспозиции Prometheus 0.0.4"""
+    
+    def __init__(self, prefix: str = "phraseweaver"):
+        self.prefix = prefix
+        self.lines: List[str] = []
+    
+    def metric(self, name: str, metric_type: str, help_text: str,
+               samples: List[tuple]):
+        """
+        Добавляет метрику.
+        
+        Args:
+            samples: [(метки dict, значение)]
+        """
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {metric_type}")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{_labels(**labels)} {_format_value(value)}")
+    
+    def histogram(self, name: str, help_text: str, series: List[tuple]):
+        """
+        Добавляет гистограмму.
+        
+        Args:
+            series: [(метки dict, гистограмма из new_histogram())]
+        """
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} histogram")
+        for labels, histogram in series:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                cumulative += count
+                self.lines.append(f"{full_name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+            self.lines.append(f"{full_name}_bucket{_labels(**labels, le='+Inf')} {histogram['count']}")
+            self.lines.append(f"{full_name}_sum{_labels(**labels)} {_format_value(histogram['sum'])}")
+            self.lines.append(f"{full_name}_count{_labels(**labels)} {histogram['count']}")
+    
+    def summary(self, name: str, help_text: str, series: List[tuple]):
+        """
+        Добавляет summary с квантилями REPORTED_QUANTILES.
+        
+        Args:
+            series: [(метки dict, LatencySketch)]
+        """
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} summary")
+        for labels, sketch in series:
+            for q in REPORTED_QUANTILES:
+                self.lines.append(f"{full_name}{_labels(**labels, quantile=q)} {_format_value(sketch.quantile(q))}")
+            self.lines.append(f"{full_name}_sum{_labels(**labels)} {_format_value(sketch.sum)}")
+            self.lines.append(f"{full_name}_count{_labels(**labels)} {sketch.count}")
+    
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_prometheus(collector: MetricsCollector, workers: int = 1) -> str:
+    """
+    Метрики сборщика в текстовом формате Prometheus.
+    
+    Args:
+        collector: Сборщик (обычно сводный по всем воркерам)
+        workers: Число воркеров в сводке
+        
+    Returns:
+        str: Тело ответа /metrics
+    """
+    writer = PrometheusWriter()
+    
+    route_series = []
+    for key, histogram in sorted(collector.route_latency.items()):
+        method, route, status = key.split(" ", 2)
+        route_series.append(({"method": method, "route": route, "status": status}, histogram))
+    writer.histogram("http_request_duration_seconds", "HTTP request latency by route", route_series)
+    sketch_series = []
+    for key, sketch in sorted(collector.route_sketches.items()):
+        method, route = key.split(" ", 1)
+        sketch_series.append(({"method": method, "route": route}, sketch))
+    writer.summary("http_request_latency_seconds", "HTTP request latency quantiles by route (log-bucket sketch)",
+                   sketch_series)
+    writer.histogram(
+        "db_query_duration_seconds", "SQL query latency by statement type",
+        [({"type": query_type}, histogram) for query_type, histogram in sorted(collector.db_query_latency.items())]
+    )
+    writer.metric("db_pool_checkouts_total", "counter", "Connections checked out from the SQLAlchemy pools",
+                  [({}, collector.db_pool_checkouts)])
+    writer.metric("db_pool_size", "gauge", "Configured size of the SQLAlchemy pools",
+                  [({}, collector.gauges["db_pool_size"])])
+    writer.metric("db_pool_checked_out", "gauge", "Connections currently checked out",
+                  [({}, collector.gauges["db_pool_checked_out"])])
+    writer.metric("db_pool_overflow", "gauge", "Connections opened above the pool size",
+                  [({}, collector.gauges["db_pool_overflow"])])
+    writer.metric("redis_connections", "gauge", "Open Redis connections",
+                  [({}, collector.gauges["redis_connections"])])
+    writer.metric("cache_operations_total", "counter", "Redis cache lookups",
+                  [({"result": "hit"}, collector.cache_hits), ({"result": "miss"}, collector.cache_misses)])
+    
+    compression = sorted(collector.compression.items())
+    writer.metric("compression_responses_total", "counter", "Compressed responses",
+                  [({"encoding": encoding}, totals["responses"]) for encoding, totals in compression])
+    writer.metric("compression_original_bytes_total", "counter", "Response bytes before compression",
+                  [({"encoding": encoding}, totals["original_bytes"]) for encoding, totals in compression])
+    writer.metric("compression_compressed_bytes_total", "counter", "Response bytes after compression",
+                  [({"encoding": encoding}, totals["compressed_bytes"]) for encoding, totals in compression])
+    writer.metric("compression_cpu_seconds_total", "counter", "CPU time spent compressing responses",
+                  [({"encoding": encoding}, totals["cpu_seconds"]) for encoding, totals in compression])
+    
+    media = sorted(collector.media_eviction.items())
+    writer.metric("media_evicted_files_total", "counter", "Media files removed by eviction",
+                  [({"media_class": media_class}, totals["evicted_files"]) for media_class, totals in media])
+    writer.metric("media_reclaimed_bytes_total", "counter", "Disk bytes reclaimed by eviction",
+                  [({"media_class": media_class}, totals["reclaimed_bytes"]) for media_class, totals in media])
+    writer.metric("media_bytes", "gauge", "Media bytes on disk after the last eviction run",
+                  [({"media_class": media_class}, totals["total_bytes"]) for media_class, totals in media])
+    
+    if collector.system_metrics_history:
+        system = collector.system_metrics_history[-1]
+        writer.metric("system_cpu_percent", "gauge", "Host CPU usage", [({}, system.cpu_percent)])
+        writer.metric("system_memory_percent", "gauge", "Host memory usage", [({}, system.memory_percent)])
+        writer.metric("system_disk_usage_percent", "gauge", "Root filesystem usage", [({}, system.disk_usage_percent)])
+    
+    collector.cleanup_old_users()
+    writer.metric("active_users", "gauge", "Users seen in the last 30 minutes", [({}, len(collector.active_users))])
+    writer.metric("slow_queries", "gauge", "Recent SQL queries slower than the slow query threshold", [({}, len(collector.slow_queries))])
+    writer.metric("workers", "gauge", "Worker processes included in this scrape", [({}, workers)])
+    writer.metric("uptime_seconds", "gauge", "Seconds since the oldest worker started",
+                  [({}, (datetime.utcnow() - collector._start_time).total_seconds())])
+    return writer.render()
+
+
+def get_slow_query_report(limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Медленные запросы всех воркеров по отпечаткам (для админки).
+    
+    Args:
+        limit: Сколько отпечатков вернуть
+        
+    Returns:
+        List: Отчет MetricsCollector.get_slow_query_report()
+    """
+    from .workers import METRICS_SNAPSHOT_DIR
+    
+    snapshots = [metrics_collector.snapshot()] + load_worker_snapshots(METRICS_SNAPSHOT_DIR)
+    return aggregate_metrics(snapshots).get_slow_query_report(limit)
+
+
+def get_prometheus_metrics() -> str:
+    """
+    Метрики всех воркеров gunicorn для /metrics.
+    
+    Returns:
+        str: Текстовый формат Prometheus
+    """
+    from .workers import METRICS_SNAPSHOT_DIR
+    
+    snapshots = [metrics_collector.snapshot()] + load_worker_snapshots(METRICS_SNAPSHOT_DIR)
+    aggregated = aggregate_metrics(snapshots)
+    aggregated.system_metrics_history = metrics_collector.system_metrics_history
+    return render_prometheus(aggregated, workers=count_workers(snapshots))
@@ -0,0 +1,372 @@
+# backend/app/profiling.py
+"""
+Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если у него есть подписанный заголовок X-Profile
+(значение выдает POST /api/admin/profiles/token) или если администратор
+включил выборку доли запросов на ограниченное время. Пока запрос
+выполняется, поток-сэмплер раз в PROFILING_INTERVAL_MS снимает стеки
+потоков процесса через sys._current_frames(); результат сохраняется в
+формате speedscope (https://www.speedscope.app) - по профилю на поток:
+event loop для async эндпоинтов и поток пула для синхронных.
+
+Одновременно в процессе идет один профиль, но сэмплер снимает стеки всех
+потоков: запросы, выполнявшиеся параллельно с профилируемым, тоже попадут
+в него. Их request id записываются в профиль (overlapping_requests и имя
+в speedscope), чтобы такой профиль можно было отличить от чистого.
+Каталог профилей общий для воркеров контейнера, хранятся последние
+PROFILING_MAX_FILES файлов.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .core.config import get_settings
+from .timing import current_timing
+from .workers import WORKER_STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = WORKER_STATE_DIR / "profiles"
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SUFFIX = ".speedscope.json"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+MAX_STACK_DEPTH = 128
+
+# Имя файла профиля: только то, что создает ProfileStore.save
+_PROFILE_NAME = re.compile(r"^[\w.-]+\.speedscope\.json$")
+_UNSAFE_NAME_CHARS = re.compile(r"[^\w-]+")
+
+# Каталог пакета app: потоки без его кадров в профиль не попадают
+_APP_DIR = str(Path(__file__).resolve().parent)
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик стеков всех потоков процесса.
+    """
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 30.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._frames: List[Dict[str, Any]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        # thread id -> (имя, стеки [индексы кадров от корня], веса в секундах)
+        self._threads: Dict[int, Tuple[str, List[List[int]], List[float]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def request_stop(self) -> None:
+        """Останавливает сбор, не дожидаясь потока (можно звать из event loop)"""
+        self._stop.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _frame_id(self, code) -> int:
+        name = getattr(code, "co_qualname", code.co_name)
+        key = (name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self._frames)
+            self._frame_index[key] = index
+            self._frames.append({"name": name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _sample(self, weight: float) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            _, stacks, weights = self._threads.setdefault(
+                thread_id, (names.get(thread_id, str(thread_id)), [], [])
+            )
+            stacks.append(stack)
+            weights.append(weight)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        deadline = last + self.max_seconds
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+            if now >= deadline:
+                return
+
+    def _touches_app(self, stacks: List[List[int]]) -> bool:
+        return any(
+            self._frames[index]["file"].startswith(_APP_DIR)
+            for stack in stacks for index in stack
+        )
+
+    def to_speedscope(self, name: str, overlapping: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Профиль в формате speedscope: по профилю на каждый поток с кадрами приложения
+
+        overlapping - request id запросов, шедших параллельно (их стеки тоже в профиле).
+        """
+        overlapping = sorted(overlapping or [])
+        if overlapping:
+            name = f"{name} (+{len(overlapping)} параллельных: {', '.join(overlapping[:10])})"
+        profiles = []
+        for thread_name, stacks, weights in self._threads.values():
+            if not self._touches_app(stacks):
+                continue
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": stacks,
+                "weights": [round(weight, 6) for weight in weights],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "phraseweaver",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+            "overlapping_requests": overlapping,
+        }
+
+
+class ProfileStore:
+    """
+    Каталог профилей с ограничением числа файлов (старые удаляются).
+    """
+
+    def __init__(self, directory: Path, max_files: int = 50):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    @staticmethod
+    def new_name(label: str) -> str:
+        """Имя файла для будущего профиля (известно до его сохранения)"""
+        slug = _UNSAFE_NAME_CHARS.sub("_", label).strip("_")[:80] or "request"
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{slug}{PROFILE_SUFFIX}"
+
+    def save(self, name: str, data: Dict[str, Any]) -> None:
+        """Сохраняет профиль атомарно под именем из new_name"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / f".{name}.tmp"
+        temporary.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(temporary, self.directory / name)
+        self.prune()
+
+    def _files(self) -> List[Tuple[float, int, Path]]:
+        files = []
+        for path in self.directory.glob(f"*{PROFILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return sorted(files, reverse=True)
+
+    def prune(self) -> None:
+        for _, _, path in self._files()[self.max_files:]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Профили, новые первыми"""
+        if not self.directory.exists():
+            return []
+        return [
+            {"name": path.name, "size_bytes": size, "created_at": mtime}
+            for mtime, size, path in self._files()
+        ]
+
+    def path(self, name: str) -> Optional[Path]:
+        """Путь к профилю или None (имя проверяется, выйти из каталога нельзя)"""
+        if not _PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+def sign_profile_request(expires_at: int) -> str:
+    """Значение заголовка X-Profile, действительное до expires_at (unix time)"""
+    signature = hmac.new(
+        get_settings().SECRET_KEY.encode(), f"profile:{expires_at}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_header(value: str) -> bool:
+    expires_at, _, signature = value.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(sign_profile_request(int(expires_at)), value)
+
+
+class ProfilingSampler:
+    """
+    Выборка доли запросов для профилирования.
+
+    Включается из админки на ограниченное время; состояние лежит в файле
+    рядом с профилями, чтобы переключатель действовал на всех воркерах.
+    Файл перечитывает refresh() из фоновой синхронизации воркера (в потоке),
+    get() на горячем пути берет только значение в памяти.
+    """
+
+    def __init__(self, directory: Path):
+        self.state_path = Path(directory) / "sampling.json"
+        self._state: Dict[str, float] = {"sample_rate": 0.0, "until": 0.0}
+
+    def set(self, sample_rate: float, duration_seconds: float) -> Dict[str, float]:
+        state = {"sample_rate": sample_rate, "until": time.time() + duration_seconds}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.state_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(temporary, self.state_path)
+        self._state = state
+        return self.get()
+
+    def refresh(self) -> None:
+        """Перечитывает общий файл выборки (блокирующий ввод-вывод)"""
+        try:
+            self._state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            self._state = {"sample_rate": 0.0, "until": 0.0}
+
+    def get(self) -> Dict[str, float]:
+        """Текущая доля (с учетом срока действия и PROFILING_SAMPLE_RATE)"""
+        if self._state.get("until", 0.0) > time.time():
+            return {"sample_rate": self._state["sample_rate"], "until": self._state["until"]}
+        return {"sample_rate": get_settings().PROFILING_SAMPLE_RATE, "until": 0.0}
+
+    def should_sample(self) -> bool:
+        sample_rate = self.get()["sample_rate"]
+        return sample_rate > 0 and random.random() < sample_rate
+
+
+profile_store = ProfileStore(PROFILES_DIR)
+profiling_sampler = ProfilingSampler(PROFILES_DIR)
+
+
+class ProfilingMiddleware:
+    """
+    Чистый ASGI middleware: профилирует выбранные запросы к /api.
+
+    Имя профиля возвращается в заголовке X-Profile-Id. Остановка сэмплера,
+    сериализация и запись файла (до нескольких МБ) идут в потоке после
+    ответа, поэтому файл появляется в списке чуть позже заголовка.
+    Админские эндпоинты не профилируются.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store,
+                 sampler: ProfilingSampler = profiling_sampler):
+        self.app = app
+        self.store = store
+        self.sampler = sampler
+        self._busy = threading.Lock()
+        # Запросы в обработке (id scope -> request id) и параллельные текущему профилю;
+        # меняются только в event loop
+        self._active: Dict[int, str] = {}
+        self._overlapping: Optional[set] = None
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        path = scope["path"]
+        if not path.startswith("/api/") or path.startswith("/api/admin"):
+            return False
+        header = Headers(scope=scope).get(PROFILE_HEADER)
+        if header is not None:
+            return verify_profile_header(header)
+        return self.sampler.should_sample()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = current_timing()
+        request_id = timing.request_id if timing else f"{scope['method']} {scope['path']}"
+        self._active[id(scope)] = request_id
+        try:
+            if self._wants_profile(scope) and self._busy.acquire(blocking=False):
+                await self._profile(scope, receive, send)
+                return
+            if self._overlapping is not None:
+                self._overlapping.add(request_id)
+            await self.app(scope, receive, send)
+        finally:
+            del self._active[id(scope)]
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Выполняет запрос под сэмплером (вызывается с захваченным _busy)"""
+        settings = get_settings()
+        self.store.max_files = settings.PROFILING_MAX_FILES
+        profiler = SamplingProfiler(
+            interval=settings.PROFILING_INTERVAL_MS / 1000, max_seconds=settings.PROFILING_MAX_SECONDS
+        )
+        timing = current_timing()
+        label = f"{scope['method']}-{scope['path']}-{timing.request_id if timing else ''}"
+        name = self.store.new_name(label)
+        overlapping = {other for key, other in self._active.items() if key != id(scope)}
+        self._overlapping = overlapping
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Профиль покрывает запрос до начала ответа
+                profiler.request_stop()
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER.lower().encode(), name.encode()),
+                    ],
+                }
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self._overlapping = None
+            try:
+                await asyncio.to_thread(self._finish, profiler, name, label, sorted(overlapping))
+            finally:
+                self._busy.release()
+
+    def _finish(self, profiler: SamplingProfiler, name: str, label: str, overlapping: List[str]) -> None:
+        """Остановка сэмплера и запись профиля (в потоке, не в event loop)"""
+        profiler.stop()
+        try:
+            self.store.save(name, profiler.to_speedscope(label, overlapping))
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось сохранить профиль запроса: {e}")
+            return
+        suffix = f", параллельно {len(overlapping)} запросов" if overlapping else ""
+        logger.info(f"🔬 Профиль запроса {label} сохранен: {name}{suffix}")
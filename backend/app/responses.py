@@ -0,0 +1,66 @@
+# backend/app/responses.py
+"""
+Быстрые JSON ответы для списковых эндпоинтов.
+
+FastJSONResponse сериализует уже подготовленные dict/list через orjson
+(если установлен) без прохода jsonable_encoder и валидации response_model.
+Эндпоинт подключает его явно и сам отвечает за форму данных.
+
+Для условных GET здесь же общий разбор If-None-Match.
+"""
+
+import json
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+# Ответ API кэшируется только браузером пользователя и всегда перепроверяется
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def etag_matches(if_none_match: str, etags: Iterable[str]) -> bool:
+    """Слабое сравнение If-None-Match с текущими ETag (RFC 9110, 13.1.2)"""
+    opaque = {etag[2:] if etag.startswith("W/") else etag for etag in etags}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in opaque:
+            return True
+    return False
+
+
+def _default(value: Any) -> Any:
+    """Fallback для типов, которые не знает стандартный json (datetime, Decimal)"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Сериализует данные в JSON (orjson или стандартный json)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON ответ без jsonable_encoder.
+
+    Содержимое должно состоять из dict, list, str, int, float, bool, None
+    и datetime - подготовка данных на стороне эндпоинта.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
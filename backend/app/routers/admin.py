@@ -0,0 +1,87 @@
+# backend/app/routers/admin.py
+"""
+Служебные эндпоинты для эксплуатации: сводка метрик, медленные запросы
+и профили запросов. Доступны только с заголовком X-Admin-Token
+(настройка ADMIN_TOKEN).
+"""
+
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from ..dependencies import require_admin
+from ..monitoring import get_metrics_summary, get_slow_query_report
+from ..profiling import PROFILE_HEADER, profile_store, profiling_sampler, sign_profile_request
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+class ProfilingSampleRequest(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1)
+    duration_seconds: int = Field(600, ge=1, le=3600)
+
+
+@router.get("/metrics")
+def admin_metrics():
+    """
+    Сводка метрик всех воркеров (здоровье, задержки, кэш, сжатие).
+    """
+    return get_metrics_summary()
+
+
+@router.get("/slow-queries")
+def slow_queries(limit: int = Query(50, ge=1, le=200)):
+    """
+    Медленные SQL запросы по отпечаткам, самые затратные первыми.
+    Для каждого - число вызовов, время, пример запроса и план EXPLAIN.
+    """
+    return {"queries": get_slow_query_report(limit)}
+
+
+@router.post("/profiles/token")
+def profile_token(ttl_seconds: int = Query(600, ge=1, le=86400)):
+    """
+    Подписанное значение заголовка X-Profile: запросы с ним профилируются
+    до истечения срока.
+    """
+    expires_at = int(time.time()) + ttl_seconds
+    return {"header": PROFILE_HEADER, "value": sign_profile_request(expires_at), "expires_at": expires_at}
+
+
+@router.get("/profiles/sampling")
+def get_profile_sampling():
+    """
+    Текущая доля профилируемых запросов.
+    """
+    profiling_sampler.refresh()
+    return profiling_sampler.get()
+
+
+@router.put("/profiles/sampling")
+def set_profile_sampling(request: ProfilingSampleRequest):
+    """
+    Включает профилирование доли запросов на всех воркерах на duration_seconds.
+    Остальные воркеры подхватывают его при ближайшей синхронизации (до 10 с).
+    """
+    return profiling_sampler.set(request.sample_rate, request.duration_seconds)
+
+
+@router.get("/profiles")
+def list_profiles():
+    """
+    Сохраненные профили, новые первыми.
+    """
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """
+    Профиль в формате speedscope (открывается на https://www.speedscope.app).
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
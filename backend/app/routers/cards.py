@@ -1,9 +1,11 @@
 #  backend/app/routers/cards.py
 
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.services.enrichment import enrich_phrase, generate_audio
+from app.services.audio_transcoder import audio_transcoder
 from app.services.simple_phrase_service import generate_simple_phrase_with_ai
 import logging
 import traceback
@@ -16,6 +18,7 @@ from app.models.deck import Deck
 from app.models.card import Card
 from app.models.user import User
 from app.dependencies import get_current_user
+from app.responses import FastJSONResponse, CACHE_PRIVATE_REVALIDATE, dumps, etag_matches
 from fastapi import HTTPException, status
 
 router = APIRouter(prefix="/cards", tags=["cards"])
@@ -89,12 +92,17 @@ async def generate_audio_endpoint(request: AudioRequest = Body(...)):
             import os
             filename = os.path.basename(audio_path)
             relative_path = f"/static/assets/audio/{filename}"
-        return {"audio_url": relative_path}
+        # Opus вариант (если уже готов) клиент выбирает через canPlayType
+        return {
+            "audio_url": relative_path,
+            "opus_url": audio_transcoder.get_variant_url(audio_path)
+        }
     else:
         raise HTTPException(status_code=500, detail="Failed to generate audio")
 
-@router.get("/deck/{deck_id}")
+@router.get("/deck/{deck_id}", response_class=FastJSONResponse)
 def get_deck_cards(
+    request: Request,
     deck_id: int,
     page: int = 1,
     limit: int = 10,
@@ -103,9 +111,53 @@ def get_deck_cards(
 ):
     """
     Получает карточки для указанной колоды с пагинацией.
+    ETag строится из версии колоды: повторный запрос без изменений
+    отвечает 304 без обращения к таблице карточек.
     """
     from app.services.card_service import card_service
-    return card_service.get_deck_with_cards(deck_id, current_user, db, page, limit)
+    version = card_service.get_deck_version(deck_id, current_user, db)
+    headers = {
+        "ETag": f'W/"deck-{deck_id}-v{version}-p{page}-l{limit}"',
+        "Cache-Control": CACHE_PRIVATE_REVALIDATE
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), (headers["ETag"],)):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FastJSONResponse(card_service.get_deck_with_cards(deck_id, current_user, db, page, limit), headers=headers)
+
+@router.get("/deck/{deck_id}/due", response_class=FastJSONResponse)
+def get_due_cards(
+    deck_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Очередь карточек колоды, срок повторения которых наступил.
+    """
+    from app.services.card_service import card_service
+    return FastJSONResponse(card_service.get_due_cards(deck_id, current_user, db, limit))
+
+@router.get("/deck/{deck_id}/export")
+def export_deck_cards(
+    deck_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Экспорт всех карточек колоды в NDJSON (одна карточка на строку, отдается потоком).
+    """
+    from app.services.card_service import card_service
+    card_service._get_owned_deck(deck_id, current_user, db)
+
+    def ndjson_lines():
+        for card in card_service.iter_deck_export(deck_id, db):
+            yield dumps(card) + b"\n"
+
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="deck_{deck_id}.ndjson"'}
+    )
 
 @router.post("/save", status_code=status.HTTP_201_CREATED)
 def save_card(
@@ -7,10 +7,10 @@
     @router.get("/"): Возвращает список всех колод, принадлежащих текущему пользователю.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from typing import List
+from typing import List, Dict, Any
 
 from ..database import get_db
 from ..models.user import User
@@ -18,10 +18,34 @@ from ..models.deck import Deck
 from ..models.card import Card
 from ..schemas import DeckCreate, Deck as DeckSchema
 from ..dependencies import get_current_user
+from ..responses import FastJSONResponse, CACHE_PRIVATE_REVALIDATE, etag_matches
 
 router = APIRouter(prefix="/decks", tags=["decks"])
 
 
+def decks_etag(user: User) -> str:
+    """ETag списка колод: меняется вместе с User.decks_version"""
+    return f'W/"decks-{user.id}-{user.decks_version}"'
+
+
+def deck_to_dict(deck: Deck) -> Dict[str, Any]:
+    """
+    Готовит колоду к сериализации (поля DeckSchema без валидации).
+    Данные из БД уже прошли валидацию при создании колоды.
+    """
+    return {
+        "id": deck.id,
+        "user_id": deck.user_id,
+        "name": deck.name,
+        "description": deck.description,
+        "lang_from": deck.lang_from,
+        "lang_to": deck.lang_to,
+        "cards_count": deck.cards_count,
+        "due_count": deck.due_count,
+        "created_at": deck.created_at,
+    }
+
+
 @router.post("/", response_model=DeckSchema, status_code=status.HTTP_201_CREATED)
 def create_deck(
     deck_data: DeckCreate,
@@ -36,26 +60,35 @@ def create_deck(
         user_id=current_user.id
     )
     db.add(new_deck)
+    current_user.decks_version = User.decks_version + 1
     db.commit()
     db.refresh(new_deck)
     return new_deck
 
 
-@router.get("/", response_model=List[DeckSchema])
+@router.get("/", response_model=List[DeckSchema], response_class=FastJSONResponse)
 def get_decks(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Gets all decks for the current user, ordered by creation date (newest first).
+    response_model остается для документации, ответ сериализуется напрямую через orjson.
+    Версия списка уже загружена вместе с пользователем: при совпадении
+    If-None-Match отвечаем 304 без запроса колод.
     """
+    headers = {"ETag": decks_etag(current_user), "Cache-Control": CACHE_PRIVATE_REVALIDATE}
+    if etag_matches(request.headers.get("if-none-match", ""), (headers["ETag"],)):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     result = db.execute(
         select(Deck)
         .where(Deck.user_id == current_user.id)
         .order_by(Deck.created_at.desc())
     )
     decks = result.scalars().all()
-    return decks
+    return FastJSONResponse([deck_to_dict(deck) for deck in decks], headers=headers)
 
 @router.delete("/{deck_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_deck(
@@ -85,6 +118,7 @@ def delete_deck(
     
     # Теперь удаляем колоду
     db.delete(deck)
+    current_user.decks_version = User.decks_version + 1
     db.commit()
     
     return None  # 204 No Content
\ No newline at end of file
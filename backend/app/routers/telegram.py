@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+import hmac
 import logging
 import json
-from typing import Dict, Any
-from ..services.telegram_bot import process_webhook_update
+from typing import Dict, Any, Optional
+from ..core.config import get_settings
+from ..services.telegram_updates import telegram_update_queue
 
 router = APIRouter(prefix="/telegram", tags=["telegram"])
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+if not settings.TELEGRAM_WEBHOOK_SECRET:
+    logger.warning("⚠️ TELEGRAM_WEBHOOK_SECRET не задан: webhook принимает запросы без проверки отправителя")
 
 class WebhookUpdate(BaseModel):
     """Telegram webhook update model"""
@@ -19,33 +26,39 @@ class WebhookUpdate(BaseModel):
 
 
 @router.post("/webhook")
-async def telegram_webhook(request: Request):
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
     """
     Telegram webhook endpoint.
     Receives updates from Telegram Bot API.
+    Обновление проверяется и ставится в очередь, ответ 200 уходит сразу:
+    Telegram не ждет обработчики, а повторные доставки отбрасываются.
     """
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    if secret and not hmac.compare_digest(x_telegram_bot_api_secret_token or "", secret):
+        logger.warning("Telegram webhook: неверный секретный токен")
+        raise HTTPException(status_code=401, detail="Invalid secret token")
+
+    # Get raw request body
+    body = await request.body()
+    logger.debug(f"Received Telegram webhook: {body[:200]!r}...")
+
     try:
-        # Get raw request body
-        body = await request.body()
-        
-        # Log the webhook request
-        logger.info(f"Received Telegram webhook: {body.decode('utf-8')[:200]}...")
-        
-        # Parse JSON
         update_data = json.loads(body)
-        
-        # Process the update using aiogram
-        logger.info(f"Telegram update received: {update_data.get('update_id')}")
-        await process_webhook_update(update_data)
-        
-        return {"ok": True}
-        
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in webhook: {e}")
         raise HTTPException(status_code=400, detail="Invalid JSON")
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    if not isinstance(update_data, dict):
+        raise HTTPException(status_code=400, detail="Invalid update")
+
+    accepted = await telegram_update_queue.enqueue(update_data)
+    if accepted is None:
+        # Очередь переполнена: Telegram повторит доставку позже
+        return JSONResponse(status_code=503, content={"ok": False}, headers={"Retry-After": "5"})
+
+    return {"ok": True}
 
 
 
@@ -58,4 +71,4 @@ async def webhook_info():
         "message": "Telegram webhook endpoint",
         "method": "POST",
         "description": "This endpoint receives updates from Telegram Bot API"
-    }
\ No newline at end of file
+    }
@@ -1,19 +1,32 @@
 # backend/app/routers/tts.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
+import asyncio
+import json
 import logging
 from pathlib import Path
 
-from app.services.tts_service import tts_service
+from app.services.tts_service import tts_service, batch_key, MAX_BATCH_SIZE
+from app.services.audio_transcoder import (
+    audio_transcoder,
+    client_prefers_opus,
+    opus_variant_path,
+    MEDIA_TYPES
+)
+from app.services.audio_sprite import audio_sprite_service, MAX_SPRITE_CARDS
+from app.services.media_eviction import media_access_recorder
 from app.dependencies import get_current_user
+from app.database import get_db
 from app.models.user import User
+from app.models.deck import Deck
+from app.models.card import Card
+from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Pydantic модели для запросов
@@ -33,7 +46,7 @@ class TTSResponse(BaseModel):
 
 class BatchTTSResponse(BaseModel):
     success: bool
-    results: Dict[str, Optional[str]]
+    results: Dict[str, Optional[str]] = Field(..., description="{'<language_id>:<text>': audio_path}")
     total_processed: int
     successful_count: int
     message: Optional[str] = None
@@ -42,6 +55,21 @@ class SupportedLanguagesResponse(BaseModel):
     languages: Dict[str, str]
     total_languages: int
 
+class SpriteRequest(BaseModel):
+    card_ids: List[int] = Field(..., min_length=1, description="ID карточек страницы в порядке показа")
+
+class SpriteSegment(BaseModel):
+    card_id: int
+    side: str = Field(..., description="'front' (фраза) или 'back' (перевод)")
+    start_ms: float
+    duration_ms: float
+
+class SpriteResponse(BaseModel):
+    audio_url: str
+    opus_url: Optional[str] = None
+    duration_ms: float
+    segments: List[SpriteSegment]
+
 
 @router.post("/generate", response_model=TTSResponse)
 async def generate_tts(
@@ -49,7 +77,7 @@ async def generate_tts(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Генерирует аудиофайл для заданного текста с использованием gTTS
+    Генерирует аудиофайл для заданного текста (Edge TTS или gTTS в зависимости от языка)
     
     **Параметры:**
     - **text**: Текст для озвучки (1-1000 символов)
@@ -98,33 +126,40 @@ async def generate_tts(
         )
 
 
+def _validate_batch(request: BatchTTSRequest) -> None:
+    """Проверяет размер пачки и поддержку языков"""
+    if len(request.texts_and_langs) > MAX_BATCH_SIZE:  # Ограничение на количество
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Максимальное количество элементов в batch запросе: {MAX_BATCH_SIZE}"
+        )
+    
+    supported_languages = tts_service.get_supported_languages()
+    for text, lang_id in request.texts_and_langs:
+        if lang_id not in supported_languages:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Язык '{lang_id}' не поддерживается"
+            )
+
+
 @router.post("/generate-batch", response_model=BatchTTSResponse)
 async def generate_batch_tts(
     request: BatchTTSRequest = Body(...),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Генерирует аудиофайлы для нескольких текстов параллельно с использованием gTTS
+    Генерирует аудиофайлы для нескольких текстов параллельно
+    
+    Одинаковые пары (text, language_id) озвучиваются один раз,
+    поэтому страницу колоды можно предзагрузить одним запросом.
     
     - **texts_and_langs**: Список кортежей (text, language_id)
     """
     try:
         logger.info(f"Batch TTS запрос от пользователя {current_user.id}: {len(request.texts_and_langs)} элементов")
         
-        if len(request.texts_and_langs) > 20:  # Ограничение на количество
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Максимальное количество элементов в batch запросе: 20"
-            )
-        
-        # Проверяем поддержку языков
-        supported_languages = tts_service.get_supported_languages()
-        for text, lang_id in request.texts_and_langs:
-            if lang_id not in supported_languages:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Язык '{lang_id}' не поддерживается"
-                )
+        _validate_batch(request)
         
         # Генерируем аудио параллельно
         results = await tts_service.generate_batch_audio(
@@ -133,14 +168,14 @@ async def generate_batch_tts(
         
         successful_count = sum(1 for path in results.values() if path is not None)
         
-        logger.info(f"Batch TTS завершен: {successful_count}/{len(request.texts_and_langs)} успешно")
+        logger.info(f"Batch TTS завершен: {successful_count}/{len(results)} успешно")
         
         return BatchTTSResponse(
             success=True,
             results=results,
-            total_processed=len(request.texts_and_langs),
+            total_processed=len(results),
             successful_count=successful_count,
-            message=f"Обработано {successful_count} из {len(request.texts_and_langs)} элементов"
+            message=f"Обработано {successful_count} из {len(results)} элементов"
         )
         
     except HTTPException:
@@ -153,10 +188,84 @@ async def generate_batch_tts(
         )
 
 
+@router.post("/generate-batch/stream")
+async def generate_batch_tts_stream(
+    request: BatchTTSRequest = Body(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    То же, что /generate-batch, но отдает результаты по мере готовности (NDJSON)
+    
+    Каждая строка ответа: {"key", "text", "language_id", "audio_path"}
+    """
+    _validate_batch(request)
+    logger.info(f"Batch TTS stream от пользователя {current_user.id}: {len(request.texts_and_langs)} элементов")
+
+    async def stream_results():
+        async for text, lang_id, audio_path in tts_service.iter_batch_audio(request.texts_and_langs):
+            item = {
+                "key": batch_key(text, lang_id),
+                "text": text,
+                "language_id": lang_id,
+                "audio_path": audio_path,
+            }
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+def _load_sprite_cards(db: Session, user_id: int, card_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Карточки пользователя для спрайта: id -> поля для озвучки"""
+    rows = (db.query(Card.id, Card.phrase, Card.translation, Deck.lang_from, Deck.lang_to)
+            .join(Deck, Card.deck_id == Deck.id)
+            .filter(Card.id.in_(card_ids), Deck.user_id == user_id)
+            .all())
+    return {row.id: row._asdict() for row in rows}
+
+
+@router.post("/sprite", response_model=SpriteResponse)
+async def generate_audio_sprite(
+    request: SpriteRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Собирает озвучку страницы тренировки в один аудиофайл
+    
+    Клиент загружает один спрайт на страницу вместо отдельного запроса
+    на каждую фразу и перевод, а затем проигрывает сегменты по смещениям.
+    
+    - **card_ids**: ID карточек (до 20), порядок сохраняется в манифесте
+    """
+    card_ids = list(dict.fromkeys(request.card_ids))
+    if len(card_ids) > MAX_SPRITE_CARDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Максимальный размер спрайта: {MAX_SPRITE_CARDS} карточек"
+        )
+
+    # Синхронный запрос - в потоке, чтобы не блокировать event loop
+    cards_by_id = await asyncio.to_thread(_load_sprite_cards, db, current_user.id, card_ids)
+    if len(cards_by_id) != len(card_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Некоторые карточки не найдены"
+        )
+
+    try:
+        return await audio_sprite_service.get_sprite([cards_by_id[card_id] for card_id in card_ids])
+    except Exception as e:
+        logger.error(f"Ошибка сборки аудио-спрайта: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Не удалось собрать аудио-спрайт"
+        )
+
+
 @router.get("/languages", response_model=SupportedLanguagesResponse)
 async def get_supported_languages():
     """
-    Возвращает список поддерживаемых языков gTTS
+    Возвращает список поддерживаемых языков
     """
     try:
         languages = tts_service.get_supported_languages()
@@ -177,12 +286,18 @@ async def get_supported_languages():
 @router.get("/audio/{filename}")
 async def get_audio_file(
     filename: str,
+    request: Request,
+    format: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
     Возвращает аудиофайл по имени
     
-    - **filename**: Имя аудиофайла (например: 'tts_en_abc123.wav')
+    Если клиент поддерживает Opus (Accept: audio/ogg или ?format=opus) и вариант
+    уже готов, отдается компактный .ogg. Поддерживаются Range запросы (206).
+    
+    - **filename**: Имя аудиофайла (например: 'edge_pl_Zofia_abc123.mp3')
+    - **format**: Явный выбор варианта: 'opus' или 'mp3'
     """
     try:
         # Базовая проверка безопасности
@@ -203,10 +318,26 @@ async def get_audio_file(
                 detail="Аудиофайл не найден"
             )
         
+        if file_path.suffix == ".mp3" and client_prefers_opus(request.headers.get("accept"), format):
+            opus_path = opus_variant_path(file_path)
+            if opus_path.exists():
+                file_path = opus_path
+            else:
+                # Отдаем MP3 сейчас, а Opus будет готов к следующему запросу
+                audio_transcoder.schedule_opus_variant(f"assets/audio/{filename}")
+        
+        media_access_recorder.record("audio", filename)
+        
+        # FileResponse сам обрабатывает Range/If-Range и отвечает 206 Partial Content
         return FileResponse(
             path=str(file_path),
-            media_type="audio/wav",
-            filename=filename
+            media_type=MEDIA_TYPES.get(file_path.suffix, "application/octet-stream"),
+            filename=file_path.name,
+            content_disposition_type="inline",
+            headers={
+                "Cache-Control": "private, max-age=604800",
+                "Vary": "Accept"
+            }
         )
         
     except HTTPException:
@@ -219,53 +350,18 @@ async def get_audio_file(
         )
 
 
-@router.delete("/cleanup")
-async def cleanup_old_audio_files(
-    max_age_days: int = 7,
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Очищает старые аудиофайлы (только для администраторов)
-    
-    - **max_age_days**: Максимальный возраст файлов в днях (по умолчанию 7)
-    """
-    try:
-        # Проверяем права администратора (если есть такая логика)
-        # if not current_user.is_admin:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_403_FORBIDDEN,
-        #         detail="Недостаточно прав для выполнения операции"
-        #     )
-        
-        tts_service.cleanup_old_files(max_age_days)
-        
-        return {
-            "success": True,
-            "message": f"Очистка файлов старше {max_age_days} дней выполнена"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка очистки файлов: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Не удалось выполнить очистку файлов"
-        )
-
-
 @router.get("/health")
 async def tts_health_check():
     """
-    Проверка состояния TTS сервиса (gTTS)
+    Проверка состояния TTS сервиса
     """
     try:
         supported_languages = tts_service.get_supported_languages()
         
         return {
-            "status": "healthy",
+            "status": "healthy" if tts_service.is_available() else "unhealthy",
             "supported_languages_count": len(supported_languages),
-            "service": "gTTS Service"
+            "service": tts_service.get_service_info()
         }
         
     except Exception as e:
@@ -0,0 +1,83 @@
+# backend/app/scheduler.py
+"""
+Фоновые задачи по расписанию (APScheduler): вытеснение медиа и напоминания.
+Запускается и останавливается в lifespan приложения.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_scheduler: Optional[AsyncIOScheduler] = None
+
+
+async def run_media_eviction():
+    """Вытеснение медиа по бюджету диска (файловые операции вне event loop)."""
+    from .services.media_eviction import media_eviction_service
+
+    try:
+        await asyncio.to_thread(media_eviction_service.run)
+    except Exception as e:
+        logger.error(f"❌ Ошибка вытеснения медиа: {e}")
+
+
+async def run_daily_reminders():
+    """Напоминания о карточках на повторение."""
+    from .services.notifications import send_daily_reminders
+
+    try:
+        await send_daily_reminders()
+    except Exception as e:
+        logger.error(f"❌ Ошибка рассылки напоминаний: {e}")
+
+
+def start_scheduler() -> AsyncIOScheduler:
+    """
+    Создает и запускает планировщик с задачами приложения.
+
+    Returns:
+        AsyncIOScheduler: Запущенный планировщик
+    """
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+
+    settings = get_settings()
+    _scheduler = AsyncIOScheduler(timezone="UTC")
+    _scheduler.add_job(
+        run_media_eviction,
+        "interval",
+        minutes=settings.MEDIA_EVICTION_INTERVAL_MINUTES,
+        id="media_eviction",
+        max_instances=1,
+        coalesce=True
+    )
+    if settings.NOTIFICATIONS_ENABLED:
+        hour, minute = (int(part) for part in settings.DAILY_REMINDER_TIME.split(":"))
+        _scheduler.add_job(
+            run_daily_reminders,
+            "cron",
+            hour=hour,
+            minute=minute,
+            id="daily_reminders",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600
+        )
+    _scheduler.start()
+    logger.info(f"⏰ Планировщик запущен: {len(_scheduler.get_jobs())} задач")
+    return _scheduler
+
+
+def shutdown_scheduler():
+    """Останавливает планировщик, не дожидаясь выполняющихся задач."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
@@ -3,12 +3,15 @@ import hashlib
 import json
 import logging
 from typing import Optional
-import google.generativeai as genai
 
 from .utils import redis_client
+from ..timing import span
 from ..core.config import get_settings
+from .providers import get_gemini_model
+from ..logging_config import PAYLOAD_LOGGER
 
-settings = get_settings()
+# Сырые ответы Gemini - в выборочный лог дампов
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
 
 # Обновленный промпт с поддержкой исходной фразы
 PROMPT_TEMPLATE = """
@@ -61,13 +64,12 @@ async def generate_examples_with_ai(phrase: str, keyword: str, language: str, ta
     # Если нет кэша — настройка модели (как в оригинале)
 
     try:
-        api_key = settings.GOOGLE_API_KEY
+        api_key = get_settings().GOOGLE_API_KEY
         if not api_key or api_key.strip() == "":
             logging.error("КРИТИЧЕСКАЯ ОШИБКА: Ключ GOOGLE_API_KEY пустой или не установлен!")
             return {"error": "AI сервис недоступен: не настроен API ключ"}
         
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
+        model = get_gemini_model()
         logging.info(f"Google AI модель успешно настроена для фразы '{phrase}'")
     except AttributeError:
         logging.error("КРИТИЧЕСКАЯ ОШИБКА: Ключ GOOGLE_API_KEY не найден в настройках!")
@@ -88,7 +90,8 @@ async def generate_examples_with_ai(phrase: str, keyword: str, language: str, ta
     logging.info(f"Отправка AI-запроса для фразы '{phrase}' с ключевым словом '{keyword}'...")
 
     try:
-        response = await model.generate_content_async(prompt)
+        with span("ai"):
+            response = await model.generate_content_async(prompt)
         
         if not response or not response.text:
             logging.error(f"AI вернул пустой ответ для фразы '{phrase}'")
@@ -96,15 +99,11 @@ async def generate_examples_with_ai(phrase: str, keyword: str, language: str, ta
         
         raw_text = response.text.strip().replace("```json", "").replace("```", "").strip()
         
-        # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ ДЛЯ ОТЛАДКИ
-        logging.info(f"🔍 ПОЛНЫЙ СЫРОЙ ОТВЕТ GEMINI для '{phrase}':")
-        logging.info(f"📄 RAW JSON: {raw_text}")
-        logging.info(f"📏 Длина ответа: {len(raw_text)} символов")
+        # Сырой ответ целиком - только в выборку (форматируется, если запись прошла фильтр)
+        payload_logger.info("📄 RAW JSON Gemini для '%s' (%d символов): %s", phrase, len(raw_text), raw_text)
         
         try:
             data = json.loads(raw_text)
-            logging.info(f"✅ JSON успешно распарсен для '{phrase}'")
-            logging.info(f"🔑 Ключи в JSON: {list(data.keys())}")
         except json.JSONDecodeError as e:
             logging.error(f"❌ Ошибка парсинга JSON ответа AI для '{phrase}': {e}")
             logging.error(f"🔍 Сырой ответ AI (первые 500 символов): {raw_text[:500]}")
@@ -113,27 +112,6 @@ async def generate_examples_with_ai(phrase: str, keyword: str, language: str, ta
         
         logging.info(f"🎉 AI успешно сгенерировал данные для '{phrase}'.")
         
-        # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ СТРУКТУРЫ ДАННЫХ
-        logging.info(f"📊 АНАЛИЗ СТРУКТУРЫ JSON для '{phrase}':")
-        
-        if 'image_query' in data:
-            logging.info(f"🖼️ Image query: '{data['image_query']}'")
-        
-        if 'original_phrase' in data:
-            orig = data['original_phrase']
-            logging.info(f"📝 Original phrase:")
-            logging.info(f"   - original: '{orig.get('original', 'N/A')}'")
-            logging.info(f"   - translation: '{orig.get('translation', 'N/A')}'")
-            logging.info(f"   - gap_fill: '{orig.get('gap_fill', 'N/A')}'")
-        
-        if 'additional_examples' in data:
-            examples = data['additional_examples']
-            logging.info(f"📚 Additional examples ({len(examples)} штук):")
-            for i, example in enumerate(examples[:3]):  # Показываем первые 3
-                logging.info(f"   [{i+1}] original: '{example.get('original', 'N/A')}'")
-                logging.info(f"   [{i+1}] translation: '{example.get('translation', 'N/A')}'")
-                logging.info(f"   [{i+1}] gap_fill: '{example.get('gap_fill', 'N/A')}'")
-        
         # Проверяем на наличие ошибок в структуре
         missing_fields = []
         if 'image_query' not in data: missing_fields.append('image_query')
@@ -142,8 +120,6 @@ async def generate_examples_with_ai(phrase: str, keyword: str, language: str, ta
         
         if missing_fields:
             logging.warning(f"⚠️ Отсутствуют поля в JSON: {missing_fields}")
-        else:
-            logging.info(f"✅ Все обязательные поля присутствуют в JSON")
         
         # Сохраняем в кэш (async set, TTL 7 дней = 604800 сек)
         try:
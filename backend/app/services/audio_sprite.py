@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Аудио-спрайты для страницы тренировки
+Склеивает озвучку нескольких карточек в один MP3 и возвращает манифест смещений
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .audio_utils import mp3_duration_ms, mp3_stream_format, strip_mp3_metadata
+from .audio_transcoder import audio_transcoder
+from .gtts_service import AUDIO_DIR
+from .media_eviction import media_access_recorder
+from .tts_service import tts_service, batch_key
+
+# Одна страница тренировки - 10 карточек, берем с запасом
+MAX_SPRITE_CARDS = 20
+SPRITE_PREFIX = "sprite"
+
+
+def _clean_text(text: Optional[str]) -> str:
+    """Убирает HTML-теги так же, как клиент перед /generate-audio"""
+    return re.sub(r"<[^>]*>", "", text or "").strip()
+
+
+class AudioSpriteService:
+    """
+    Сборка и кэширование аудио-спрайтов
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _sprite_key(self, cards: List[Dict[str, Any]]) -> str:
+        """Ключ кэша: набор карточек и их озвучиваемое содержимое"""
+        payload = json.dumps(
+            [[card["id"], card["phrase"], card["lang_from"], card["translation"], card["lang_to"]] for card in cards],
+            ensure_ascii=False
+        )
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _clips(self, cards: List[Dict[str, Any]]) -> List[Tuple[int, str, str, str]]:
+        """Клипы спрайта: (card_id, сторона, текст, язык)"""
+        clips = []
+        for card in cards:
+            for side, text, lang in (
+                ("front", card["phrase"], card["lang_from"]),
+                ("back", card["translation"], card["lang_to"]),
+            ):
+                text = _clean_text(text)
+                if text and lang:
+                    clips.append((card["id"], side, text, lang))
+        return clips
+
+    def _assemble(self, key: str, clips: List[Tuple[int, str, str, str]], audio_paths: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Склеивает клипы без перекодирования и сохраняет спрайт с манифестом
+
+        Клипы другого формата (частота, каналы - у провайдеров TTS они разные)
+        в спрайт не попадают: клиент проигрывает их отдельными файлами.
+        """
+        loaded = []
+        for card_id, side, text, lang in clips:
+            audio_path = audio_paths.get(batch_key(text, lang))
+            if not audio_path:
+                continue
+            clip_file = AUDIO_DIR / audio_path.split("/")[-1]
+            try:
+                frames = strip_mp3_metadata(clip_file.read_bytes())
+            except OSError as e:
+                logging.warning(f"⚠️ Клип для спрайта недоступен {clip_file.name}: {e}")
+                continue
+            stream_format = mp3_stream_format(frames)
+            if stream_format is not None:
+                loaded.append((card_id, side, clip_file.name, frames, stream_format))
+
+        # Формат спрайта - самый частый среди клипов
+        formats = Counter(stream_format for *_, stream_format in loaded)
+        sprite_format = formats.most_common(1)[0][0] if formats else None
+
+        chunks = []
+        segments = []
+        offset_ms = 0.0
+        for card_id, side, clip_name, frames, stream_format in loaded:
+            if stream_format != sprite_format:
+                logging.warning(
+                    f"⚠️ Клип {clip_name} ({stream_format[0]} Гц, каналов: {stream_format[1]}) "
+                    f"не совпадает с форматом спрайта {key}, пропущен"
+                )
+                continue
+            duration_ms = mp3_duration_ms(frames)
+            if duration_ms <= 0:
+                continue
+            chunks.append(frames)
+            segments.append({
+                "card_id": card_id,
+                "side": side,
+                "start_ms": round(offset_ms, 1),
+                "duration_ms": round(duration_ms, 1),
+            })
+            offset_ms += duration_ms
+
+        sprite_file = AUDIO_DIR / f"{SPRITE_PREFIX}_{key}.mp3"
+        manifest = {
+            "audio_url": f"/static/assets/audio/{sprite_file.name}",
+            "duration_ms": round(offset_ms, 1),
+            "segments": segments,
+        }
+
+        tmp_path = sprite_file.with_suffix(".part")
+        tmp_path.write_bytes(b"".join(chunks))
+        tmp_path.replace(sprite_file)
+        # Манифест пишем последним: его наличие означает готовый спрайт
+        manifest_file = sprite_file.with_suffix(".json")
+        tmp_path = manifest_file.with_name(manifest_file.name + ".part")
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(manifest_file)
+        return manifest
+
+    def _load_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        sprite_file = AUDIO_DIR / f"{SPRITE_PREFIX}_{key}.mp3"
+        manifest_file = sprite_file.with_suffix(".json")
+        if not sprite_file.exists() or not manifest_file.exists():
+            return None
+        try:
+            return json.loads(manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    async def _build(self, key: str, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            clips = self._clips(cards)
+            # Клипы карточек кэшируются фасадом TTS, синтезируются только новые
+            audio_paths = await tts_service.generate_batch_audio(
+                [(text, lang) for _, _, text, lang in clips]
+            )
+            loop = asyncio.get_running_loop()
+            manifest = await loop.run_in_executor(None, self._assemble, key, clips, audio_paths)
+            logging.info(
+                f"🎞️ Спрайт {key}: {len(manifest['segments'])} клипов из {len(clips)}, "
+                f"{manifest['duration_ms'] / 1000:.1f}s"
+            )
+            return manifest
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_sprite(self, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Возвращает спрайт для набора карточек (из кэша или собирает новый)
+
+        Args:
+            cards: Список {"id", "phrase", "translation", "lang_from", "lang_to"} в порядке показа
+
+        Returns:
+            Манифест {"audio_url", "opus_url", "duration_ms", "segments"}
+        """
+        key = self._sprite_key(cards)
+        manifest = await asyncio.to_thread(self._load_cached, key)
+        if manifest is None:
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._build(key, cards))
+                self._inflight[key] = task
+            manifest = await asyncio.shield(task)
+
+        audio_path = manifest["audio_url"].replace("/static/", "")
+        media_access_recorder.record("audio", audio_path)
+        audio_transcoder.schedule_opus_variant(audio_path)
+        return {**manifest, "opus_url": audio_transcoder.get_variant_url(audio_path)}
+
+# Создаем глобальный экземпляр сервиса
+audio_sprite_service = AudioSpriteService()
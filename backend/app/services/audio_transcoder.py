@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Транскодирование речи в компактный Opus/OGG
+Использует ffmpeg (если установлен) и выбирает вариант аудио для клиента
+"""
+
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+from typing import Optional, Dict, Set
+
+from .gtts_service import AUDIO_DIR
+
+FFMPEG_BINARY = shutil.which("ffmpeg")
+OPUS_AVAILABLE = FFMPEG_BINARY is not None
+if not OPUS_AVAILABLE:
+    logging.warning("ffmpeg не найден, Opus варианты аудио отключены")
+
+# Речи в моно хватает 16 kbps Opus: в 2-3 раза меньше MP3 от TTS движков
+OPUS_BITRATE = "16k"
+OPUS_EXTENSION = ".ogg"
+# ffmpeg грузит CPU, поэтому ограничиваем число одновременных процессов
+TRANSCODE_CONCURRENCY = 2
+TRANSCODE_TIMEOUT = 30.0
+
+MEDIA_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".ogg": "audio/ogg",
+}
+
+
+def opus_variant_path(audio_file: Path) -> Path:
+    """Путь к Opus варианту рядом с исходным файлом"""
+    return audio_file.with_suffix(OPUS_EXTENSION)
+
+
+def client_prefers_opus(accept: Optional[str], requested_format: Optional[str] = None) -> bool:
+    """
+    Решает, отдавать ли клиенту Opus вместо MP3
+
+    Args:
+        accept: Заголовок Accept
+        requested_format: Явный выбор клиента (?format=opus|mp3), например
+            по результату audio.canPlayType('audio/ogg; codecs=opus')
+
+    Returns:
+        True, если клиент явно заявил поддержку Opus
+    """
+    if requested_format:
+        return requested_format.lower() in ("opus", "ogg")
+
+    # Браузеры шлют для <audio> "*/*", а Safari на iOS не всегда проигрывает OGG,
+    # поэтому Opus отдаем только при явном упоминании в Accept. Вариант лежит
+    # в контейнере Ogg: audio/webm с тем же кодеком не подходит
+    for item in (accept or "").lower().split(","):
+        media_range, _, params = item.strip().partition(";")
+        if media_range.strip() != "audio/ogg":
+            continue
+        quality = 1.0
+        codecs = None
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+            elif name == "codecs":
+                codecs = value.strip('"')
+        if quality > 0 and (codecs is None or "opus" in codecs.split(",")):
+            return True
+    return False
+
+
+class AudioTranscoder:
+    """
+    Фоновое создание Opus вариантов для аудио TTS
+    """
+
+    def __init__(self, max_concurrency: int = TRANSCODE_CONCURRENCY):
+        self.is_available = OPUS_AVAILABLE
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[Path, asyncio.Task] = {}
+        # Держим ссылки на фоновые задачи, чтобы их не собрал GC
+        self._background: Set[asyncio.Task] = set()
+
+    async def _run_ffmpeg(self, source: Path, target: Path) -> bool:
+        tmp_path = target.with_name(target.name + ".part")
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY, "-nostdin", "-loglevel", "error", "-y",
+            "-i", str(source),
+            "-c:a", "libopus", "-b:a", OPUS_BITRATE, "-ac", "1", "-application", "voip",
+            "-f", "ogg", str(tmp_path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=TRANSCODE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            tmp_path.unlink(missing_ok=True)
+            logging.warning(f"⚠️ ffmpeg не уложился в {TRANSCODE_TIMEOUT}s для {source.name}")
+            return False
+
+        if process.returncode != 0:
+            tmp_path.unlink(missing_ok=True)
+            logging.warning(f"⚠️ ffmpeg ошибка для {source.name}: {stderr.decode(errors='ignore')[:200]}")
+            return False
+
+        tmp_path.replace(target)
+        return True
+
+    async def _transcode(self, source: Path, target: Path) -> Optional[Path]:
+        try:
+            async with self._semaphore:
+                if target.exists():
+                    return target
+                if not await self._run_ffmpeg(source, target):
+                    return None
+            logging.info(
+                f"🗜️ Opus вариант создан: {target.name} "
+                f"({source.stat().st_size} -> {target.stat().st_size} байт)"
+            )
+            return target
+        except Exception as e:
+            logging.warning(f"⚠️ Не удалось создать Opus вариант для {source.name}: {e}")
+            return None
+        finally:
+            self._inflight.pop(source, None)
+
+    async def ensure_opus_variant(self, audio_path: str) -> Optional[Path]:
+        """
+        Создает (или находит) Opus вариант аудио
+
+        Args:
+            audio_path: Путь вида "assets/audio/<file>.mp3"
+
+        Returns:
+            Путь к .ogg файлу или None, если транскодирование недоступно
+        """
+        source = AUDIO_DIR / Path(audio_path).name
+        target = opus_variant_path(source)
+        if target.exists():
+            return target
+        if not self.is_available or not source.exists() or source.suffix != ".mp3":
+            return None
+
+        task = self._inflight.get(source)
+        if task is None:
+            task = asyncio.create_task(self._transcode(source, target))
+            self._inflight[source] = task
+        return await asyncio.shield(task)
+
+    def schedule_opus_variant(self, audio_path: Optional[str]) -> None:
+        """Запускает транскодирование в фоне, не задерживая ответ"""
+        if not audio_path or not self.is_available:
+            return
+        if opus_variant_path(AUDIO_DIR / Path(audio_path).name).exists():
+            return
+        task = asyncio.create_task(self.ensure_opus_variant(audio_path))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def get_variant_url(self, audio_path: str) -> Optional[str]:
+        """URL готового Opus варианта для /static или None"""
+        target = opus_variant_path(AUDIO_DIR / Path(audio_path).name)
+        return f"/static/assets/audio/{target.name}" if target.exists() else None
+
+# Создаем глобальный экземпляр сервиса
+audio_transcoder = AudioTranscoder()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Утилиты для работы с MP3 без перекодирования
+Разбор заголовков фреймов, длительность и нарезка по времени
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Dict, Tuple
+
+# Битрейты Layer III (kbps) по индексу из заголовка фрейма
+_BITRATES_V1_L3 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_V2_L3 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+# Частоты дискретизации по версии MPEG: 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+# Запас вокруг слова при нарезке, чтобы не обрезать согласные на краях
+SLICE_PADDING_MS = 60
+
+
+@dataclass(frozen=True)
+class Mp3Frame:
+    """Фрейм MP3 внутри буфера"""
+    offset: int
+    length: int
+    start_ms: float
+    duration_ms: float
+
+
+def _skip_id3(data: bytes) -> int:
+    """Возвращает смещение первого байта после ID3v2 тега (или 0)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    has_footer = bool(data[5] & 0x10)
+    return 10 + size + (10 if has_footer else 0)
+
+
+def _parse_header(header: bytes) -> Optional[Tuple[int, float]]:
+    """
+    Разбирает 4 байта заголовка Layer III фрейма
+
+    Returns:
+        (длина фрейма в байтах, длительность в мс) или None, если это не фрейм
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1_L3[bitrate_index] * 1000
+        samples_per_frame = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        bitrate = _BITRATES_V2_L3[bitrate_index] * 1000
+        samples_per_frame = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    return length, samples_per_frame * 1000.0 / sample_rate
+
+
+def iter_mp3_frames(data: bytes) -> Iterator[Mp3Frame]:
+    """Перебирает фреймы MP3 (Layer III), пропуская ID3 и мусор между фреймами"""
+    position = _skip_id3(data)
+    elapsed_ms = 0.0
+    data_length = len(data)
+
+    while position + 4 <= data_length:
+        parsed = _parse_header(data[position:position + 4])
+        if parsed is None:
+            # Ищем следующий sync word
+            position += 1
+            continue
+        length, duration_ms = parsed
+        if position + length > data_length:
+            break
+        yield Mp3Frame(position, length, elapsed_ms, duration_ms)
+        elapsed_ms += duration_ms
+        position += length
+
+
+def mp3_duration_ms(data: bytes) -> float:
+    """Длительность MP3 в миллисекундах"""
+    duration = 0.0
+    for frame in iter_mp3_frames(data):
+        duration = frame.start_ms + frame.duration_ms
+    return duration
+
+
+def mp3_stream_format(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Формат потока по первому фрейму: (частота дискретизации, число каналов)
+
+    Склеивать без перекодирования можно только MP3 одного формата:
+    декодер не перестраивается на другую частоту посреди потока.
+    """
+    for frame in iter_mp3_frames(data):
+        header = data[frame.offset:frame.offset + 4]
+        version = (header[1] >> 3) & 0x03
+        sample_rate = _SAMPLE_RATES[version][(header[2] >> 2) & 0x03]
+        channels = 1 if (header[3] >> 6) == 3 else 2
+        return sample_rate, channels
+    return None
+
+
+def strip_mp3_metadata(data: bytes) -> bytes:
+    """Оставляет только аудио-фреймы (без ID3), чтобы файлы можно было склеивать"""
+    return b"".join(data[frame.offset:frame.offset + frame.length] for frame in iter_mp3_frames(data))
+
+
+def slice_mp3(data: bytes, start_ms: float, end_ms: float, padding_ms: float = SLICE_PADDING_MS) -> bytes:
+    """
+    Вырезает из MP3 фреймы, пересекающиеся с интервалом [start_ms, end_ms]
+
+    Нарезка идет по границам фреймов, поэтому результат - валидный MP3
+    без перекодирования.
+    """
+    start_ms = max(0.0, start_ms - padding_ms)
+    end_ms = end_ms + padding_ms
+    return b"".join(
+        data[frame.offset:frame.offset + frame.length]
+        for frame in iter_mp3_frames(data)
+        if frame.start_ms + frame.duration_ms > start_ms and frame.start_ms < end_ms
+    )
+
+
+def _normalize_word(word: str) -> str:
+    """Нижний регистр без пунктуации и HTML-тегов"""
+    word = re.sub(r"<[^>]+>", "", word)
+    word = unicodedata.normalize("NFC", word).casefold()
+    return re.sub(r"[^\w'-]+", "", word).strip("'-")
+
+
+def find_keyword_span(word_timings: List[Dict[str, float]], keyword: str) -> Optional[Dict[str, float]]:
+    """
+    Находит ключевое слово (возможно из нескольких слов) в таймингах фразы
+
+    Args:
+        word_timings: Список {"text", "start_ms", "end_ms"} в порядке произнесения
+        keyword: Ключевое слово
+
+    Returns:
+        {"start_ms", "end_ms"} или None, если слово не найдено
+    """
+    keyword_words = [w for w in (_normalize_word(part) for part in keyword.split()) if w]
+    if not keyword_words or not word_timings:
+        return None
+
+    phrase_words = [_normalize_word(item["text"]) for item in word_timings]
+    count = len(keyword_words)
+
+    def span(index: int) -> Dict[str, float]:
+        return {
+            "start_ms": word_timings[index]["start_ms"],
+            "end_ms": word_timings[index + count - 1]["end_ms"],
+        }
+
+    # Точное совпадение последовательности слов
+    for index in range(len(phrase_words) - count + 1):
+        if phrase_words[index:index + count] == keyword_words:
+            return span(index)
+
+    # Для одного слова допускаем другую форму с тем же началом (dog -> dogs)
+    if count == 1:
+        for index, word in enumerate(phrase_words):
+            if word and (word.startswith(keyword_words[0]) or keyword_words[0].startswith(word)) \
+                    and min(len(word), len(keyword_words[0])) >= 3:
+                return span(index)
+
+    return None
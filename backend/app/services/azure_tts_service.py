@@ -8,8 +8,6 @@ Azure TTS сервис (заглушка)
 import logging
 from typing import Optional
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - AZURE_TTS - %(levelname)s - %(message)s')
-
 class AzureTTSService:
     """
     Заглушка для Azure TTS сервиса
@@ -6,18 +6,38 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, func
 
 from ..models.user import User
 from ..models.deck import Deck
 from ..models.card import Card
 from ..schemas import CardCreate
+from ..timing import timed
 from fastapi import HTTPException, status
 
 logger = logging.getLogger(__name__)
 
+# Колонки для списков карточек: без examples, interval и ease_factor
+LISTING_COLUMNS = (
+    Card.id,
+    Card.phrase,
+    Card.translation,
+    Card.keyword,
+    Card.gap_fill,
+    Card.due_date,
+    Card.image_path,
+)
+
+# Экспорт содержит все данные карточки, но читается потоком
+EXPORT_COLUMNS = LISTING_COLUMNS + (
+    Card.examples,
+    Card.interval,
+    Card.ease_factor,
+)
+EXPORT_BATCH_SIZE = 500
+
 
 class CardService:
     """
@@ -25,6 +45,29 @@ class CardService:
     """
     
     @staticmethod
+    def card_to_dict(card) -> Dict[str, Any]:
+        """
+        Готовит карточку к отдаче клиенту (форма ответа get_deck_with_cards).
+        
+        Args:
+            card: Карточка или строка результата с теми же атрибутами
+            
+        Returns:
+            Dict только из JSON-совместимых значений
+        """
+        return {
+            "id": card.id,
+            "front_text": card.phrase,
+            "back_text": card.translation,
+            "keyword": card.keyword,
+            "gap_fill": card.gap_fill,
+            "difficulty": 1,  # Пока используем значение по умолчанию
+            "next_review": card.due_date.isoformat() if card.due_date else None,
+            "image_path": card.image_path
+        }
+    
+    @staticmethod
+    @timed("cards")
     def get_deck_with_cards(deck_id: int, user: User, db: Session, page: int = 1, limit: int = 10) -> Dict[str, Any]:
         """
         Получает колоду с карточками для указанного пользователя с пагинацией.
@@ -43,32 +86,24 @@ class CardService:
             HTTPException: Если колода не найдена или нет доступа
         """
         # Проверяем существование колоды и права доступа
-        deck = db.query(Deck).filter(Deck.id == deck_id).first()
-        if not deck:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Deck not found"
-            )
-        
-        if deck.user_id != user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this deck"
-            )
+        deck = CardService._get_owned_deck(deck_id, user, db)
         
         # Подсчитываем общее количество карточек
-        total_cards = db.query(Card).filter(Card.deck_id == deck_id).count()
+        total_cards = db.scalar(
+            select(func.count()).select_from(Card).where(Card.deck_id == deck_id)
+        )
         
         # Вычисляем offset для пагинации
         offset = (page - 1) * limit
         
-        # Получаем карточки колоды с пагинацией
-        cards = (db.query(Card)
-                .filter(Card.deck_id == deck_id)
-                .order_by(Card.id)
-                .offset(offset)
-                .limit(limit)
-                .all())
+        # Получаем только нужные колонки, без ORM объектов в identity map
+        cards = db.execute(
+            select(*LISTING_COLUMNS)
+            .where(Card.deck_id == deck_id)
+            .order_by(Card.id)
+            .offset(offset)
+            .limit(limit)
+        ).all()
         
         # Вычисляем данные пагинации
         total_pages = (total_cards + limit - 1) // limit  # Округление вверх
@@ -84,19 +119,7 @@ class CardService:
                 "cards_count": deck.cards_count,
                 "due_count": deck.due_count
             },
-            "cards": [
-                {
-                    "id": card.id,
-                    "front_text": card.phrase,
-                    "back_text": card.translation,
-                    "keyword": card.keyword,
-                    "gap_fill": card.gap_fill,
-                    "difficulty": 1,  # Пока используем значение по умолчанию
-                    "next_review": card.due_date.isoformat() if card.due_date else None,
-                    "image_path": card.image_path
-                }
-                for card in cards
-            ],
+            "cards": [CardService.card_to_dict(card) for card in cards],
             "pagination": {
                 "current_page": page,
                 "total_pages": total_pages,
@@ -108,6 +131,7 @@ class CardService:
         }
     
     @staticmethod
+    @timed("cards")
     def create_card(card_data: CardCreate, user: User, db: Session) -> Dict[str, Any]:
         """
         Создает новую карточку в указанной колоде.
@@ -158,6 +182,7 @@ class CardService:
             # Сохраняем карточку и обновляем счетчик
             db.add(new_card)
             deck.cards_count += 1
+            CardService.bump_versions(deck, user)
             db.commit()
             db.refresh(new_card)
             
@@ -182,6 +207,125 @@ class CardService:
             )
     
     @staticmethod
+    def _get_owned_deck(deck_id: int, user: User, db: Session) -> Deck:
+        """
+        Возвращает колоду пользователя.
+        
+        Raises:
+            HTTPException: Если колода не найдена или нет доступа
+        """
+        deck = db.query(Deck).filter(Deck.id == deck_id).first()
+        if not deck:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Deck not found"
+            )
+        
+        if deck.user_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this deck"
+            )
+        return deck
+    
+    @staticmethod
+    def get_deck_version(deck_id: int, user: User, db: Session) -> int:
+        """
+        Текущая версия колоды для ETag (один запрос по первичному ключу).
+        
+        Raises:
+            HTTPException: Если колода не найдена или нет доступа
+        """
+        row = db.execute(
+            select(Deck.user_id, Deck.version).where(Deck.id == deck_id)
+        ).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Deck not found"
+            )
+        if row.user_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this deck"
+            )
+        return row.version
+    
+    @staticmethod
+    def bump_versions(deck: Deck, user: User) -> None:
+        """
+        Отмечает изменение колоды: растут версия колоды и версия списка колод
+        пользователя. Инкремент выполняется в SQL при commit, поэтому
+        параллельные запросы не теряют обновления.
+        """
+        deck.version = Deck.version + 1
+        user.decks_version = User.decks_version + 1
+    
+    @staticmethod
+    @timed("cards")
+    def get_due_cards(deck_id: int, user: User, db: Session, limit: int = 20) -> Dict[str, Any]:
+        """
+        Получает очередь карточек для повторения (срок наступил), старые первыми.
+        
+        Args:
+            deck_id: ID колоды
+            user: Пользователь
+            db: Сессия базы данных
+            limit: Максимум карточек в очереди
+            
+        Returns:
+            Dict с карточками и их количеством
+            
+        Raises:
+            HTTPException: Если колода не найдена или нет доступа
+        """
+        CardService._get_owned_deck(deck_id, user, db)
+        
+        rows = db.execute(
+            select(*LISTING_COLUMNS)
+            .where(Card.deck_id == deck_id, Card.due_date <= datetime.utcnow())
+            .order_by(Card.due_date, Card.id)
+            .limit(limit)
+        ).all()
+        
+        return {
+            "deck_id": deck_id,
+            "cards": [CardService.card_to_dict(row) for row in rows],
+            "count": len(rows)
+        }
+    
+    @staticmethod
+    def iter_deck_export(deck_id: int, db: Session) -> Iterator[Dict[str, Any]]:
+        """
+        Потоково отдает все карточки колоды для экспорта.
+        
+        Строки читаются из курсора пачками по EXPORT_BATCH_SIZE (yield_per),
+        поэтому память не зависит от размера колоды. Права доступа
+        проверяются до вызова.
+        
+        Args:
+            deck_id: ID колоды
+            db: Сессия базы данных
+            
+        Yields:
+            Dict карточки со всеми полями
+        """
+        result = db.execute(
+            select(*EXPORT_COLUMNS)
+            .where(Card.deck_id == deck_id)
+            .order_by(Card.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in result:
+            yield {
+                **CardService.card_to_dict(row),
+                "examples": row.examples,
+                "interval": row.interval,
+                "ease_factor": row.ease_factor
+            }
+    
+    @staticmethod
+    @timed("cards")
     def update_card_status(
         card_id: int, 
         rating: str, 
@@ -225,6 +369,7 @@ class CardService:
             
             # Обновляем счетчик повторений колоды
             CardService._update_deck_due_count(deck, rating, old_due_date, card.due_date)
+            CardService.bump_versions(deck, user)
             
             db.commit()
             
@@ -249,6 +394,7 @@ class CardService:
             )
     
     @staticmethod
+    @timed("cards")
     def delete_card(card_id: int, user: User, db: Session) -> Dict[str, Any]:
         """
         Удаляет карточку из базы данных.
@@ -283,6 +429,7 @@ class CardService:
             # Удаляем карточку и обновляем счетчики
             db.delete(card)
             deck.cards_count = max(0, (deck.cards_count or 1) - 1)
+            CardService.bump_versions(deck, user)
             
             db.commit()
             
@@ -7,26 +7,46 @@ Edge TTS сервис для высококачественного польск
 
 import asyncio
 import hashlib
+import importlib.util
+import json
 import logging
+import time
+from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Optional, Dict
-import tempfile
-import os
-
-try:
-    import edge_tts
-    EDGE_TTS_AVAILABLE = True
-except ImportError:
-    EDGE_TTS_AVAILABLE = False
+from typing import Optional, Dict, List, Tuple
+
+from ..logging_config import PAYLOAD_LOGGER
+
+# Сам пакет (и aiohttp под ним) импортируется при первом синтезе
+EDGE_TTS_AVAILABLE = importlib.util.find_spec("edge_tts") is not None
+if not EDGE_TTS_AVAILABLE:
     logging.warning("Edge TTS не установлен. Используйте: pip install edge-tts")
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - EDGE_TTS - %(levelname)s - %(message)s')
+# Параметры каждого синтеза - в выборочный лог дампов
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
 
 # Директории для сохранения файлов
 BASE_DIR = Path(__file__).parent.parent.parent  # backend/
 AUDIO_DIR = BASE_DIR / "frontend" / "assets" / "audio"
 AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
+# Хеджирование: если голос не прислал первый аудио-чанк за это время,
+# параллельно запускаем следующий голос. Задержка подстраивается под
+# наблюдаемую латентность голоса, но не выходит за эти границы.
+HEDGE_MIN_DELAY = 0.5
+HEDGE_MAX_DELAY = 1.5
+HEDGE_LATENCY_MULTIPLIER = 2.0
+# Общий бюджет на синтез одной фразы (все голоса вместе)
+SYNTHESIS_TIMEOUT = 20.0
+# Голос с долей успехов ниже порога (после VOICE_STATS_MIN_SAMPLES попыток)
+# уходит в конец очереди
+VOICE_HEALTHY_SUCCESS_RATE = 0.5
+VOICE_STATS_MIN_SAMPLES = 3
+# Вес нового замера в скользящем среднем латентности
+VOICE_LATENCY_EWMA_ALPHA = 0.2
+# Смещения WordBoundary приходят в тиках по 100 нс
+TICKS_PER_MS = 10_000
+
 # Маппинг языков на Edge TTS голоса (высокое качество)
 EDGE_VOICE_MAPPING = {
     # Польский - несколько вариантов голосов
@@ -94,6 +114,33 @@ EDGE_VOICE_MAPPING = {
     }
 }
 
+@dataclass
+class VoiceStats:
+    """Статистика голоса для выбора порядка и задержки хеджирования"""
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    cancelled: int = 0
+    first_chunk_latency: Optional[float] = None  # EWMA, секунды
+
+    @property
+    def success_rate(self) -> float:
+        finished = self.successes + self.failures
+        return self.successes / finished if finished else 1.0
+
+    @property
+    def is_healthy(self) -> bool:
+        if self.successes + self.failures < VOICE_STATS_MIN_SAMPLES:
+            return True
+        return self.success_rate >= VOICE_HEALTHY_SUCCESS_RATE
+
+    def record_first_chunk(self, latency: float) -> None:
+        if self.first_chunk_latency is None:
+            self.first_chunk_latency = latency
+        else:
+            self.first_chunk_latency += VOICE_LATENCY_EWMA_ALPHA * (latency - self.first_chunk_latency)
+
+
 class EdgeTTSService:
     """
     Edge TTS сервис для высококачественной генерации речи
@@ -102,6 +149,7 @@ class EdgeTTSService:
     
     def __init__(self):
         self.is_available = EDGE_TTS_AVAILABLE
+        self._voice_stats: Dict[str, VoiceStats] = {}
         if not self.is_available:
             logging.warning("Edge TTS недоступен")
     
@@ -126,6 +174,159 @@ class EdgeTTSService:
         logging.warning(f"Голос для языка '{language_id}' не найден, используем английский")
         return EDGE_VOICE_MAPPING['en']
     
+    def _get_stats(self, voice: str) -> VoiceStats:
+        return self._voice_stats.setdefault(voice, VoiceStats())
+    
+    def _rank_voices(self, voice_config: Dict[str, any]) -> List[str]:
+        """
+        Порядок голосов для синтеза: основной голос первым, пока он здоров,
+        чтобы карточки звучали одинаково; нездоровые голоса уходят в конец
+        """
+        voices = [voice_config['voice'], *voice_config.get('backup_voices', [])]
+        return sorted(voices, key=lambda voice: not self._get_stats(voice).is_healthy)
+    
+    def _hedge_delay(self, voice: str) -> float:
+        """Сколько ждать первый чанк от голоса, прежде чем запускать следующий"""
+        latency = self._get_stats(voice).first_chunk_latency
+        if latency is None:
+            return HEDGE_MAX_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, latency * HEDGE_LATENCY_MULTIPLIER))
+    
+    def _find_cached(self, text: str, language_id: str, voices: List[str]) -> Optional[str]:
+        """Ищет уже сгенерированный файл любым из голосов языка"""
+        for voice in voices:
+            filename = self._generate_filename(text, language_id, voice)
+            if (AUDIO_DIR / filename).exists():
+                return filename
+        return None
+    
+    def _words_path(self, audio_path: Path) -> Path:
+        """Путь к файлу таймингов слов рядом с аудио"""
+        return audio_path.with_suffix('.words.json')
+    
+    async def _stream_voice(self, text: str, voice: str, on_first_chunk) -> Tuple[bytes, List[Dict[str, any]]]:
+        """
+        Синтезирует текст одним голосом, сообщая о первом аудио-чанке
+        
+        Returns:
+            (аудио, тайминги слов [{"text", "start_ms", "end_ms"}])
+        """
+        import edge_tts
+
+        started = time.perf_counter()
+        communicate = edge_tts.Communicate(text, voice, receive_timeout=int(SYNTHESIS_TIMEOUT))
+        audio_data = bytearray()
+        word_timings = []
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                if not audio_data:
+                    on_first_chunk(voice, time.perf_counter() - started)
+                audio_data += chunk["data"]
+            elif chunk["type"] == "WordBoundary":
+                start_ms = chunk["offset"] / TICKS_PER_MS
+                word_timings.append({
+                    "text": chunk["text"],
+                    "start_ms": round(start_ms, 1),
+                    "end_ms": round(start_ms + chunk["duration"] / TICKS_PER_MS, 1),
+                })
+        return bytes(audio_data), word_timings
+    
+    async def _hedged_synthesis(self, text: str, voices: List[str]) -> Tuple[Optional[str], bytes, List[Dict[str, any]]]:
+        """
+        Запускает основной голос и добавляет следующий, если первый чанк
+        не пришел за задержку хеджирования (или попытка упала). Побеждает
+        голос, первым начавший отдавать аудио, остальные отменяются.
+        
+        Returns:
+            (голос, аудио, тайминги слов) или (None, b"", []) если ни один голос не справился
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SYNTHESIS_TIMEOUT
+        pending_voices = list(voices)
+        attempts: Dict[asyncio.Task, str] = {}
+        winner: asyncio.Future = loop.create_future()
+        
+        def on_first_chunk(voice: str, latency: float) -> None:
+            self._get_stats(voice).record_first_chunk(latency)
+            if not winner.done():
+                winner.set_result(voice)
+        
+        def launch_next() -> None:
+            voice = pending_voices.pop(0)
+            self._get_stats(voice).attempts += 1
+            task = asyncio.create_task(self._stream_voice(text, voice, on_first_chunk))
+            attempts[task] = voice
+        
+        def record_failure(task: asyncio.Task, reason: Optional[str] = None) -> None:
+            voice = attempts.pop(task)
+            self._get_stats(voice).failures += 1
+            error = reason or (None if task.cancelled() else task.exception())
+            logging.warning(f"⚠️ Edge голос {voice} не справился: {error or 'нет аудио'}")
+        
+        launch_next()
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                
+                if not winner.done():
+                    leading_voice = next(iter(attempts.values()), None)
+                    timeout = remaining
+                    if pending_voices and leading_voice:
+                        timeout = min(remaining, self._hedge_delay(leading_voice))
+                    done, _ = await asyncio.wait(
+                        [*attempts, winner], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not winner.done():
+                        for task in done:
+                            record_failure(task)
+                        if pending_voices:
+                            if not done:
+                                logging.info(f"⏱️ Нет первого чанка от Edge за {timeout:.2f}s, хеджируем следующим голосом")
+                            launch_next()
+                        elif not attempts:
+                            break
+                        continue
+                
+                # Есть победитель - отменяем остальных и дожидаемся полного аудио
+                voice = winner.result()
+                winner_task = next(task for task, task_voice in attempts.items() if task_voice == voice)
+                for task, task_voice in list(attempts.items()):
+                    if task is not winner_task:
+                        task.cancel()
+                        self._get_stats(task_voice).cancelled += 1
+                        attempts.pop(task)
+                        # Проигравший голос можно попробовать снова, если победитель упадет
+                        pending_voices.insert(0, task_voice)
+                
+                try:
+                    audio_data, word_timings = await asyncio.wait_for(winner_task, timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    record_failure(winner_task, "таймаут синтеза")
+                    break
+                except Exception:
+                    record_failure(winner_task)
+                    audio_data = b""
+                
+                if audio_data:
+                    attempts.pop(winner_task)
+                    self._get_stats(voice).successes += 1
+                    return voice, audio_data, word_timings
+                
+                if winner_task in attempts:
+                    record_failure(winner_task)
+                if not pending_voices and not attempts:
+                    break
+                winner = loop.create_future()
+                if not attempts:
+                    launch_next()
+        finally:
+            for task in attempts:
+                task.cancel()
+        
+        return None, b"", []
+    
     async def generate_audio(self, text: str, language_id: str, prefix: str = "edge") -> Optional[str]:
         """
         Генерация аудио с помощью Edge TTS
@@ -146,79 +347,69 @@ class EdgeTTSService:
         try:
             # Получаем конфигурацию голоса
             voice_config = self._get_voice_config(language_id)
-            voice_name = voice_config['voice']
-            
-            # Генерируем имя файла
-            filename = self._generate_filename(text, language_id, voice_name)
-            file_path = AUDIO_DIR / filename
-            
-            # Проверяем кэш
-            if file_path.exists():
-                logging.info(f"🎵 Edge аудио найдено в кэше: {filename}")
-                return f"assets/audio/{filename}"
+            voices = self._rank_voices(voice_config)
             
-            # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ
-            logging.info(f"🔊 EDGE TTS ГЕНЕРАЦИЯ:")
-            logging.info(f"   📝 Текст: '{text[:50]}{'...' if len(text) > 50 else ''}'")
-            logging.info(f"   🌍 Входной language_id: '{language_id}'")
-            logging.info(f"   🎯 Edge язык: '{voice_config['language']}'")
-            logging.info(f"   🎤 Edge голос: '{voice_name}'")
-            logging.info(f"   🏆 Качество: '{voice_config['quality']}'")
-            logging.info(f"   📁 Файл: {filename}")
+            # Проверяем кэш (файл мог быть создан любым голосом языка)
+            cached_filename = self._find_cached(text, language_id, voices)
+            if cached_filename:
+                logging.info(f"🎵 Edge аудио найдено в кэше: {cached_filename}")
+                return f"assets/audio/{cached_filename}"
             
-            # Создаем коммуникатор Edge TTS
-            communicate = edge_tts.Communicate(text, voice_name)
+            payload_logger.info(
+                "🔊 Edge TTS: текст %r, language_id '%s', язык '%s', голоса %s, качество '%s'",
+                text[:50], language_id, voice_config['language'], voices, voice_config['quality']
+            )
             
-            # Генерируем аудио
-            audio_data = b""
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_data += chunk["data"]
+            started = time.perf_counter()
+            voice_name, audio_data, word_timings = await self._hedged_synthesis(text, voices)
             
             if not audio_data:
                 logging.error(f"❌ Edge TTS не вернул аудио данные для '{text[:30]}...'")
                 return None
             
-            # Сохраняем файл
-            with open(file_path, 'wb') as f:
-                f.write(audio_data)
+            # Сохраняем файл атомарно, чтобы параллельный запрос не прочитал недописанный файл
+            filename = self._generate_filename(text, language_id, voice_name)
+            file_path = AUDIO_DIR / filename
+            tmp_path = file_path.with_suffix('.part')
+            tmp_path.write_bytes(audio_data)
+            # Тайминги пишем до аудио: если аудио уже есть в кэше, тайминги к нему тоже есть
+            if word_timings:
+                self._words_path(file_path).write_text(json.dumps(word_timings, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(file_path)
             
-            file_size = file_path.stat().st_size
-            logging.info(f"✅ Edge аудио создано: '{text[:30]}...' ({language_id}) -> {filename} ({file_size} байт)")
+            logging.info(
+                f"✅ Edge аудио создано: '{text[:30]}...' ({language_id}, {voice_name}) -> {filename} "
+                f"({len(audio_data)} байт, {time.perf_counter() - started:.2f}s)"
+            )
             return f"assets/audio/{filename}"
             
         except Exception as e:
             logging.error(f"❌ Исключение в Edge TTS: {e}")
-            
-            # Попробуем backup голос
-            voice_config = self._get_voice_config(language_id)
-            if 'backup_voices' in voice_config and voice_config['backup_voices']:
-                for backup_voice in voice_config['backup_voices']:
-                    try:
-                        logging.info(f"🔄 Пробуем backup голос: {backup_voice}")
-                        
-                        communicate = edge_tts.Communicate(text, backup_voice)
-                        audio_data = b""
-                        async for chunk in communicate.stream():
-                            if chunk["type"] == "audio":
-                                audio_data += chunk["data"]
-                        
-                        if audio_data:
-                            filename = self._generate_filename(text, language_id, backup_voice)
-                            file_path = AUDIO_DIR / filename
-                            
-                            with open(file_path, 'wb') as f:
-                                f.write(audio_data)
-                            
-                            logging.info(f"✅ Edge backup аудио создано: {backup_voice}")
-                            return f"assets/audio/{filename}"
-                            
-                    except Exception as backup_e:
-                        logging.warning(f"⚠️ Backup голос {backup_voice} тоже не сработал: {backup_e}")
-                        continue
-            
             return None
     
+    def get_word_timings(self, audio_path: str) -> Optional[List[Dict[str, any]]]:
+        """
+        Тайминги слов для аудио, сгенерированного Edge TTS
+        
+        Args:
+            audio_path: Путь вида "assets/audio/<file>.mp3"
+        
+        Returns:
+            Список {"text", "start_ms", "end_ms"} или None, если таймингов нет
+        """
+        words_path = self._words_path(AUDIO_DIR / Path(audio_path).name)
+        try:
+            return json.loads(words_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+    
+    def get_voice_stats(self) -> Dict[str, Dict[str, any]]:
+        """Статистика голосов: попытки, успехи, латентность первого чанка"""
+        return {
+            voice: {**asdict(stats), 'success_rate': stats.success_rate, 'healthy': stats.is_healthy}
+            for voice, stats in self._voice_stats.items()
+        }
+    
     def get_supported_languages(self) -> Dict[str, str]:
         """Получение списка поддерживаемых языков"""
         return {
@@ -238,7 +429,8 @@ class EdgeTTSService:
             'supported_languages': len(EDGE_VOICE_MAPPING),
             'voice_quality': 'Neural (Premium Quality)',
             'polish_support': 'Excellent',
-            'cost': 'Free'
+            'cost': 'Free',
+            'voice_stats': self.get_voice_stats()
         }
 
 # Создаем глобальный экземпляр сервиса
@@ -247,4 +439,4 @@ edge_tts_service = EdgeTTSService()
 # Функция для совместимости
 async def generate_audio_edge(text: str, language_id: str, prefix: str = "edge") -> Optional[str]:
     """Функция-обертка для генерации аудио через Edge TTS"""
-    return await edge_tts_service.generate_audio(text, language_id, prefix)
\ No newline at end of file
+    return await edge_tts_service.generate_audio(text, language_id, prefix)
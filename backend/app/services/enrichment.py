@@ -4,31 +4,12 @@ import os
 import hashlib
 from pathlib import Path
 from typing import Optional
-import aiohttp
-from gtts import gTTS
-from deep_translator import GoogleTranslator
 
 from .ai_service import generate_examples_with_ai  # Импорт AI
 from .image_finder import find_image_via_api  # Импорт image
-
-# Импорт TTS сервисов
-try:
-    from .edge_tts_service import edge_tts_service
-    EDGE_TTS_AVAILABLE = True
-except ImportError:
-    EDGE_TTS_AVAILABLE = False
-    edge_tts_service = None
-    logging.warning("Edge TTS недоступен")
-
-try:
-    from .azure_tts_service import azure_tts_service
-    AZURE_TTS_AVAILABLE = True
-except ImportError:
-    AZURE_TTS_AVAILABLE = False
-    azure_tts_service = None
-    logging.warning("Azure TTS недоступен")
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - ENRICH - %(levelname)s - %(message)s')
+from .tts_service import tts_service
+from ..timing import span, timed
+from .providers import translate
 
 # Получаем абсолютные пути к директориям
 BASE_DIR = Path(__file__).parent.parent.parent  # backend/
@@ -38,66 +19,14 @@ IMAGE_DIR = BASE_DIR / "frontend" / "assets" / "images"
 def ensure_dir_exists(*dirs): [d.mkdir(parents=True, exist_ok=True) for d in dirs if not d.exists()]
 ensure_dir_exists(AUDIO_DIR, IMAGE_DIR)
 
+@timed("translate")
 async def get_translation(text: str, from_lang: str, to_lang: str) -> Optional[str]:
     try:
-        def translate_sync():
-            return GoogleTranslator(source=from_lang, target=to_lang).translate(text)
-        return await asyncio.get_running_loop().run_in_executor(None, translate_sync)
+        return await asyncio.get_running_loop().run_in_executor(None, translate, text, from_lang, to_lang)
     except Exception as e: 
         logging.error(f"Ошибка перевода: {e}")
         return None
 
-async def generate_audio_gtts_fallback(text: str, lang: str, prefix: str):
-    """
-    Генерирует аудио с использованием gTTS (улучшенная версия для польского)
-    """
-    try:
-        filename = f"{prefix}_gtts_{lang}_{hashlib.md5(text.encode()).hexdigest()[:12]}.mp3"
-        file_path = AUDIO_DIR / filename
-        
-        # Проверяем кэш
-        if file_path.exists():
-            logging.info(f"🎵 gTTS аудио найдено в кэше: {filename}")
-            return f"assets/audio/{filename}"
-        
-        # Специальные настройки для польского языка
-        if lang == 'pl':
-            # Используем медленную речь для лучшего произношения польского
-            slow_speech = True
-            tld = 'com'  # Стабильный домен
-            logging.info(f"🇵🇱 Специальные настройки для польского: slow={slow_speech}, tld={tld}")
-        else:
-            slow_speech = False
-            tld_map = {
-                'pt': 'pt',  # Португальский с португальским TLD
-                'de': 'de',  # Немецкий с немецким TLD
-                'fr': 'fr',  # Французский с французским TLD
-                'es': 'es',  # Испанский с испанским TLD
-            }
-            tld = tld_map.get(lang, 'com')
-        
-        # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ
-        logging.info(f"🔊 gTTS ГЕНЕРАЦИЯ:")
-        logging.info(f"   📝 Текст: '{text[:50]}{'...' if len(text) > 50 else ''}'")
-        logging.info(f"   🌍 Язык: '{lang}'")
-        logging.info(f"   🌐 TLD: '{tld}'")
-        logging.info(f"   🐌 Медленная речь: {slow_speech}")
-        logging.info(f"   📁 Файл: {filename}")
-        
-        def tts_sync():
-            tts = gTTS(text=text, lang=lang, tld=tld, slow=slow_speech)
-            tts.save(str(file_path))
-        
-        await asyncio.get_running_loop().run_in_executor(None, tts_sync)
-        
-        file_size = file_path.stat().st_size
-        logging.info(f"✅ gTTS аудио создано: '{text[:30]}...' ({lang}/{tld}) -> {filename} ({file_size} байт)")
-        return f"assets/audio/{filename}"
-        
-    except Exception as e:
-        logging.error(f"❌ gTTS ошибка: {e}")
-        return None
-
 async def generate_audio(text: str, lang: str, prefix: str):
     """
     Генерирует аудио с использованием TTS сервиса
@@ -107,42 +36,9 @@ async def generate_audio(text: str, lang: str, prefix: str):
         lang: Код языка
         prefix: Префикс для имени файла
     """
+    return await tts_service.generate_audio(text, lang, prefix)
 
-    try:
-        path = AUDIO_DIR / f"{prefix}_{hashlib.md5(text.encode()).hexdigest()[:8]}.mp3"
-        if path.exists(): return str(path)
-        
-        # Специальная обработка для польского языка - используем Edge TTS
-        if lang == 'pl' and EDGE_TTS_AVAILABLE and edge_tts_service:
-            logging.info(f"🇵🇱 Используем Edge TTS для польского языка: '{text[:30]}...'")
-            edge_result = await edge_tts_service.generate_audio(text, lang, prefix)
-            
-            if edge_result:
-                logging.info(f"✅ Edge TTS успешно для польского: '{text[:30]}...'")
-                return edge_result
-            else:
-                logging.warning(f"⚠️ Edge TTS не удался для польского, переходим к gTTS")
-        
-        # Пробуем Azure TTS для других языков (если доступен)
-        if AZURE_TTS_AVAILABLE and azure_tts_service and azure_tts_service.is_available():
-            logging.info(f"🎯 Попытка генерации через Azure TTS для языка '{lang}'")
-            azure_result = await azure_tts_service.generate_audio(text, lang, prefix)
-            
-            if azure_result:
-                logging.info(f"✅ Azure TTS успешно: '{text[:30]}...' ({lang})")
-                return azure_result
-            else:
-                logging.warning(f"⚠️ Azure TTS не удался, переходим к gTTS fallback")
-        else:
-            logging.info(f"ℹ️ Azure TTS недоступен, используем gTTS для языка '{lang}'")
-        
-        # Fallback на gTTS
-        return await generate_audio_gtts_fallback(text, lang, prefix)
-        
-    except Exception as e:
-        logging.error(f"Ошибка генерации аудио: {e}")
-        return None
-
+@timed("image-download")
 async def download_and_save_image(image_url: str, query: str) -> Optional[str]:
     if not image_url: return None
     try:
@@ -153,6 +49,8 @@ async def download_and_save_image(image_url: str, query: str) -> Optional[str]:
         if file_path.exists():
             return f"assets/images/{filename}"
         
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
             async with session.get(image_url) as response:
                 if response.status == 200:
@@ -212,24 +110,26 @@ async def enrich_phrase(phrase: str, keyword: str, lang_code: str, target_lang:
     tasks = [
         get_translation(keyword, from_lang=lang_code, to_lang=target_lang),  # перевод keyword
         download_and_save_image(image_url_from_api, english_image_query),    # download image
-        generate_audio(keyword, lang_code, "keyword"),                       # audio keyword
-        generate_audio(phrase, lang_code, "phrase")                          # audio phrase
+        tts_service.generate_phrase_with_keyword(phrase, keyword, lang_code) # audio phrase + keyword
     ]
 
-    gathered_results = await asyncio.gather(*tasks)
+    # Критический путь этапа - самая долгая из параллельных задач
+    with span("enrich-parallel"):
+        gathered_results = await asyncio.gather(*tasks)
     
     keyword_translation = gathered_results[0]
     image_path = gathered_results[1]
-    keyword_audio_path = gathered_results[2]
-    phrase_audio_path = gathered_results[3]
+    audio = gathered_results[2]
     
     # Результат (как в оригинале)
     result = {
         'keyword': keyword,
         'keyword_translation': keyword_translation,
-        'keyword_audio_path': keyword_audio_path,
+        'keyword_audio_path': audio['keyword_audio_path'],
+        'keyword_audio_range': audio['keyword_audio_range'],
         'phrase': phrase,
-        'phrase_audio_path': phrase_audio_path,
+        'phrase_audio_path': audio['phrase_audio_path'],
+        'phrase_word_timings': audio['phrase_word_timings'],
         'original_phrase': original_phrase_data,
         'additional_examples': additional_examples,
         'image_path': image_path
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gTTS сервис - резервный движок синтеза речи
+Использует Google Translate TTS через библиотеку gTTS
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+from pathlib import Path
+from typing import Optional, Dict
+
+# Сам пакет (и requests под ним) импортируется при первой генерации
+GTTS_AVAILABLE = importlib.util.find_spec("gtts") is not None
+if not GTTS_AVAILABLE:
+    logging.warning("gTTS не установлен. Используйте: pip install gtts")
+
+# Директории для сохранения файлов
+BASE_DIR = Path(__file__).parent.parent.parent  # backend/
+AUDIO_DIR = BASE_DIR / "frontend" / "assets" / "audio"
+AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+
+# Региональные домены Google для более естественного акцента
+GTTS_TLD_MAPPING = {
+    'pt': 'pt',  # Португальский с португальским TLD
+    'de': 'de',  # Немецкий с немецким TLD
+    'fr': 'fr',  # Французский с французским TLD
+    'es': 'es',  # Испанский с испанским TLD
+}
+
+
+class GTTSService:
+    """
+    gTTS сервис для генерации речи
+    Работает для всех языков, которые поддерживает Google Translate
+    """
+
+    def __init__(self):
+        self.is_available = GTTS_AVAILABLE
+        self._languages: Optional[Dict[str, str]] = None
+        if not self.is_available:
+            logging.warning("gTTS недоступен")
+
+    def _generate_filename(self, text: str, language_id: str, prefix: str) -> str:
+        """Генерация уникального имени файла"""
+        text_hash = hashlib.md5(text.encode()).hexdigest()[:12]
+        return f"{prefix}_gtts_{language_id}_{text_hash}.mp3"
+
+    def _get_speech_options(self, language_id: str) -> Dict[str, any]:
+        """Настройки tld/slow для языка"""
+        if language_id == 'pl':
+            # Медленная речь для лучшего произношения польского
+            return {'tld': 'com', 'slow': True}
+        return {'tld': GTTS_TLD_MAPPING.get(language_id, 'com'), 'slow': False}
+
+    async def generate_audio(self, text: str, language_id: str, prefix: str = "tts") -> Optional[str]:
+        """
+        Генерация аудио с помощью gTTS
+
+        Args:
+            text: Текст для озвучки
+            language_id: Код языка (например, 'en', 'ru', 'pt')
+            prefix: Префикс для имени файла
+
+        Returns:
+            Относительный путь к аудио файлу или None при ошибке
+        """
+        if not self.is_available:
+            logging.warning("gTTS недоступен, пропускаем генерацию")
+            return None
+
+        try:
+            filename = self._generate_filename(text, language_id, prefix)
+            file_path = AUDIO_DIR / filename
+
+            # Проверяем кэш
+            if file_path.exists():
+                logging.info(f"🎵 gTTS аудио найдено в кэше: {filename}")
+                return f"assets/audio/{filename}"
+
+            options = self._get_speech_options(language_id)
+            logging.info(
+                f"🔊 gTTS генерация: '{text[:50]}{'...' if len(text) > 50 else ''}' "
+                f"({language_id}, tld={options['tld']}, slow={options['slow']}) -> {filename}"
+            )
+
+            def tts_sync():
+                from gtts import gTTS
+
+                tts = gTTS(text=text, lang=language_id, **options)
+                # Пишем во временный файл, чтобы параллельный запрос не отдал недописанное аудио
+                tmp_path = file_path.with_suffix('.part')
+                tts.save(str(tmp_path))
+                tmp_path.replace(file_path)
+
+            await asyncio.get_running_loop().run_in_executor(None, tts_sync)
+
+            file_size = file_path.stat().st_size
+            logging.info(f"✅ gTTS аудио создано: '{text[:30]}...' ({language_id}) -> {filename} ({file_size} байт)")
+            return f"assets/audio/{filename}"
+
+        except Exception as e:
+            logging.error(f"❌ gTTS ошибка: {e}")
+            return None
+
+    def get_supported_languages(self) -> Dict[str, str]:
+        """Получение списка поддерживаемых языков {код: название}"""
+        if not self.is_available:
+            return {}
+        if self._languages is None:
+            try:
+                from gtts.lang import tts_langs
+
+                self._languages = dict(tts_langs())
+            except Exception as e:
+                logging.warning(f"Не удалось получить список языков gTTS: {e}")
+                return {}
+        return self._languages
+
+    def is_language_supported(self, language_id: str) -> bool:
+        """Проверка поддержки языка"""
+        return language_id in self.get_supported_languages()
+
+    def get_service_info(self) -> Dict[str, any]:
+        """Информация о сервисе"""
+        return {
+            'service': 'Google Translate TTS (gTTS)',
+            'available': self.is_available,
+            'supported_languages': len(self.get_supported_languages()),
+            'cost': 'Free'
+        }
+
+# Создаем глобальный экземпляр сервиса
+gtts_service = GTTSService()
@@ -3,33 +3,29 @@ import logging
 import asyncio
 from typing import Optional
 from app.core.config import get_settings
+from app.timing import span
 
-settings = get_settings()
 
-# Инициализация Pexels API
-try:
-    import requests
-    PEXELS_API_KEY = settings.PEXELS_API_KEY
-    if PEXELS_API_KEY and PEXELS_API_KEY != "your_pexels_api_key_here":
-        logging.info("Pexels API успешно настроен.")
-        pexels_available = True
-    else:
-        logging.warning("PEXELS_API_KEY не установлен или содержит placeholder.")
-        pexels_available = False
-except Exception as e:
-    logging.error(f"Ошибка инициализации Pexels API: {e}")
-    pexels_available = False
+def get_pexels_api_key() -> Optional[str]:
+    """Ключ Pexels API или None, если он не настроен (настройки читаются при первом поиске)"""
+    api_key = get_settings().PEXELS_API_KEY
+    if api_key and api_key != "your_pexels_api_key_here":
+        return api_key
+    return None
 
 async def find_image_via_api(query: str) -> Optional[str]:
     """Поиск изображения через Pexels API"""
-    if not pexels_available or not PEXELS_API_KEY:
-        logging.warning("Pexels API недоступен")
+    PEXELS_API_KEY = get_pexels_api_key()
+    if not PEXELS_API_KEY:
+        logging.warning("Pexels API недоступен: PEXELS_API_KEY не установлен или содержит placeholder")
         return None
     
     try:
         loop = asyncio.get_running_loop()
         
         def search_sync():
+            import requests
+
             headers = {
                 'Authorization': PEXELS_API_KEY
             }
@@ -62,7 +58,8 @@ async def find_image_via_api(query: str) -> Optional[str]:
             
             return None
         
-        image_url = await loop.run_in_executor(None, search_sync)
+        with span("image-search"):
+            image_url = await loop.run_in_executor(None, search_sync)
         
         if image_url:
             logging.info(f"Найдена картинка через Pexels API: {image_url}")
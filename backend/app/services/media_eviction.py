@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Вытеснение сгенерированных медиафайлов по бюджету диска (LRU)
+Аудио и картинки удаляются по давности последнего доступа,
+файлы, на которые ссылаются карточки, не трогаются
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from app.core.config import get_settings
+from app.workers import WORKER_STATE_DIR
+
+ASSETS_DIR = Path(__file__).parent.parent.parent / "frontend" / "assets"
+MEDIA_DIRS = {
+    "audio": ASSETS_DIR / "audio",
+    "images": ASSETS_DIR / "images",
+}
+# Манифест - вне frontend/: /static раздает все, что лежит в assets
+ACCESS_MANIFEST = WORKER_STATE_DIR / "media_access.json"
+LEGACY_ACCESS_MANIFEST = ASSETS_DIR / ".media_access.json"
+
+# Вытесняем с запасом, чтобы не запускать очистку на каждом новом файле
+EVICTION_LOW_WATERMARK = 0.9
+
+# Строка access log nginx (combined): [10/Oct/2025:13:55:36 +0000] "GET /static/assets/audio/x.mp3 HTTP/1.1"
+_NGINX_LOG_LINE = re.compile(
+    r'\[(?P<time>[^\]]+)\] "(?:GET|HEAD) /static/assets/(?P<media_class>audio|images)/(?P<name>[^\s?"]+)'
+)
+_NGINX_TIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+
+def media_group(name: str) -> str:
+    """
+    Группа файла: имя до первой точки
+
+    Варианты одного клипа (x.mp3, x.ogg, x.words.json) живут и удаляются вместе.
+    """
+    return name.split(".", 1)[0]
+
+
+@dataclass
+class MediaGroup:
+    """Файлы одного медиа-объекта"""
+    files: List[Path] = field(default_factory=list)
+    size: int = 0
+    last_access: float = 0.0
+
+
+def _migrate_legacy_manifest() -> None:
+    """Переносит манифест из frontend/assets (там он был доступен по /static)"""
+    if LEGACY_ACCESS_MANIFEST.exists() and not ACCESS_MANIFEST.exists():
+        try:
+            ACCESS_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+            ACCESS_MANIFEST.write_bytes(LEGACY_ACCESS_MANIFEST.read_bytes())
+        except OSError as e:
+            logging.warning(f"⚠️ Не удалось перенести манифест доступа к медиа: {e}")
+            return
+    for legacy_path in [LEGACY_ACCESS_MANIFEST, *ASSETS_DIR.glob(".media_access.worker-*.json*")]:
+        legacy_path.unlink(missing_ok=True)
+
+
+class MediaAccessRecorder:
+    """
+    Учет последнего доступа к медиафайлам
+
+    Доступ записывается приложением (эндпоинты аудио, кэш TTS) и читается
+    из access log nginx, который раздает /static напрямую. Состояние хранится
+    в манифесте в WORKER_STATE_DIR, чтобы пережить перезапуск воркеров.
+
+    Каждый воркер gunicorn учитывает свои обращения и периодически
+    выгружает их в файлы рядом с манифестом (flush_pending), а процесс,
+    выполняющий вытеснение, забирает их (ingest_pending).
+    """
+
+    def __init__(self, manifest_path: Path = ACCESS_MANIFEST):
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._access: Dict[str, float] = {}
+        self._pending: Dict[str, float] = {}
+        self._log_offset = 0
+        self._loaded = False
+
+    def _key(self, media_class: str, name: str) -> str:
+        return f"{media_class}/{media_group(name)}"
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.manifest_path == ACCESS_MANIFEST:
+            _migrate_legacy_manifest()
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            for key, timestamp in data.get("access", {}).items():
+                # Доступ, записанный до загрузки манифеста, новее сохраненного
+                self._access[key] = max(self._access.get(key, 0.0), timestamp)
+            self._log_offset = int(data.get("log_offset", 0))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Манифест доступа к медиа поврежден, начинаем заново: {e}")
+
+    def record(self, media_class: str, path: Optional[str], timestamp: Optional[float] = None) -> None:
+        """Отмечает доступ к файлу ("assets/audio/x.mp3" или просто имя)"""
+        if not path:
+            return
+        key = self._key(media_class, Path(path).name)
+        timestamp = timestamp or time.time()
+        with self._lock:
+            if timestamp > self._access.get(key, 0.0):
+                self._access[key] = timestamp
+                self._pending[key] = timestamp
+
+    def _merge(self, access: Dict[str, float]) -> None:
+        with self._lock:
+            for key, timestamp in access.items():
+                if timestamp > self._access.get(key, 0.0):
+                    self._access[key] = timestamp
+
+    def _pending_files(self) -> List[Path]:
+        return sorted(self.manifest_path.parent.glob(f"{self.manifest_path.stem}.worker-*.json"))
+
+    def flush_pending(self) -> int:
+        """
+        Выгружает обращения этого воркера в отдельный файл
+
+        Файл пишется один раз и не перезаписывается, поэтому чтение
+        и удаление его другим процессом безопасно.
+
+        Returns:
+            Количество выгруженных записей
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        target = self.manifest_path.with_name(
+            f"{self.manifest_path.stem}.worker-{os.getpid()}-{time.time_ns()}.json"
+        )
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + ".part")
+            tmp_path.write_text(json.dumps(pending), encoding="utf-8")
+            tmp_path.replace(target)
+        except OSError as e:
+            logging.warning(f"⚠️ Не удалось выгрузить обращения к медиа: {e}")
+            return 0
+        return len(pending)
+
+    def ingest_pending(self) -> int:
+        """
+        Забирает обращения, выгруженные другими воркерами
+
+        Returns:
+            Количество учтенных записей
+        """
+        ingested = 0
+        for file_path in self._pending_files():
+            try:
+                access = json.loads(file_path.read_text(encoding="utf-8"))
+                file_path.unlink()
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ Поврежден файл обращений {file_path.name}: {e}")
+                file_path.unlink(missing_ok=True)
+                continue
+            self._merge(access)
+            ingested += len(access)
+        return ingested
+
+    def last_access(self, media_class: str, name: str) -> Optional[float]:
+        with self._lock:
+            self._load()
+            return self._access.get(self._key(media_class, name))
+
+    def ingest_nginx_log(self, log_path: Optional[str]) -> int:
+        """
+        Дочитывает access log nginx с прошлой позиции
+
+        Returns:
+            Количество учтенных обращений к медиа
+        """
+        if not log_path:
+            return 0
+        path = Path(log_path)
+        if not path.exists():
+            return 0
+
+        with self._lock:
+            self._load()
+            offset = self._log_offset
+        # Лог ротирован - читаем новый файл с начала
+        if path.stat().st_size < offset:
+            offset = 0
+
+        ingested = 0
+        with path.open("rb") as log_file:
+            log_file.seek(offset)
+            for raw_line in log_file:
+                if not raw_line.endswith(b"\n"):
+                    # Незаконченная строка - дочитаем в следующий раз
+                    break
+                offset += len(raw_line)
+                match = _NGINX_LOG_LINE.search(raw_line.decode("utf-8", errors="ignore"))
+                if not match:
+                    continue
+                try:
+                    timestamp = datetime.strptime(match["time"], _NGINX_TIME_FORMAT).timestamp()
+                except ValueError:
+                    continue
+                self._merge({self._key(match["media_class"], match["name"]): timestamp})
+                ingested += 1
+
+        with self._lock:
+            self._log_offset = offset
+        return ingested
+
+    def forget(self, media_class: str, name: str) -> None:
+        with self._lock:
+            self._access.pop(self._key(media_class, name), None)
+
+    def save(self) -> None:
+        """Атомарно сохраняет манифест"""
+        with self._lock:
+            self._load()
+            payload = json.dumps({"access": self._access, "log_offset": self._log_offset})
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".part")
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(self.manifest_path)
+        except OSError as e:
+            logging.warning(f"⚠️ Не удалось сохранить манифест доступа к медиа: {e}")
+
+
+def get_referenced_groups() -> Dict[str, Set[str]]:
+    """Группы медиа, на которые ссылаются карточки"""
+    from app import database
+    from app.models.card import Card
+
+    referenced: Dict[str, Set[str]] = {media_class: set() for media_class in MEDIA_DIRS}
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        rows = db.query(Card.audio_path, Card.image_path).filter(
+            (Card.audio_path.isnot(None)) | (Card.image_path.isnot(None))
+        ).all()
+    finally:
+        db.close()
+
+    for audio_path, image_path in rows:
+        if audio_path:
+            referenced["audio"].add(media_group(Path(audio_path).name))
+        if image_path and "assets/images/" in image_path:
+            referenced["images"].add(media_group(Path(image_path).name))
+    return referenced
+
+
+class MediaEvictionService:
+    """
+    LRU вытеснение медиафайлов по бюджету байтов для каждого класса медиа
+    """
+
+    def __init__(self, recorder: MediaAccessRecorder, media_dirs: Dict[str, Path] = MEDIA_DIRS):
+        self.recorder = recorder
+        self.media_dirs = media_dirs
+
+    def get_budgets(self) -> Dict[str, int]:
+        settings = get_settings()
+        return {
+            "audio": settings.MEDIA_AUDIO_BUDGET_MB * 1024 * 1024,
+            "images": settings.MEDIA_IMAGES_BUDGET_MB * 1024 * 1024,
+        }
+
+    def _scan(self, media_class: str) -> Dict[str, MediaGroup]:
+        groups: Dict[str, MediaGroup] = {}
+        media_dir = self.media_dirs[media_class]
+        if not media_dir.exists():
+            return groups
+
+        for file_path in media_dir.iterdir():
+            try:
+                if not file_path.is_file() or file_path.name.startswith("."):
+                    continue
+                stat = file_path.stat()
+            except OSError:
+                continue
+            group = groups.setdefault(media_group(file_path.name), MediaGroup())
+            group.files.append(file_path)
+            group.size += stat.st_size
+            # Без записанного доступа опираемся на atime/mtime файла
+            group.last_access = max(group.last_access, stat.st_atime, stat.st_mtime)
+
+        for name, group in groups.items():
+            recorded = self.recorder.last_access(media_class, name)
+            if recorded:
+                group.last_access = max(group.last_access, recorded)
+        return groups
+
+    def evict_class(
+        self,
+        media_class: str,
+        budget: int,
+        referenced: Set[str],
+        grace_seconds: float
+    ) -> Dict[str, int]:
+        """
+        Удаляет давно не использованные группы, пока класс не уложится в бюджет
+
+        Returns:
+            {"total_bytes", "evicted_files", "reclaimed_bytes"}
+        """
+        groups = self._scan(media_class)
+        total = sum(group.size for group in groups.values())
+        stats = {"total_bytes": total, "evicted_files": 0, "reclaimed_bytes": 0}
+        if total <= budget:
+            return stats
+
+        target = int(budget * EVICTION_LOW_WATERMARK)
+        cutoff = time.time() - grace_seconds
+        candidates = sorted(
+            (
+                (name, group) for name, group in groups.items()
+                # Свежие файлы могут ждать сохранения карточки
+                if name not in referenced and group.last_access < cutoff
+            ),
+            key=lambda item: item[1].last_access
+        )
+
+        for name, group in candidates:
+            if total <= target:
+                break
+            for file_path in group.files:
+                try:
+                    size = file_path.stat().st_size
+                    file_path.unlink()
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    logging.warning(f"⚠️ Не удалось удалить {file_path.name}: {e}")
+                    continue
+                total -= size
+                stats["evicted_files"] += 1
+                stats["reclaimed_bytes"] += size
+            self.recorder.forget(media_class, name)
+
+        stats["total_bytes"] = total
+        if total > budget:
+            logging.warning(
+                f"⚠️ {media_class}: {total} байт после очистки превышают бюджет {budget} "
+                f"(остальные файлы используются карточками или слишком свежие)"
+            )
+        return stats
+
+    def run(self) -> Dict[str, Dict[str, int]]:
+        """
+        Полный проход вытеснения по всем классам медиа
+
+        Returns:
+            Статистика по каждому классу
+        """
+        from app.monitoring import metrics_collector
+
+        settings = get_settings()
+        started = time.perf_counter()
+        self.recorder.ingest_pending()
+        try:
+            self.recorder.ingest_nginx_log(settings.MEDIA_ACCESS_LOG_PATH)
+        except OSError as e:
+            logging.warning(f"⚠️ Не удалось прочитать access log nginx: {e}")
+
+        referenced = get_referenced_groups()
+        grace_seconds = settings.MEDIA_EVICTION_GRACE_HOURS * 3600
+        results = {}
+        for media_class, budget in self.get_budgets().items():
+            stats = self.evict_class(media_class, budget, referenced[media_class], grace_seconds)
+            metrics_collector.record_media_eviction(media_class, stats)
+            results[media_class] = stats
+
+        self.recorder.save()
+        logging.info(
+            "🧹 Вытеснение медиа за %.2fs: %s",
+            time.perf_counter() - started,
+            ", ".join(
+                f"{media_class} -{stats['reclaimed_bytes']} байт ({stats['evicted_files']} файлов)"
+                for media_class, stats in results.items()
+            )
+        )
+        return results
+
+# Создаем глобальные экземпляры
+media_access_recorder = MediaAccessRecorder()
+media_eviction_service = MediaEvictionService(media_access_recorder)
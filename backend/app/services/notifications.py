@@ -1,3 +1,198 @@
-async def send_daily_reminders():
-    # Query due cards, send via Telegram API (httpx.post)
-    pass
\ No newline at end of file
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ежедневные напоминания о карточках на повторение
+Число карточек по пользователям считается одним сгруппированным запросом,
+сообщения уходят через очередь, которая держит лимиты Telegram:
+общий темп отправки и не чаще одного сообщения в секунду в один чат.
+Ответ 429 ставит на паузу всю отправку на retry_after секунд.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Telegram: ~30 сообщений в секунду на бота, 1 в секунду в один чат
+PER_CHAT_INTERVAL_SECONDS = 1.0
+SEND_CONCURRENCY = 8
+MAX_SEND_ATTEMPTS = 3
+
+SendFunction = Callable[[int, str], Awaitable[None]]
+
+
+def count_due_cards_by_user(db, now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """
+    Сколько карточек ждет повторения у каждого пользователя
+
+    Returns:
+        List[Tuple[int, int]]: (telegram_id, число карточек), только пользователи с due > 0
+    """
+    from ..models.card import Card
+    from ..models.deck import Deck
+    from ..models.user import User
+
+    now = now or datetime.utcnow()
+    due_count = func.count(Card.id)
+    query = (
+        select(User.telegram_id, due_count)
+        .join(Deck, Deck.user_id == User.id)
+        .join(Card, Card.deck_id == Deck.id)
+        .where(Card.due_date <= now, User.telegram_id.isnot(None), User.is_bot.isnot(True))
+        .group_by(User.id, User.telegram_id)
+        .order_by(User.id)
+    )
+    return [(telegram_id, count) for telegram_id, count in db.execute(query)]
+
+
+def _cards_word(count: int) -> str:
+    """Склонение слова "карточка" по числу"""
+    if count % 10 == 1 and count % 100 != 11:
+        return "карточка"
+    if 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        return "карточки"
+    return "карточек"
+
+
+def format_reminder(due_count: int) -> str:
+    """Текст напоминания"""
+    return (
+        f"Время повторить карточки! 📚\n"
+        f"Вас ждет <b>{due_count}</b> {_cards_word(due_count)} на повторение."
+    )
+
+
+async def _send_with_bot(chat_id: int, text: str) -> None:
+    from .telegram_bot import get_bot
+
+    await get_bot().send_message(chat_id, text, parse_mode="HTML")
+
+
+class TelegramSendQueue:
+    """
+    Рассылка с ограничением темпа
+
+    Отправки стартуют не чаще rate_per_second в секунду при любом числе
+    параллельных запросов, поэтому рассылка N сообщений занимает около
+    N / rate_per_second секунд и не упирается в бан.
+    """
+
+    def __init__(self, send: Optional[SendFunction] = None, rate_per_second: float = 25,
+                 concurrency: int = SEND_CONCURRENCY, max_attempts: int = MAX_SEND_ATTEMPTS,
+                 per_chat_interval: float = PER_CHAT_INTERVAL_SECONDS):
+        self.send = send or _send_with_bot
+        self.interval = 1.0 / rate_per_second
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.per_chat_interval = per_chat_interval
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._chat_next: Dict[int, float] = {}
+        self._slot_lock: Optional[asyncio.Lock] = None
+
+    async def _wait_for_slot(self, chat_id: int) -> None:
+        """Резервирует момент отправки с учетом общего темпа, паузы 429 и лимита чата"""
+        while True:
+            async with self._slot_lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot, self._paused_until, self._chat_next.get(chat_id, 0.0))
+                self._next_slot = slot + self.interval
+                self._chat_next[chat_id] = slot + self.per_chat_interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # Пока ждали слот, другой запрос мог получить 429
+            if self._paused_until <= time.monotonic():
+                return
+
+    def _pause(self, retry_after: float) -> None:
+        """429: Telegram просит подождать - ждут все отправки, а не только этот чат"""
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    async def _worker(self, queue: asyncio.Queue, stats: Dict[str, int]) -> None:
+        while True:
+            chat_id, text, attempt = await queue.get()
+            try:
+                await self._wait_for_slot(chat_id)
+                await self.send(chat_id, text)
+                stats["sent"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is not None and attempt + 1 < self.max_attempts:
+                    logger.warning(f"⚠️ Telegram 429, пауза {retry_after} с")
+                    self._pause(float(retry_after))
+                    stats["retried"] += 1
+                    queue.put_nowait((chat_id, text, attempt + 1))
+                elif type(e).__name__ == "TelegramForbiddenError":
+                    # Пользователь заблокировал бота - повторять бессмысленно
+                    stats["blocked"] += 1
+                else:
+                    logger.error(f"❌ Не удалось отправить напоминание в чат {chat_id}: {e}")
+                    stats["failed"] += 1
+            finally:
+                queue.task_done()
+
+    async def send_all(self, messages: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+        """
+        Отправляет сообщения (chat_id, текст) и ждет окончания рассылки
+
+        Returns:
+            Dict[str, int]: sent, retried, blocked, failed
+        """
+        self._slot_lock = asyncio.Lock()
+        self._chat_next.clear()
+        stats = {"sent": 0, "retried": 0, "blocked": 0, "failed": 0}
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id, text in messages:
+            queue.put_nowait((chat_id, text, 0))
+        if queue.empty():
+            return stats
+
+        workers = [asyncio.create_task(self._worker(queue, stats)) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return stats
+
+
+def _load_due_counts() -> List[Tuple[int, int]]:
+    from app import database
+
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        return count_due_cards_by_user(db)
+    finally:
+        db.close()
+
+
+async def send_daily_reminders(send_queue: Optional[TelegramSendQueue] = None) -> Dict[str, int]:
+    """Напоминания всем пользователям, у которых есть карточки на повторение"""
+    settings = get_settings()
+    due_counts = await asyncio.to_thread(_load_due_counts)
+    if not due_counts:
+        logger.info("📭 Напоминания: нет карточек на повторение")
+        return {"sent": 0, "retried": 0, "blocked": 0, "failed": 0}
+
+    send_queue = send_queue or TelegramSendQueue(rate_per_second=settings.TELEGRAM_SEND_RATE_PER_SECOND)
+    logger.info(
+        f"🔔 Напоминания: {len(due_counts)} пользователей, "
+        f"ожидаемое время ~{len(due_counts) / settings.TELEGRAM_SEND_RATE_PER_SECOND:.0f} с"
+    )
+    started = time.monotonic()
+    stats = await send_queue.send_all(
+        (telegram_id, format_reminder(count)) for telegram_id, count in due_counts
+    )
+    logger.info(f"✅ Напоминания отправлены за {time.monotonic() - started:.1f} с: {stats}")
+    return stats
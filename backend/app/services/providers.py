@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ленивая загрузка тяжелых SDK
+google.generativeai, deep_translator и aiogram импортируются при первом
+обращении, а не при старте воркера: импорт app.main не тянет их за собой.
+preload() догружает их в фоне после старта, чтобы первый запрос не ждал импорта.
+"""
+
+import importlib
+import logging
+from typing import Any, Dict
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL_NAME = "gemini-2.0-flash-lite"
+
+# Модули, которых не должно быть в sys.modules после import app.main
+# (проверяет benchmarks/bench_startup.py)
+LAZY_MODULES = (
+    "google.generativeai",
+    "aiogram",
+    "edge_tts",
+    "gtts",
+    "deep_translator",
+    "requests",
+    "aiohttp",
+)
+
+# Что догружать после старта: SDK, нужные первому запросу на создание карточки
+PRELOAD_MODULES = (
+    "google.generativeai",
+    "deep_translator",
+    "aiohttp",
+)
+
+_gemini_models: Dict[str, Any] = {}
+
+
+def get_gemini_model(model_name: str = GEMINI_MODEL_NAME) -> Any:
+    """Модель Gemini; SDK импортируется и настраивается один раз на процесс"""
+    model = _gemini_models.get(model_name)
+    if model is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=get_settings().GOOGLE_API_KEY)
+        model = genai.GenerativeModel(model_name)
+        _gemini_models[model_name] = model
+    return model
+
+
+def translate(text: str, source: str, target: str) -> str:
+    """Синхронный перевод через Google Translate (вызывать вне event loop)"""
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=source, target=target).translate(text)
+
+
+def preload() -> None:
+    """Импортирует SDK заранее (вызывается в потоке после старта воркера)"""
+    for module_name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить {module_name}: {e}")
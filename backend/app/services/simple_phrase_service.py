@@ -3,15 +3,14 @@ import logging
 import hashlib
 import json
 from typing import Optional
-import google.generativeai as genai
 
 from .utils import redis_client
+from ..timing import span
 from ..core.config import get_settings
+from .providers import get_gemini_model
 from .image_finder import find_image_via_api
 from .enrichment import download_and_save_image
 
-settings = get_settings()
-
 # Упрощенный промпт для генерации только одной фразы
 SIMPLE_PHRASE_PROMPT = """
 Your task is to help with language learning by creating a single phrase.
@@ -43,6 +42,7 @@ async def generate_simple_phrase_with_ai(phrase: str, keyword: str, language: st
     """
     
     # Проверяем, если это development режим с dummy ключом
+    settings = get_settings()
     if settings.GOOGLE_API_KEY == "dummy_key_for_dev" or settings.ENVIRONMENT == "development":
         logging.info(f"🔧 Development mode: returning mock data for phrase '{phrase}'")
         return {
@@ -70,13 +70,12 @@ async def generate_simple_phrase_with_ai(phrase: str, keyword: str, language: st
     
     # Если нет кэша — настройка модели
     try:
-        api_key = settings.GOOGLE_API_KEY
+        api_key = get_settings().GOOGLE_API_KEY
         if not api_key or api_key.strip() == "":
             logging.error("КРИТИЧЕСКАЯ ОШИБКА: Ключ GOOGLE_API_KEY пустой или не установлен!")
             return {"error": "AI сервис недоступен: не настроен API ключ"}
         
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
+        model = get_gemini_model()
         logging.info(f"Google AI модель успешно настроена для простой фразы '{phrase}'")
     except AttributeError:
         logging.error("КРИТИЧЕСКАЯ ОШИБКА: Ключ GOOGLE_API_KEY не найден в настройках!")
@@ -97,7 +96,8 @@ async def generate_simple_phrase_with_ai(phrase: str, keyword: str, language: st
     logging.info(f"Отправка простого AI-запроса для фразы '{phrase}' с ключевым словом '{keyword}'...")
 
     try:
-        response = await model.generate_content_async(prompt)
+        with span("ai"):
+            response = await model.generate_content_async(prompt)
         
         if not response or not response.text:
             logging.error(f"AI вернул пустой ответ для простой фразы '{phrase}'")
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Optional
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
@@ -8,10 +9,17 @@ from ..core.config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Инициализация бота
-bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+# Бот создается при первом обращении (сессия и проверка токена не нужны при импорте)
+_bot: Optional[Bot] = None
 dp = Dispatcher()
 
+def get_bot() -> Bot:
+    """Get shared Bot instance"""
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+    return _bot
+
 def get_start_instruction():
     """Get start instruction text"""
     return """
@@ -93,7 +101,10 @@ async def set_webhook():
     """Set webhook for the bot"""
     webhook_url = f"{settings.API_BASE_URL}/api/telegram/webhook"
     try:
-        await bot.set_webhook(webhook_url)
+        await get_bot().set_webhook(
+            webhook_url,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET
+        )
         logger.info(f"Webhook set to {webhook_url}")
     except Exception as e:
         logger.error(f"Failed to set webhook: {e}")
@@ -102,7 +113,7 @@ async def process_webhook_update(update_data: dict):
     """Process webhook update"""
     try:
         update = types.Update(**update_data)
-        await dp.feed_update(bot, update)
+        await dp.feed_update(get_bot(), update)
     except Exception as e:
         logger.error(f"Error processing webhook update: {e}")
         raise
\ No newline at end of file
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Очередь обновлений Telegram webhook
+Webhook только проверяет и ставит обновление в очередь, обработку в aiogram
+выполняет ограниченный пул обработчиков. Повторные доставки отбрасываются по update_id
+"""
+
+import asyncio
+import importlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .utils import redis_client
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+UPDATE_QUEUE_SIZE = 1000
+SEEN_UPDATES_LIMIT = 10000
+# Telegram повторяет доставку не дольше суток
+SEEN_UPDATE_TTL_SECONDS = 86400
+SEEN_KEY_PREFIX = "telegram:update"
+
+
+class TelegramUpdateQueue:
+    """
+    Прием обновлений с дедупликацией и фоновая обработка
+    """
+
+    def __init__(self, workers: int = 4, maxsize: int = UPDATE_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumers: List[asyncio.Task] = []
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+
+    def start(self) -> None:
+        """Запускает обработчики в текущем event loop (вызывается из lifespan)"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._consumers = [
+            asyncio.create_task(self._consume(index)) for index in range(self.workers)
+        ]
+        logger.info(f"📨 Очередь обновлений Telegram: {self.workers} обработчиков")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Дает обработчикам дообработать очередь и останавливает их"""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Необработанных обновлений Telegram при остановке: {self._queue.qsize()}")
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        self._queue = None
+
+    def _remember(self, update_id: int) -> bool:
+        """False, если update_id уже встречался в этом процессе"""
+        if update_id in self._seen:
+            self._seen.move_to_end(update_id)
+            return False
+        self._seen[update_id] = None
+        if len(self._seen) > SEEN_UPDATES_LIMIT:
+            self._seen.popitem(last=False)
+        return True
+
+    async def _is_new(self, update_id: int) -> bool:
+        if not self._remember(update_id):
+            return False
+        # Общий для всех воркеров признак; без Redis хватает LRU процесса
+        is_new = await redis_client.set_nx(f"{SEEN_KEY_PREFIX}:{update_id}", "1", ex=SEEN_UPDATE_TTL_SECONDS)
+        return is_new is not False
+
+    async def _forget(self, update_id: int) -> None:
+        self._seen.pop(update_id, None)
+        await redis_client.delete(f"{SEEN_KEY_PREFIX}:{update_id}")
+
+    async def enqueue(self, update_data: Dict[str, Any]) -> Optional[bool]:
+        """
+        Ставит обновление в очередь
+
+        Returns:
+            True - принято, False - повторная доставка, None - очередь переполнена
+        """
+        self.start()
+        update_id = update_data.get("update_id")
+        if isinstance(update_id, int) and not await self._is_new(update_id):
+            logger.info(f"🔁 Повторное обновление Telegram {update_id} пропущено")
+            return False
+
+        try:
+            self._queue.put_nowait(update_data)
+        except asyncio.QueueFull:
+            # Telegram доставит обновление повторно - его нельзя считать увиденным
+            if isinstance(update_id, int):
+                await self._forget(update_id)
+            logger.warning(f"⚠️ Очередь обновлений Telegram переполнена, {update_id} отклонено")
+            return None
+        return True
+
+    async def _consume(self, index: int) -> None:
+        # aiogram импортируется долго - модуль бота грузим в потоке, не блокируя event loop
+        telegram_bot = await asyncio.to_thread(importlib.import_module, "app.services.telegram_bot")
+
+        while True:
+            update_data = await self._queue.get()
+            try:
+                await telegram_bot.process_webhook_update(update_data)
+            except Exception as e:
+                logger.error(f"❌ Обработчик {index}: ошибка обновления {update_data.get('update_id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Создаем глобальный экземпляр очереди
+telegram_update_queue = TelegramUpdateQueue(workers=settings.TELEGRAM_UPDATE_WORKERS)
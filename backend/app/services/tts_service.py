@@ -1,48 +1,317 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-TTS Service (заглушка)
-Временный файл для совместимости с tts.py роутером
+TTS Service - единая точка входа для синтеза речи
+Выбирает движок (Edge TTS / Azure / gTTS) для языка и умеет генерировать
+аудио пачками с ограниченным параллелизмом
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+import time
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, AsyncIterator, Any
+
+from .gtts_service import gtts_service, AUDIO_DIR
+from .audio_utils import find_keyword_span, slice_mp3
+from .audio_transcoder import audio_transcoder
+from .media_eviction import media_access_recorder
+from ..timing import span
+
+# Импорт дополнительных TTS движков
+try:
+    from .edge_tts_service import edge_tts_service, EDGE_VOICE_MAPPING
+    EDGE_TTS_AVAILABLE = True
+except ImportError:
+    EDGE_TTS_AVAILABLE = False
+    edge_tts_service = None
+    EDGE_VOICE_MAPPING = {}
+    logging.warning("Edge TTS недоступен")
+
+try:
+    from .azure_tts_service import azure_tts_service
+    AZURE_TTS_AVAILABLE = True
+except ImportError:
+    AZURE_TTS_AVAILABLE = False
+    azure_tts_service = None
+    logging.warning("Azure TTS недоступен")
+
+# Языки, для которых Edge TTS звучит заметно лучше gTTS
+EDGE_PREFERRED_LANGUAGES = {'pl'}
+
+# Ограничения пакетной генерации: страница колоды (10 карточек) с фразой
+# и переводом помещается в один запрос
+MAX_BATCH_SIZE = 40
+# Сколько синтезов одновременно выполняется на процесс
+BATCH_CONCURRENCY = 4
+
+
+def batch_key(text: str, language_id: str) -> str:
+    """Ключ элемента пакета в ответе API"""
+    return f"{language_id}:{text}"
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - TTS_SERVICE - %(levelname)s - %(message)s')
 
 class TTSService:
     """
-    Заглушка для TTS сервиса
+    Фасад над TTS движками
     """
-    
-    def __init__(self):
-        self._available = False
-        logging.info("TTS сервис инициализирован (заглушка)")
-    
+
+    def __init__(self, max_concurrency: int = BATCH_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Синтезы в процессе: одинаковые (text, language_id) из параллельных запросов ждут один результат
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
     def is_available(self) -> bool:
-        """Проверка доступности сервиса"""
-        return self._available
-    
-    async def generate_audio(self, text: str, language_id: str, prefix: str = "tts") -> Optional[str]:
-        """Генерация аудио (заглушка)"""
-        logging.warning(f"TTS сервис недоступен для '{text[:30]}...' ({language_id})")
+        """Проверка доступности хотя бы одного движка"""
+        return bool(
+            gtts_service.is_available
+            or (EDGE_TTS_AVAILABLE and edge_tts_service and edge_tts_service.is_available)
+        )
+
+    def _edge_supports(self, language_id: str) -> bool:
+        return bool(
+            EDGE_TTS_AVAILABLE and edge_tts_service and edge_tts_service.is_available
+            and edge_tts_service.is_language_supported(language_id)
+        )
+
+    def _gtts_language(self, language_id: str) -> Optional[str]:
+        """Код языка для gTTS (pt-BR -> pt) или None, если gTTS его не знает"""
+        for candidate in (language_id, language_id.split('-')[0]):
+            if gtts_service.is_language_supported(candidate):
+                return candidate
         return None
-    
+
+    def _engine_chain(self, language_id: str) -> List[Tuple[str, object, str]]:
+        """
+        Порядок движков для языка: (имя, сервис, код языка для сервиса)
+        """
+        chain = []
+        base_lang = language_id.split('-')[0]
+
+        if base_lang in EDGE_PREFERRED_LANGUAGES and self._edge_supports(language_id):
+            chain.append(('edge', edge_tts_service, language_id))
+
+        if AZURE_TTS_AVAILABLE and azure_tts_service and azure_tts_service.is_available():
+            chain.append(('azure', azure_tts_service, language_id))
+
+        gtts_lang = self._gtts_language(language_id)
+        if gtts_service.is_available and gtts_lang:
+            chain.append(('gtts', gtts_service, gtts_lang))
+
+        # Последний шанс для языков, которых нет в gTTS
+        if not any(name == 'edge' for name, _, _ in chain) and self._edge_supports(language_id):
+            chain.append(('edge', edge_tts_service, language_id))
+
+        return chain
+
+    async def _synthesize(self, text: str, language_id: str, prefix: str) -> Optional[str]:
+        """Проходит по цепочке движков до первого успешного результата"""
+        for engine_name, engine, engine_lang in self._engine_chain(language_id):
+            try:
+                with span(f"tts-{engine_name}"):
+                    audio_path = await engine.generate_audio(text, engine_lang, prefix)
+            except Exception as e:
+                logging.warning(f"⚠️ TTS движок {engine_name} упал для '{text[:30]}...' ({language_id}): {e}")
+                continue
+            if audio_path:
+                return audio_path
+            logging.warning(f"⚠️ TTS движок {engine_name} не вернул аудио для '{text[:30]}...' ({language_id})")
+
+        logging.error(f"❌ Ни один TTS движок не смог озвучить '{text[:30]}...' ({language_id})")
+        return None
+
+    async def generate_audio(self, text: str, language_id: str, prefix: str = "tts") -> Optional[str]:
+        """
+        Генерация аудио для текста
+
+        Args:
+            text: Текст для озвучки
+            language_id: Код языка (ISO 639-1, допускается регион: pt-BR)
+            prefix: Префикс для имени файла
+
+        Returns:
+            Относительный путь вида "assets/audio/<file>.mp3" или None при ошибке
+        """
+        key = (text, language_id)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        audio_path = None
+        try:
+            async with self._semaphore:
+                audio_path = await self._synthesize(text, language_id, prefix)
+        except Exception as e:
+            logging.error(f"Ошибка генерации аудио: {e}")
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(audio_path)
+
+        # Повторная выдача из кэша тоже продлевает жизнь файла
+        media_access_recorder.record("audio", audio_path)
+        # Компактный Opus вариант для медленных сетей готовим в фоне
+        audio_transcoder.schedule_opus_variant(audio_path)
+        return audio_path
+
+    def get_word_timings(self, audio_path: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Тайминги слов для аудио (есть только у Edge TTS)"""
+        if not audio_path or not edge_tts_service:
+            return None
+        return edge_tts_service.get_word_timings(audio_path)
+
+    def _slice_keyword_clip(self, phrase_audio_path: str, keyword: str, bounds: Dict[str, float]) -> Optional[str]:
+        """Сохраняет фрагмент аудио фразы с ключевым словом отдельным файлом (блокирующий ввод-вывод)"""
+        phrase_file = AUDIO_DIR / Path(phrase_audio_path).name
+        keyword_hash = hashlib.md5(keyword.encode()).hexdigest()[:8]
+        filename = f"{phrase_file.stem}_kw_{keyword_hash}.mp3"
+        file_path = AUDIO_DIR / filename
+        if file_path.exists():
+            return f"assets/audio/{filename}"
+
+        try:
+            clip = slice_mp3(phrase_file.read_bytes(), bounds['start_ms'], bounds['end_ms'])
+        except OSError as e:
+            logging.warning(f"Не удалось прочитать аудио фразы {phrase_file.name}: {e}")
+            return None
+        if not clip:
+            return None
+
+        tmp_path = file_path.with_suffix('.part')
+        tmp_path.write_bytes(clip)
+        tmp_path.replace(file_path)
+        return f"assets/audio/{filename}"
+
+    async def generate_phrase_with_keyword(self, phrase: str, keyword: str, language_id: str) -> Dict[str, Any]:
+        """
+        Озвучивает фразу и берет аудио ключевого слова из нее же
+
+        Если движок вернул тайминги слов (Edge TTS), ключевое слово вырезается
+        из аудио фразы без отдельного синтеза. Иначе ключевое слово озвучивается
+        отдельно, как раньше.
+
+        Returns:
+            {
+                "phrase_audio_path", "keyword_audio_path",
+                "keyword_audio_range": {"start_ms", "end_ms"} или None,
+                "phrase_word_timings": список таймингов или None
+            }
+        """
+        chain = self._engine_chain(language_id)
+        if not chain or chain[0][0] != 'edge':
+            # Движок без таймингов - озвучиваем фразу и слово параллельно, как раньше
+            phrase_audio_path, keyword_audio_path = await asyncio.gather(
+                self.generate_audio(phrase, language_id, "phrase"),
+                self.generate_audio(keyword, language_id, "keyword"),
+            )
+            return {
+                "phrase_audio_path": phrase_audio_path,
+                "keyword_audio_path": keyword_audio_path,
+                "keyword_audio_range": None,
+                "phrase_word_timings": None,
+            }
+
+        phrase_audio_path = await self.generate_audio(phrase, language_id, "phrase")
+        word_timings = self.get_word_timings(phrase_audio_path)
+        keyword_range = find_keyword_span(word_timings, keyword) if word_timings else None
+
+        keyword_audio_path = None
+        if keyword_range:
+            keyword_audio_path = await asyncio.to_thread(
+                self._slice_keyword_clip, phrase_audio_path, keyword, keyword_range
+            )
+            audio_transcoder.schedule_opus_variant(keyword_audio_path)
+        if not keyword_audio_path:
+            keyword_range = None
+            keyword_audio_path = await self.generate_audio(keyword, language_id, "keyword")
+
+        return {
+            "phrase_audio_path": phrase_audio_path,
+            "keyword_audio_path": keyword_audio_path,
+            "keyword_audio_range": keyword_range,
+            "phrase_word_timings": word_timings,
+        }
+
+    async def iter_batch_audio(
+        self,
+        texts_and_langs: List[Tuple[str, str]],
+        prefix: str = "tts"
+    ) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        """
+        Генерирует аудио для пачки текстов и отдает результаты по мере готовности
+
+        Одинаковые пары (text, language_id) синтезируются один раз.
+
+        Yields:
+            Кортежи (text, language_id, audio_path)
+        """
+        unique_items = list(dict.fromkeys((text, lang) for text, lang in texts_and_langs))
+
+        async def run(text: str, lang: str) -> Tuple[str, str, Optional[str]]:
+            return text, lang, await self.generate_audio(text, lang, prefix)
+
+        tasks = [asyncio.create_task(run(text, lang)) for text, lang in unique_items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Клиент отключился или генератор закрыт - не тратим синтез впустую
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def generate_batch_audio(
+        self,
+        texts_and_langs: List[Tuple[str, str]],
+        prefix: str = "tts"
+    ) -> Dict[str, Optional[str]]:
+        """
+        Генерирует аудио для пачки текстов
+
+        Returns:
+            Словарь {batch_key(text, language_id): audio_path или None}
+        """
+        started = time.perf_counter()
+        results = {}
+        async for text, lang, audio_path in self.iter_batch_audio(texts_and_langs, prefix):
+            results[batch_key(text, lang)] = audio_path
+
+        logging.info(
+            f"Пакетная генерация TTS: {len(results)} уникальных из {len(texts_and_langs)} "
+            f"за {time.perf_counter() - started:.2f}s"
+        )
+        return results
+
     def get_service_info(self) -> dict:
         """Информация о сервисе"""
         return {
             'service': 'TTS Service',
-            'available': False,
-            'status': 'Not implemented (stub)'
+            'available': self.is_available(),
+            'engines': {
+                'edge': edge_tts_service.get_service_info() if edge_tts_service else None,
+                'gtts': gtts_service.get_service_info(),
+            },
+            'edge_preferred_languages': sorted(EDGE_PREFERRED_LANGUAGES),
+            'max_batch_size': MAX_BATCH_SIZE,
+            'batch_concurrency': BATCH_CONCURRENCY,
         }
-    
-    def get_supported_languages(self) -> list:
-        """Получение списка поддерживаемых языков"""
-        return []
-    
+
+    def get_supported_languages(self) -> Dict[str, str]:
+        """Получение поддерживаемых языков {код: название}"""
+        languages = dict(gtts_service.get_supported_languages())
+        if EDGE_TTS_AVAILABLE and edge_tts_service and edge_tts_service.is_available:
+            for lang_code, config in EDGE_VOICE_MAPPING.items():
+                languages.setdefault(lang_code, config['language'])
+        return languages
+
     def get_voices_for_language(self, language_code: str) -> list:
-        """Получение голосов для языка"""
-        return []
+        """Получение голосов Edge TTS для языка"""
+        if not self._edge_supports(language_code):
+            return []
+        config = edge_tts_service._get_voice_config(language_code)
+        return [config['voice'], *config.get('backup_voices', [])]
 
 # Создаем глобальный экземпляр сервиса
 tts_service = TTSService()
@@ -56,4 +325,4 @@ def get_available_voices(language_code: str = None) -> list:
     """Получение доступных голосов"""
     if language_code:
         return tts_service.get_voices_for_language(language_code)
-    return tts_service.get_supported_languages()
\ No newline at end of file
+    return list(tts_service.get_supported_languages())
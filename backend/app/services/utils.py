@@ -1,9 +1,14 @@
+import os
+import time
 import redis.asyncio as aioredis
 from app.core.config import get_settings
+from app.timing import span
+from app.monitoring import metrics_collector
 import logging
-from typing import Optional
+from typing import Any, List, Optional
 
-settings = get_settings()
+# Пауза перед повторной попыткой подключения после ошибки
+RECONNECT_INTERVAL_SECONDS = 30
 
 class RedisClient:
     """Wrapper для Redis клиента с обработкой ошибок подключения"""
@@ -11,25 +16,43 @@ class RedisClient:
     def __init__(self):
         self._client: Optional[aioredis.Redis] = None
         self._connection_failed = False
+        self._retry_at = 0.0
+        self._pid = os.getpid()
         
     async def _get_client(self) -> Optional[aioredis.Redis]:
         """Получить Redis клиент с проверкой подключения"""
+        # После fork соединения родителя использовать нельзя - каждый воркер подключается сам
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._client = None
+            self._connection_failed = False
+        
         if self._connection_failed:
-            return None
+            if time.monotonic() < self._retry_at:
+                return None
+            self._connection_failed = False
             
         if self._client is None:
             try:
-                self._client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+                self._client = aioredis.from_url(get_settings().REDIS_URL, decode_responses=True)
                 # Проверяем подключение
                 await self._client.ping()
                 logging.info("Redis connection established successfully")
             except Exception as e:
                 logging.warning(f"Redis connection failed, proceeding without cache: {e}")
                 self._connection_failed = True
+                self._retry_at = time.monotonic() + RECONNECT_INTERVAL_SECONDS
                 self._client = None
                 
         return self._client
     
+    def connection_count(self) -> int:
+        """Открытые соединения пула Redis этого процесса"""
+        if self._client is None or self._pid != os.getpid():
+            return 0
+        pool = self._client.connection_pool
+        return len(getattr(pool, "_available_connections", ())) + len(getattr(pool, "_in_use_connections", ()))
+    
     async def get(self, key: str) -> Optional[str]:
         """Получить значение из Redis с обработкой ошибок"""
         client = await self._get_client()
@@ -37,7 +60,10 @@ class RedisClient:
             return None
             
         try:
-            return await client.get(key)
+            with span("cache"):
+                value = await client.get(key)
+            metrics_collector.record_cache_operation("get", hit=value is not None)
+            return value
         except Exception as e:
             logging.warning(f"Redis GET failed for key {key}: {e}")
             return None
@@ -49,11 +75,57 @@ class RedisClient:
             return False
             
         try:
-            await client.set(key, value, ex=ex)
+            with span("cache"):
+                await client.set(key, value, ex=ex)
             return True
         except Exception as e:
             logging.warning(f"Redis SET failed for key {key}: {e}")
             return False
 
+    async def delete(self, key: str) -> bool:
+        """Удалить ключ из Redis с обработкой ошибок"""
+        client = await self._get_client()
+        if client is None:
+            return False
+            
+        try:
+            with span("cache"):
+                await client.delete(key)
+            return True
+        except Exception as e:
+            logging.warning(f"Redis DELETE failed for key {key}: {e}")
+            return False
+    
+    async def set_nx(self, key: str, value: str, ex: Optional[int] = None) -> Optional[bool]:
+        """
+        Установить значение, только если ключа нет (SET NX)
+        
+        Returns:
+            True - ключ установлен, False - ключ уже есть, None - Redis недоступен
+        """
+        client = await self._get_client()
+        if client is None:
+            return None
+            
+        try:
+            with span("redis"):
+                return bool(await client.set(key, value, ex=ex, nx=True))
+        except Exception as e:
+            logging.warning(f"Redis SET NX failed for key {key}: {e}")
+            return None
+    
+    async def eval(self, script: str, keys: List[str], args: List[Any]) -> Optional[Any]:
+        """Выполнить Lua скрипт (None, если Redis недоступен)"""
+        client = await self._get_client()
+        if client is None:
+            return None
+            
+        try:
+            with span("redis"):
+                return await client.eval(script, len(keys), *keys, *args)
+        except Exception as e:
+            logging.warning(f"Redis EVAL failed for keys {keys}: {e}")
+            return None
+
 # Создаем глобальный экземпляр
 redis_client = RedisClient()
\ No newline at end of file
@@ -0,0 +1,154 @@
+# backend/app/slow_queries.py
+"""
+Журнал медленных SQL запросов с планами выполнения.
+
+События SQLAlchemy (monitoring.instrument_engine) передают сюда каждый
+запрос дольше SLOW_QUERY_THRESHOLD_MS. Запрос сводится к отпечатку
+(литералы и параметры заменены на ?), статистика копится в
+MetricsCollector по отпечатку и попадает в сводку всех воркеров.
+
+План снимается вне запроса пользователя: отдельный поток повторяет
+запрос под EXPLAIN (ANALYZE, BUFFERS) в PostgreSQL или EXPLAIN QUERY PLAN
+в SQLite в своем соединении и откатывает транзакцию. Один отпечаток
+объясняется не чаще раза в EXPLAIN_INTERVAL_SECONDS.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .core.config import get_settings
+from .monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_INTERVAL_SECONDS = 600
+EXPLAIN_QUEUE_SIZE = 50
+EXPLAIN_TIMEOUT_MS = 5000
+# Сколько отпечатков помнить для ограничения частоты EXPLAIN
+EXPLAIN_TRACKED_FINGERPRINTS = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Служебные запросы самого журнала не учитываются
+_SKIPPED_PREFIXES = ("EXPLAIN", "SET ")
+
+
+def fingerprint_sql(statement: str) -> str:
+    """
+    Нормализованный SQL: литералы и параметры заменены на ?, списки IN
+    любой длины совпадают, пробелы схлопнуты.
+    """
+    fingerprint = _STRING_LITERAL.sub("?", statement)
+    fingerprint = _BIND_PARAMETER.sub("?", fingerprint)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _VALUE_LIST.sub("(?+)", fingerprint)
+    return _WHITESPACE.sub(" ", fingerprint).strip()
+
+
+def explain_statement(engine, statement: str, parameters: Any) -> Optional[str]:
+    """
+    План запроса в отдельном соединении (транзакция всегда откатывается).
+
+    Returns:
+        Optional[str]: Текст плана или None для неподдерживаемой СУБД
+    """
+    dialect = engine.dialect.name
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if dialect == "postgresql":
+        # ANALYZE выполняет запрос - для изменений данных только план
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if verb in ("SELECT", "WITH") else "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            if dialect == "postgresql":
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            rows = connection.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+        finally:
+            transaction.rollback()
+
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return "\n".join(str(row[-1]) for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+class SlowQueryLog:
+    """
+    Прием медленных запросов из событий движка и фоновый EXPLAIN.
+    """
+
+    def __init__(self, explain_interval: float = EXPLAIN_INTERVAL_SECONDS):
+        self.explain_interval = explain_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._last_explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def threshold_seconds(self) -> float:
+        return get_settings().SLOW_QUERY_THRESHOLD_MS / 1000
+
+    def record(self, engine, statement: str, parameters: Any, duration: float,
+               executemany: bool = False) -> None:
+        """Вызывается после каждого запроса; дешево, если запрос быстрый"""
+        if duration < self.threshold_seconds:
+            return
+        if statement.lstrip().upper().startswith(_SKIPPED_PREFIXES):
+            return
+
+        fingerprint = fingerprint_sql(statement)
+        metrics_collector.record_slow_query(fingerprint, statement, duration)
+
+        if executemany or not get_settings().SLOW_QUERY_EXPLAIN or not self._should_explain(fingerprint):
+            return
+        try:
+            self._queue.put_nowait((engine, fingerprint, statement, parameters))
+        except queue.Full:
+            return
+        self._ensure_thread()
+
+    def _should_explain(self, fingerprint: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(fingerprint)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            if len(self._last_explained) >= EXPLAIN_TRACKED_FINGERPRINTS:
+                self._last_explained.clear()
+            self._last_explained[fingerprint] = now
+            return True
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            engine, fingerprint, statement, parameters = self._queue.get()
+            try:
+                plan = explain_statement(engine, statement, parameters)
+                if plan:
+                    metrics_collector.attach_query_plan(fingerprint, plan)
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось получить план медленного запроса: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Журнал медленных запросов текущего процесса
+slow_query_log = SlowQueryLog()
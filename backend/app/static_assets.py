@@ -0,0 +1,236 @@
+# backend/app/static_assets.py
+"""
+Индекс статических файлов frontend в памяти.
+
+При старте дерево frontend/ читается один раз: для каждого файла хранятся
+тело, gzip/brotli варианты и сильный ETag. Запрос к статике превращается
+в поиск по словарю, повторные загрузки отвечают 304 Not Modified.
+Сгенерированные медиа (аудио, картинки) в индекс не попадают и
+отдаются с диска.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .responses import etag_matches
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+
+# Сгенерированные медиа меняются во время работы и вытесняются по бюджету
+EXCLUDED_DIRS = ("assets/audio", "assets/images")
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "text/javascript",
+    "application/json",
+    "application/manifest+json",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+}
+MIN_COMPRESS_SIZE = 512
+
+# Имена с хешем содержимого: app.3f9a1c2b.js
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[a-z0-9]+$")
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+CACHE_DEFAULT = "public, max-age=86400"
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """Файл frontend в памяти со сжатыми вариантами"""
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+
+def _is_compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def _cache_control(relative_path: str, media_type: str) -> str:
+    if HASHED_NAME.search(relative_path):
+        return CACHE_IMMUTABLE
+    # HTML и нехешированные скрипты проверяются при каждой загрузке (дешево благодаря 304)
+    if media_type == "text/html" or relative_path.endswith((".js", ".css")):
+        return CACHE_REVALIDATE
+    return CACHE_DEFAULT
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Разбирает Accept-Encoding в {кодировка: q}"""
+    encodings = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        param_name, _, value = params.strip().partition("=")
+        if param_name == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip()] = quality
+    return encodings
+
+
+def load_asset(file_path: Path, relative_path: str) -> StaticAsset:
+    """Читает файл и готовит его сжатые варианты"""
+    body = file_path.read_bytes()
+    media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    digest = hashlib.sha256(body).hexdigest()[:20]
+
+    gzip_body = br_body = None
+    if _is_compressible(media_type) and len(body) >= MIN_COMPRESS_SIZE:
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            gzip_body = compressed
+        if BROTLI_AVAILABLE:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                br_body = compressed
+
+    return StaticAsset(
+        body=body,
+        media_type=media_type,
+        etag=f'"{digest}"',
+        cache_control=_cache_control(relative_path, media_type),
+        gzip_body=gzip_body,
+        br_body=br_body,
+    )
+
+
+class StaticAssetIndex:
+    """
+    Неизменяемый индекс статических файлов
+    """
+
+    def __init__(self, root: Path = FRONTEND_DIR):
+        self.root = root
+        self._assets: Optional[Dict[str, StaticAsset]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, StaticAsset]:
+        """Читает дерево frontend/ (повторный вызов перечитывает его)"""
+        assets = {}
+        raw_bytes = compressed_bytes = 0
+        if self.root.exists():
+            for file_path in sorted(self.root.rglob("*")):
+                relative_path = file_path.relative_to(self.root).as_posix()
+                if not file_path.is_file() or relative_path.startswith(EXCLUDED_DIRS):
+                    continue
+                # Служебные файлы (.media_access.json, .part и т.п.) не раздаются
+                if any(part.startswith(".") for part in file_path.relative_to(self.root).parts):
+                    continue
+                try:
+                    asset = load_asset(file_path, relative_path)
+                except OSError as e:
+                    logger.warning(f"⚠️ Не удалось загрузить {relative_path}: {e}")
+                    continue
+                assets[relative_path] = asset
+                raw_bytes += len(asset.body)
+                compressed_bytes += len(asset.br_body or asset.gzip_body or asset.body)
+
+        # Собранный index.html ссылается на хешированные скрипты (см. asset_fingerprint)
+        if "dist/index.html" in assets:
+            assets["index.html"] = assets["dist/index.html"]
+
+        self._assets = assets
+        logger.info(
+            f"📦 Статика в памяти: {len(assets)} файлов, "
+            f"{raw_bytes // 1024} KB ({compressed_bytes // 1024} KB сжато)"
+        )
+        return assets
+
+    def _get_assets(self) -> Dict[str, StaticAsset]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self.load()
+        return self._assets
+
+    def get(self, relative_path: str) -> Optional[StaticAsset]:
+        return self._get_assets().get(relative_path.lstrip("/"))
+
+    def build_response(self, asset: StaticAsset, request: Request) -> Response:
+        """
+        Ответ с учетом Accept-Encoding и If-None-Match
+
+        У каждой кодировки свой сильный ETag, как требует RFC 9110.
+        """
+        encodings = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        body, encoding, etag = asset.body, None, asset.etag
+        if asset.br_body is not None and encodings.get("br", 0) > 0:
+            body, encoding, etag = asset.br_body, "br", f'{asset.etag[:-1]}-br"'
+        elif asset.gzip_body is not None and encodings.get("gzip", 0) > 0:
+            body, encoding, etag = asset.gzip_body, "gzip", f'{asset.etag[:-1]}-gz"'
+
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.gzip_body is not None or asset.br_body is not None:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, (etag,)):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    def respond(self, relative_path: str, request: Request) -> Optional[Response]:
+        """Ответ для файла из индекса или None, если файла нет"""
+        asset = self.get(relative_path)
+        if asset is None:
+            return None
+        return self.build_response(asset, request)
+
+
+class StaticAssetApp:
+    """
+    ASGI приложение для /static: файлы из индекса, остальное - fallback (StaticFiles)
+    """
+
+    def __init__(self, index: StaticAssetIndex, fallback: ASGIApp):
+        self.index = index
+        self.fallback = fallback
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            path, root_path = scope["path"], scope.get("root_path", "")
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            response = self.index.respond(path, Request(scope, receive))
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await self.fallback(scope, receive, send)
+
+
+# Глобальный индекс статики
+static_assets = StaticAssetIndex()
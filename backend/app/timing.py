@@ -0,0 +1,133 @@
+# backend/app/timing.py
+"""
+Разбивка времени запроса по этапам (БД, кэш, AI, TTS, картинки).
+
+RequestLoggingMiddleware открывает контекст на каждый запрос, сервисы
+записывают в него интервалы через span() или @timed(). Контекст живет
+в contextvars, поэтому интервалы из asyncio.gather, to_thread и sync
+эндпоинтов в threadpool попадают в свой запрос. Итог отдается
+заголовком Server-Timing и строкой лога с request id.
+
+Вне запроса (планировщик, бот) span() ничего не записывает.
+"""
+
+import functools
+import inspect
+import json
+import re
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional
+
+_current_timing: ContextVar[Optional["RequestTiming"]] = ContextVar("request_timing", default=None)
+
+# Имя метрики Server-Timing - token из RFC 9110
+_METRIC_NAME = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+
+class RequestTiming:
+    """Интервалы одного запроса: {имя: [суммарно мс, количество]}"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        totals = self.spans.get(name)
+        if totals is None:
+            self.spans[name] = [duration_ms, 1]
+        else:
+            totals[0] += duration_ms
+            totals[1] += 1
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing (параллельные интервалы суммируются по имени)"""
+        metrics = [
+            f'{_METRIC_NAME.sub("-", name)};dur={duration:.1f};desc="x{int(count)}"'
+            for name, (duration, count) in self.spans.items()
+        ]
+        metrics.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(metrics)
+
+    def as_log_record(self, **fields: Any) -> str:
+        """Структурированная строка лога (JSON) для поиска по request id"""
+        return json.dumps({
+            "request_id": self.request_id,
+            **fields,
+            "total_ms": round(self.total_ms(), 1),
+            "spans": {
+                name: {"ms": round(duration, 1), "count": int(count)}
+                for name, (duration, count) in self.spans.items()
+            },
+        }, ensure_ascii=False)
+
+
+def start_request_timing(request_id: str) -> Token:
+    """Открывает контекст запроса; вернуть токен в finish_request_timing"""
+    return _current_timing.set(RequestTiming(request_id))
+
+
+def finish_request_timing(token: Token) -> None:
+    _current_timing.reset(token)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current_timing.get()
+
+
+def record_span(name: str, duration_seconds: float) -> None:
+    """Записывает готовый интервал в текущий запрос"""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add(name, duration_seconds * 1000)
+
+
+class span:
+    """
+    Интервал этапа: with span("ai"): ... или async with span("ai"): ...
+    """
+
+    __slots__ = ("name", "timing", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timing = None
+        self.started = 0.0
+
+    def __enter__(self) -> "span":
+        self.timing = _current_timing.get()
+        if self.timing is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.timing is not None:
+            self.timing.add(self.name, (time.perf_counter() - self.started) * 1000)
+
+    async def __aenter__(self) -> "span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.__exit__(exc_type, exc_value, traceback)
+
+
+def timed(name: str) -> Callable:
+    """Декоратор: весь вызов функции (sync или async) - один интервал"""
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
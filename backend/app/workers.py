@@ -0,0 +1,191 @@
+# backend/app/workers.py
+"""
+Координация процессов при запуске в несколько воркеров (gunicorn + uvicorn).
+
+Каждый воркер - отдельный процесс со своей памятью. Задачи, которые
+должны выполняться один раз на весь сервис (регистрация webhook,
+планировщик), запускает только лидер. Лидер выбирается блокировкой:
+локальный flock для воркеров одного контейнера и, если Redis доступен,
+ключ в Redis для нескольких контейнеров. Лидерство переходит к другому
+воркеру, если процесс лидера завершился.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import socket
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Общий каталог воркеров одного контейнера: блокировка лидера и снимки метрик
+WORKER_STATE_DIR = Path(os.getenv("WORKER_STATE_DIR", "/tmp/phraseweaver"))
+METRICS_SNAPSHOT_DIR = WORKER_STATE_DIR / "metrics"
+
+# gunicorn собирает ассеты в master до fork, воркерам это делать не нужно
+ASSETS_BUILT_ENV = "PHRASEWEAVER_ASSETS_BUILT"
+
+WORKER_SYNC_INTERVAL_SECONDS = 10
+
+LEADER_KEY = "phraseweaver:leader"
+LEADER_TTL_SECONDS = 30
+
+# Продление только своей блокировки (значение ключа - токен владельца)
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Выбор одного воркера-лидера для фоновых задач.
+
+    Сначала берется flock на файл в WORKER_STATE_DIR (его получает ровно
+    один процесс контейнера, ОС снимает блокировку при смерти процесса),
+    затем ключ SET NX в Redis с TTL. Без Redis достаточно flock.
+    Остальные воркеры периодически пробуют стать лидером.
+    """
+
+    def __init__(self, key: str = LEADER_KEY, ttl: int = LEADER_TTL_SECONDS,
+                 lock_path: Optional[Path] = None):
+        self.key = key
+        self.ttl = ttl
+        self.lock_path = lock_path or WORKER_STATE_DIR / "leader.lock"
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._lock_fd: Optional[int] = None
+        self._redis_locked = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _acquire_file_lock(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    def _release_file_lock(self) -> None:
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _hold_redis_lock(self) -> bool:
+        """Берет или продлевает ключ в Redis. True и без Redis (хватает flock)"""
+        from .services.utils import redis_client
+
+        if self._redis_locked:
+            renewed = await redis_client.eval(_RENEW_SCRIPT, [self.key], [self.token, self.ttl])
+            if renewed is None:
+                # Redis пропал: внутри контейнера лидер по-прежнему единственный
+                return True
+            self._redis_locked = bool(renewed)
+            return self._redis_locked
+
+        acquired = await redis_client.set_nx(self.key, self.token, ex=self.ttl)
+        if acquired:
+            self._redis_locked = True
+            return True
+        # False - ключ держит другой контейнер, None - Redis недоступен
+        return acquired is None
+
+    async def try_acquire(self) -> bool:
+        """Один шаг выборов: True, если этот воркер сейчас лидер"""
+        if not self._acquire_file_lock():
+            return False
+        if await self._hold_redis_lock():
+            return True
+        self._release_file_lock()
+        return False
+
+    async def _run(self, on_elected: Callable[[], Awaitable[None]],
+                   on_demoted: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            try:
+                leader = await self.try_acquire()
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка выборов лидера: {e}")
+                leader = self.is_leader
+
+            try:
+                if leader and not self.is_leader:
+                    self.is_leader = True
+                    logger.info(f"👑 Воркер {os.getpid()} стал лидером")
+                    await on_elected()
+                elif not leader and self.is_leader:
+                    self.is_leader = False
+                    logger.warning(f"⚠️ Воркер {os.getpid()} потерял лидерство")
+                    await on_demoted()
+            except Exception as e:
+                logger.error(f"❌ Ошибка смены лидерства: {e}")
+
+            await asyncio.sleep(self.ttl / 3)
+
+    def start(self, on_elected: Callable[[], Awaitable[None]],
+              on_demoted: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        """Запускает цикл выборов в фоне (вызывается из lifespan воркера)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(on_elected, on_demoted))
+        return self._task
+
+    async def stop(self) -> None:
+        """Останавливает цикл и отдает лидерство"""
+        from .services.utils import redis_client
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis_locked:
+            await redis_client.eval(_RELEASE_SCRIPT, [self.key], [self.token])
+            self._redis_locked = False
+        self._release_file_lock()
+        self.is_leader = False
+
+
+async def run_worker_sync(interval: float = WORKER_SYNC_INTERVAL_SECONDS) -> None:
+    """
+    Периодически выгружает состояние воркера в общий каталог:
+    снимок метрик (для сводки по всем воркерам) и обращения к медиа
+    (их учитывает вытеснение, которое запускает лидер). Заодно перечитывает
+    общий переключатель выборки профилирования.
+    """
+    from .monitoring import metrics_collector
+    from .profiling import profiling_sampler
+    from .services.media_eviction import media_access_recorder
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(metrics_collector.write_snapshot, METRICS_SNAPSHOT_DIR)
+            await asyncio.to_thread(media_access_recorder.flush_pending)
+            await asyncio.to_thread(profiling_sampler.refresh)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось выгрузить состояние воркера: {e}")
+
+
+# Выборы лидера текущего процесса
+leader_election = LeaderElection()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк стоимости логирования на запрос
+
+Пишет типичный для создания карточки набор записей: две строки лога
+запроса (api.requests), несколько строк сервисов и дамп ответа Gemini
+(~3 КБ) в app.payload. Сравнивает время в потоке запроса:
+- обработчики вызываются синхронно (как до очереди);
+- QueueHandler + QueueListener из setup_logging();
+- то же с выборкой дампов по умолчанию (LOG_PAYLOAD_SAMPLE_RATE).
+Между запросами пауза --interval-us (воркер не пишет логи непрерывно);
+для очереди отдельно печатается время, за которое слушатель дописал хвост.
+
+Файлы логов пишутся во временный каталог, консоль - в /dev/null.
+
+Запуск из backend/:
+    python -m benchmarks.bench_logging --requests 5000 --interval-us 500
+"""
+
+import argparse
+import json
+import logging
+import logging.config
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from app import logging_config
+from app.logging_config import PAYLOAD_LOGGER, get_logging_config, setup_logging, stop_logging
+
+RAW_RESPONSE = json.dumps({
+    "image_query": "coffee cup",
+    "original_phrase": {"original": "Poproszę <b>kawę</b>", "translation": "Кофе, пожалуйста", "gap_fill": "Poproszę ____"},
+    "additional_examples": [
+        {"original": f"Pijemy <b>kawę</b> {index}", "translation": f"Мы пьем кофе {index}", "gap_fill": "Pijemy ____"}
+        for index in range(30)
+    ],
+}, ensure_ascii=False)
+
+request_logger = logging.getLogger("api.requests")
+service_logger = logging.getLogger("app.services.enrichment")
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+
+
+def log_request(index: int) -> None:
+    """Записи одного запроса на создание карточки"""
+    request_logger.info(f"[{index:08x}] POST /api/cards/enrich - Client: 127.0.0.1 - User-Agent: bench")
+    service_logger.info(f"--- НАЧАЛО ОБОГАЩЕНИЯ для фразы 'Poproszę kawę' ({index}) ---")
+    payload_logger.info("📄 RAW JSON Gemini для '%s' (%d символов): %s", "Poproszę kawę", len(RAW_RESPONSE), RAW_RESPONSE)
+    service_logger.info("🎉 AI успешно сгенерировал данные для 'Poproszę kawę'.")
+    service_logger.info(f"--- ОБОГАЩЕНИЕ ЗАВЕРШЕНО для 'Poproszę kawę' ({index}) ---")
+    request_logger.info(f"[{index:08x}] Response: 200 - Time: 0.842s")
+
+
+def configure(variant: str) -> None:
+    stop_logging()
+    os.environ["LOG_PAYLOAD_SAMPLE_RATE"] = "0.01" if variant == "sampled" else "1"
+    if variant == "sync":
+        os.makedirs("logs", exist_ok=True)
+        logging.config.dictConfig(get_logging_config())
+    else:
+        setup_logging()
+
+
+def measure(variant: str, requests: int, interval: float) -> Dict[str, float]:
+    configure(variant)
+    for index in range(200):  # прогрев: открытие файлов, кэш маршрутов
+        log_request(index)
+    timings: List[float] = []
+    for index in range(requests):
+        started = time.perf_counter()
+        log_request(index)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+        if interval:
+            time.sleep(interval)
+
+    started = time.perf_counter()
+    dropped = logging_config.queue_handler.dropped if variant != "sync" and logging_config.queue_handler else 0
+    stop_logging()
+    drain_ms = (time.perf_counter() - started) * 1000
+    timings.sort()
+    return {
+        "median": statistics.median(timings),
+        "p99": timings[int(len(timings) * 0.99) - 1],
+        "drain_ms": drain_ms if variant != "sync" else 0.0,
+        "dropped": dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Запросов на каждый вариант")
+    parser.add_argument("--interval-us", type=float, default=500, help="Пауза между запросами, 0 - подряд")
+    args = parser.parse_args()
+
+    results = {}
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        sys.stdout = devnull
+        try:
+            for variant in ("sync", "queue", "sampled"):
+                results[variant] = measure(variant, args.requests, args.interval_us / 1_000_000)
+        finally:
+            logging.config.dictConfig({"version": 1, "disable_existing_loggers": False})
+            sys.stdout = stdout
+            os.chdir(cwd)
+
+    names = {
+        "sync": "синхронные обработчики",
+        "queue": "очередь (QueueListener)",
+        "sampled": "очередь + выборка дампов",
+    }
+    baseline = results["sync"]["median"]
+    for variant, result in results.items():
+        line = f"{names[variant]:<32} {result['median']:8.1f} us/запрос  p99 {result['p99']:8.1f} us"
+        if variant != "sync":
+            line += f"  x{baseline / result['median']:.1f}  хвост {result['drain_ms']:.0f} ms"
+            if result["dropped"]:
+                line += f"  отброшено {result['dropped']:.0f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк накладных расходов middleware
+
+Вызывает ASGI приложение напрямую (без сети и HTTP клиента) и сравнивает
+время запроса без middleware, с полным стеком из main.py и с тем же
+стеком, где логирование и заголовки безопасности - BaseHTTPMiddleware,
+как было раньше. Rate limiting работает на ведре воркера (без Redis).
+
+Запуск из backend/:
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware import (
+    CompressionMiddleware,
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.services.utils import redis_client
+
+PAYLOAD = [{"id": index, "name": f"Колода {index}", "cards_count": 120} for index in range(20)]
+
+
+class LegacyPassThrough(BaseHTTPMiddleware):
+    """BaseHTTPMiddleware без логики: цена самой обертки"""
+
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def make_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/decks/")
+    def decks():
+        return PAYLOAD
+
+    if stack == "none":
+        return app
+
+    app.add_middleware(RateLimitMiddleware, capacity=10 ** 9, refill_per_minute=10 ** 9)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], expose_headers=["X-Request-ID"])
+    app.add_middleware(CompressionMiddleware)
+    if stack == "asgi":
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+    else:
+        app.add_middleware(LegacyPassThrough)
+        app.add_middleware(LegacyPassThrough)
+    return app
+
+
+async def call(app: FastAPI) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/decks/", "raw_path": b"/api/decks/",
+        "root_path": "", "query_string": b"", "server": ("testserver", 80), "client": ("127.0.0.1", 5000),
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", b"gzip"), (b"origin", b"https://t.me")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    """Медиана времени запроса в микросекундах"""
+    for _ in range(200):  # прогрев и lifespan-независимая инициализация
+        await call(app)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call(app)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(timings)
+
+
+async def run(requests: int) -> None:
+    async def no_redis(*args, **kwargs):
+        return None
+    redis_client.eval = no_redis
+
+    baseline = await measure(make_app("none"), requests)
+    print(f"{'без middleware':<52} {baseline:8.1f} us")
+    for stack, name in (("asgi", "полный стек (чистый ASGI)"), ("legacy", "стек с 2x BaseHTTPMiddleware")):
+        median_us = await measure(make_app(stack), requests)
+        print(f"{name:<52} {median_us:8.1f} us  +{median_us - baseline:.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Запросов на каждый вариант")
+    args = parser.parse_args()
+    # Лог запросов пишется в production, но здесь замеряем сами middleware
+    logging.getLogger("api.requests").setLevel(logging.WARNING)
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
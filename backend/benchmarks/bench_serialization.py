@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сериализации списковых ответов
+
+Сравнивает стандартный путь FastAPI (response_model + jsonable_encoder)
+с FastJSONResponse на подготовленных dict для страницы карточек и списка колод.
+
+Запуск из backend/:
+    python -m benchmarks.bench_serialization --cards 1000 --repeat 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.responses import FastJSONResponse, ORJSON_AVAILABLE
+from app.routers.decks import deck_to_dict
+from app.schemas import Deck as DeckSchema
+from app.services.card_service import CardService
+
+
+def make_cards(count: int) -> List[SimpleNamespace]:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=index,
+            phrase=f"Mój pies biega szybko po parku numer {index}",
+            translation=f"Моя собака быстро бегает по парку номер {index}",
+            keyword="pies",
+            gap_fill="Mój ___ biega szybko po parku",
+            due_date=now + timedelta(days=index % 30),
+            image_path=f"assets/images/{index:032x}.jpeg",
+        )
+        for index in range(count)
+    ]
+
+
+def make_decks(count: int) -> List[SimpleNamespace]:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=index, user_id=1, name=f"Колода {index}", description="Повседневные фразы",
+            lang_from="pl", lang_to="ru", cards_count=120, due_count=7, created_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def measure(function: Callable[[], bytes], repeat: int) -> float:
+    """Медиана времени одного вызова в миллисекундах"""
+    function()  # прогрев
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=1000, help="Карточек на странице")
+    parser.add_argument("--decks", type=int, default=200, help="Колод в списке")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого замера")
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    decks = make_decks(args.decks)
+    page = {
+        "deck": {"id": 1, "name": "Колода", "lang_from": "pl", "lang_to": "ru", "cards_count": args.cards, "due_count": 0},
+        "pagination": {"current_page": 1, "total_pages": 1, "total_cards": args.cards,
+                       "has_next": False, "has_prev": False, "limit": args.cards},
+    }
+    deck_adapter = TypeAdapter(List[DeckSchema])
+
+    cases = [
+        (
+            f"cards page ({args.cards}): jsonable_encoder + JSONResponse",
+            lambda: JSONResponse(jsonable_encoder({**page, "cards": [CardService.card_to_dict(c) for c in cards]})).body,
+        ),
+        (
+            f"cards page ({args.cards}): FastJSONResponse",
+            lambda: FastJSONResponse({**page, "cards": [CardService.card_to_dict(c) for c in cards]}).body,
+        ),
+        (
+            f"decks ({args.decks}): response_model validation + dump",
+            lambda: deck_adapter.dump_json(deck_adapter.validate_python(decks, from_attributes=True)),
+        ),
+        (
+            f"decks ({args.decks}): deck_to_dict + FastJSONResponse",
+            lambda: FastJSONResponse([deck_to_dict(d) for d in decks]).body,
+        ),
+    ]
+
+    print(f"orjson: {'да' if ORJSON_AVAILABLE else 'нет (fallback на json)'}; повторов: {args.repeat}")
+    baseline = None
+    for name, function in cases:
+        median_ms = measure(function, args.repeat)
+        size = len(function())
+        if baseline is None or "FastJSONResponse" not in name:
+            baseline = median_ms
+            print(f"{name:<60} {median_ms:8.2f} ms  {size:>9} B")
+        else:
+            print(f"{name:<60} {median_ms:8.2f} ms  {size:>9} B  x{baseline / median_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк времени старта воркера (импорт app.main)
+
+Запускает несколько чистых интерпретаторов с python -X importtime,
+печатает медиану импорта app.main и самые тяжелые пакеты, проверяет,
+что тяжелые SDK (providers.LAZY_MODULES) не импортируются при старте.
+Код выхода 1, если медиана больше бюджета или SDK загрузился.
+
+Запуск из backend/ (нужны переменные окружения приложения):
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from app.services.providers import LAZY_MODULES
+
+# import time:  self [us] | cumulative | imported package
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+_PROBE = (
+    "import sys, app.main; "
+    "from app.logging_config import stop_logging; stop_logging(); "
+    "print('MODULES:' + ','.join(name for name in {lazy!r} if name in sys.modules))"
+)
+
+
+def run_once() -> Tuple[float, Dict[str, float], List[str]]:
+    """Один холодный импорт: (мс на app.main, мс по пакетам верхнего уровня, загруженные SDK)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(lazy=LAZY_MODULES)],
+        capture_output=True, text=True, check=True,
+    )
+    total_ms = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        # Собственное время суммируется по пакету верхнего уровня
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total_ms = int(cumulative_us) / 1000
+    # Логи старта тоже идут в stdout: поток логирования останавливается до print,
+    # строка со списком модулей ищется по метке
+    modules = next(line for line in result.stdout.splitlines() if line.startswith("MODULES:"))
+    loaded = [name for name in modules[len("MODULES:"):].split(",") if name]
+    return total_ms, packages, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Холодных запусков")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Бюджет медианы импорта app.main")
+    parser.add_argument("--top", type=int, default=10, help="Сколько тяжелых пакетов показать")
+    args = parser.parse_args()
+
+    totals = []
+    packages: Dict[str, List[float]] = defaultdict(list)
+    loaded = set()
+    for _ in range(args.runs):
+        total_ms, run_packages, run_loaded = run_once()
+        totals.append(total_ms)
+        for name, duration_ms in run_packages.items():
+            packages[name].append(duration_ms)
+        loaded.update(run_loaded)
+
+    median_ms = statistics.median(totals)
+    print(f"{'import app.main (медиана)':<40} {median_ms:8.1f} ms  (min {min(totals):.1f}, max {max(totals):.1f})")
+    print("Самые тяжелые пакеты (собственное время, медиана):")
+    heaviest = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, durations in heaviest[:args.top]:
+        print(f"  {name:<38} {statistics.median(durations):8.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"❌ При старте загружены ленивые SDK: {', '.join(sorted(loaded))}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"❌ Бюджет превышен: {median_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print(f"✅ В бюджете {args.budget_ms:.0f} ms, тяжелые SDK не загружены")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
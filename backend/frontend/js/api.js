@@ -189,6 +189,7 @@ export const api = {
     enrichPhrase: (enrichData) => request('/api/cards/enrich', 'POST', enrichData),
     addPhrase: (phraseData) => request('/api/cards/add-phrase', 'POST', phraseData),
     generateAudio: (audioData) => request('/api/cards/generate-audio', 'POST', audioData),
+    getAudioSprite: (cardIds) => request('/api/tts/sprite', 'POST', { card_ids: cardIds }),
     updateCardStatus: (statusData) => request('/api/cards/update-status', 'POST', statusData),
     deleteCard: (cardId) => request(`/api/cards/delete/${cardId}`, 'DELETE'),
     
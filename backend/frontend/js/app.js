@@ -534,14 +534,19 @@ window.playAudio = async function(text, langCode) {
                 console.log('API response:', response);
                 
                 if (response && response.audio_url) {
-                     const audio = new Audio(response.audio_url);
+                     // Компактный Opus вариант, если браузер его проигрывает (Safari на iOS - нет)
+                     const probe = document.createElement('audio');
+                     const audioUrl = response.opus_url && probe.canPlayType('audio/ogg; codecs=opus')
+                         ? response.opus_url
+                         : response.audio_url;
+                     const audio = new Audio(audioUrl);
                      
                      // Добавляем обработчик ошибки загрузки
                      audio.addEventListener('error', async (e) => {
                          console.log('Audio file not found, waiting for generation...');
                          // Ждем немного и пробуем еще раз
                          setTimeout(() => {
-                             const retryAudio = new Audio(response.audio_url);
+                             const retryAudio = new Audio(audioUrl);
                              retryAudio.play().catch(retryError => {
                                  console.error('Retry audio play failed:', retryError);
                                  alert(t('audio_playback_error'));
@@ -1644,9 +1649,13 @@ window.startTraining = async function(deckId) {
             currentPage: currentPageFromResponse,
             totalPages: totalPages,
             hasNextPage: hasNextPage,
-            deckId: deckId
+            deckId: deckId,
+            audioSprite: null
         };
         
+        // Загружаем озвучку всей страницы одним файлом в фоне
+        prefetchAudioSprite(trainingData);
+        
         // Показываем окно тренировки
         showWindow('training-window');
         
@@ -1659,6 +1668,48 @@ window.startTraining = async function(deckId) {
     }
 };
 
+// Предзагрузка аудио-спрайта страницы тренировки
+async function prefetchAudioSprite(session) {
+    try {
+        const sprite = await api.getAudioSprite(session.cards.map(card => card.id));
+        if (!sprite || !sprite.segments || sprite.segments.length === 0) {
+            return;
+        }
+        const probe = document.createElement('audio');
+        const url = sprite.opus_url && probe.canPlayType('audio/ogg; codecs=opus')
+            ? sprite.opus_url
+            : sprite.audio_url;
+        const audio = new Audio(url);
+        audio.preload = 'auto';
+        session.audioSprite = { audio, segments: sprite.segments, stopTimer: null };
+    } catch (error) {
+        // Без спрайта озвучка работает через playAudio
+        console.warn('Audio sprite prefetch failed:', error);
+    }
+}
+
+// Воспроизведение сегмента спрайта, возвращает false если сегмента нет
+function playSpriteSegment(cardId, side) {
+    const sprite = trainingData.audioSprite;
+    if (!sprite) {
+        return false;
+    }
+    const segment = sprite.segments.find(item => item.card_id === cardId && item.side === side);
+    if (!segment) {
+        return false;
+    }
+    clearTimeout(sprite.stopTimer);
+    sprite.audio.pause();
+    sprite.audio.currentTime = segment.start_ms / 1000;
+    sprite.audio.play()
+        .then(() => {
+            // Останавливаем на конце сегмента, отсчет с фактического начала воспроизведения
+            sprite.stopTimer = setTimeout(() => sprite.audio.pause(), segment.duration_ms);
+        })
+        .catch(error => console.error('Error playing audio sprite:', error));
+    return true;
+}
+
 // Функция загрузки карточки
 function loadTrainingCard() {
     const currentCard = trainingData.cards[trainingData.currentIndex];
@@ -2283,7 +2334,9 @@ document.getElementById('play-audio-btn').addEventListener('click', () => {
         const langCode = currentCard.isForward ? 
             extractLanguageCode(trainingData.deckInfo.lang_from) :
             extractLanguageCode(trainingData.deckInfo.lang_to);
-        playAudio(text, langCode);
+        if (!playSpriteSegment(currentCard.id, currentCard.isForward ? 'front' : 'back')) {
+            playAudio(text, langCode);
+        }
 
     }
 });
@@ -0,0 +1,64 @@
+# backend/gunicorn.conf.py
+"""
+Конфигурация gunicorn для production: несколько процессов с uvicorn воркерами.
+
+Запуск:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Число воркеров задается WEB_CONCURRENCY (по умолчанию - число ядер).
+Фоновые задачи выполняет один воркер-лидер (см. app/workers.py).
+"""
+
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# uvloop и httptools подключаются автоматически (uvicorn[standard])
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Генерация озвучки и картинок может занимать десятки секунд
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Перезапуск воркеров ограничивает рост памяти, разброс - чтобы не все сразу
+max_requests = 10000
+max_requests_jitter = 1000
+
+# Запросы приходят через nginx
+forwarded_allow_ips = "*"
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+# Воркеры пишут логи только в stdout: общие файлы с ротацией в каждом процессе ломаются
+os.environ.setdefault("LOG_TO_FILES", "0")
+
+
+def on_starting(server):
+    """Master до запуска воркеров: сборка ассетов один раз и чистый каталог состояния"""
+    from app.workers import ASSETS_BUILT_ENV, METRICS_SNAPSHOT_DIR
+
+    shutil.rmtree(METRICS_SNAPSHOT_DIR, ignore_errors=True)
+    METRICS_SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    try:
+        from app.asset_fingerprint import build_assets
+        build_assets()
+        os.environ[ASSETS_BUILT_ENV] = "1"
+    except Exception as e:
+        server.log.error(f"Ошибка сборки хешированных ассетов: {e}")
+
+
+def child_exit(server, worker):
+    """Счетчики завершившегося воркера переносятся в накопитель, чтобы не падать в /metrics"""
+    from app.monitoring import retire_worker_snapshot
+    from app.workers import METRICS_SNAPSHOT_DIR
+
+    try:
+        retire_worker_snapshot(METRICS_SNAPSHOT_DIR, worker.pid)
+    except Exception as e:
+        server.log.error(f"Ошибка переноса метрик воркера {worker.pid}: {e}")
+        (METRICS_SNAPSHOT_DIR / f"{worker.pid}.json").unlink(missing_ok=True)
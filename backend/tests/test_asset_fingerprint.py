@@ -0,0 +1,60 @@
+# backend/tests/test_asset_fingerprint.py
+"""
+Тесты для сборки frontend с хешами содержимого.
+"""
+
+import pytest
+
+from app.asset_fingerprint import AssetBuildError, build_assets
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "css").mkdir()
+    (tmp_path / "js" / "i18n.js").write_text("export const t = (k) => k;\n")
+    (tmp_path / "js" / "ui.js").write_text("import { t } from '/static/js/i18n.js';\n")
+    (tmp_path / "js" / "app.js").write_text(
+        "import { t } from '/static/js/i18n.js';\nimport '/static/js/ui.js';\n"
+    )
+    (tmp_path / "css" / "main.css").write_text("body { margin: 0; }\n")
+    (tmp_path / "index.html").write_text(
+        '<link rel="stylesheet" href="/static/css/main.css">\n'
+        '<script src="/static/js/app.js" type="module"></script>\n'
+    )
+    return tmp_path
+
+
+class TestBuildAssets:
+    """Тесты для build_assets."""
+
+    def test_imports_and_index_use_hashed_names(self, frontend):
+        """Импорты и index.html ссылаются на хешированные файлы."""
+        manifest = build_assets(frontend)
+
+        app_js = (frontend / manifest["js/app.js"]).read_text()
+        assert f"/static/{manifest['js/i18n.js']}" in app_js
+        assert f"/static/{manifest['js/ui.js']}" in app_js
+        index = (frontend / "dist" / "index.html").read_text()
+        assert f'src="/static/{manifest["js/app.js"]}"' in index
+        assert f'href="/static/{manifest["css/main.css"]}"' in index
+
+    def test_dependency_change_renames_dependents(self, frontend):
+        """Изменение зависимости меняет имена импортирующих модулей."""
+        first = build_assets(frontend)
+        (frontend / "js" / "i18n.js").write_text("export const t = (k) => k + '!';\n")
+
+        second = build_assets(frontend)
+
+        assert second["js/app.js"] != first["js/app.js"]
+        assert second["js/ui.js"] != first["js/ui.js"]
+        assert second["css/main.css"] == first["css/main.css"]
+        # Прошлая сборка остается для закэшированного index.html
+        assert (frontend / first["js/app.js"]).exists()
+
+    def test_import_cycle_is_rejected(self, frontend):
+        """Циклический импорт - ошибка сборки."""
+        (frontend / "js" / "i18n.js").write_text("import '/static/js/app.js';\n")
+
+        with pytest.raises(AssetBuildError):
+            build_assets(frontend)
@@ -0,0 +1,88 @@
+# backend/tests/test_audio_sprite.py
+"""
+Тесты для сборки аудио-спрайтов страницы тренировки.
+"""
+
+import pytest
+
+from app.services import audio_sprite as sprite_module
+from app.services.audio_sprite import AudioSpriteService
+from app.services.audio_utils import mp3_duration_ms, mp3_stream_format
+from app.services.tts_service import batch_key
+
+# MPEG2 Layer III фрейм: 144 байта, 24 мс, 24000 Гц, моно
+FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + b"\x00" * 140
+# Тот же битрейт на 22050 Гц: 156 байт, ~26.1 мс
+FRAME_22K = bytes([0xFF, 0xF3, 0x60, 0xC4]) + b"\x00" * 152
+
+
+class FakeTTS:
+    """Пишет клип из N фреймов, где N - длина текста."""
+
+    def __init__(self, audio_dir):
+        self.audio_dir = audio_dir
+        self.calls = 0
+        self.frames = {}
+
+    async def generate_batch_audio(self, texts_and_langs):
+        self.calls += 1
+        results = {}
+        for text, lang in texts_and_langs:
+            name = f"{lang}_{text}.mp3"
+            (self.audio_dir / name).write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x00" + self.frames.get(lang, FRAME) * len(text))
+            results[batch_key(text, lang)] = f"assets/audio/{name}"
+        return results
+
+
+@pytest.fixture
+def fake_tts(monkeypatch, tmp_path):
+    fake = FakeTTS(tmp_path)
+    monkeypatch.setattr(sprite_module, "AUDIO_DIR", tmp_path)
+    monkeypatch.setattr(sprite_module, "tts_service", fake)
+    return fake
+
+
+CARDS = [
+    {"id": 1, "phrase": "<b>ab</b>", "translation": "abc", "lang_from": "pl", "lang_to": "ru"},
+    {"id": 2, "phrase": "a", "translation": "", "lang_from": "pl", "lang_to": "ru"},
+]
+
+
+class TestAudioSprite:
+    """Тесты для AudioSpriteService."""
+
+    @pytest.mark.asyncio
+    async def test_segments_follow_clip_durations(self, fake_tts, tmp_path):
+        """Смещения сегментов совпадают с длительностью клипов."""
+        manifest = await AudioSpriteService().get_sprite(CARDS)
+
+        assert [(s["card_id"], s["side"], s["start_ms"], s["duration_ms"]) for s in manifest["segments"]] == [
+            (1, "front", 0.0, 48.0),
+            (1, "back", 48.0, 72.0),
+            (2, "front", 120.0, 24.0),
+        ]
+        sprite_file = tmp_path / manifest["audio_url"].split("/")[-1]
+        assert mp3_duration_ms(sprite_file.read_bytes()) == manifest["duration_ms"] == 144.0
+
+    @pytest.mark.asyncio
+    async def test_sprite_is_cached_by_card_set(self, fake_tts):
+        """Повторный запрос той же страницы не пересобирает спрайт."""
+        service = AudioSpriteService()
+
+        first = await service.get_sprite(CARDS)
+        second = await service.get_sprite(CARDS)
+
+        assert first == second
+        assert fake_tts.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_clips_of_other_sample_rate_skipped(self, fake_tts, tmp_path):
+        """Клипы с другой частотой дискретизации не склеиваются в спрайт."""
+        fake_tts.frames["ru"] = FRAME_22K
+
+        manifest = await AudioSpriteService().get_sprite(CARDS)
+
+        assert [(s["card_id"], s["side"]) for s in manifest["segments"]] == [(1, "front"), (2, "front")]
+        sprite_file = tmp_path / manifest["audio_url"].split("/")[-1]
+        assert mp3_stream_format(sprite_file.read_bytes()) == (24000, 1)
+        assert mp3_duration_ms(sprite_file.read_bytes()) == manifest["duration_ms"] == 72.0
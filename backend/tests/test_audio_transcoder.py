@@ -0,0 +1,32 @@
+# backend/tests/test_audio_transcoder.py
+"""
+Тесты для выбора Opus варианта аудио.
+"""
+
+from app.services.audio_transcoder import client_prefers_opus
+
+
+class TestClientPrefersOpus:
+    """Тесты для согласования формата аудио."""
+
+    def test_explicit_format_wins(self):
+        """Явный ?format важнее заголовка Accept."""
+        assert client_prefers_opus("audio/mpeg", "opus") is True
+        assert client_prefers_opus("audio/ogg", "mp3") is False
+
+    def test_wildcard_accept_keeps_mp3(self):
+        """Браузерный */* не означает поддержку Opus."""
+        assert client_prefers_opus("*/*") is False
+        assert client_prefers_opus(None) is False
+
+    def test_explicit_accept(self):
+        """Opus отдается только при явном упоминании с q > 0."""
+        assert client_prefers_opus("audio/ogg;q=0.9, audio/mpeg") is True
+        assert client_prefers_opus("audio/ogg; codecs=opus") is True
+        assert client_prefers_opus("audio/ogg;q=0, */*") is False
+
+    def test_only_ogg_container(self):
+        """Opus в другом контейнере или Ogg с другим кодеком не подходят."""
+        assert client_prefers_opus("audio/webm; codecs=opus") is False
+        assert client_prefers_opus("audio/webm, audio/mpeg") is False
+        assert client_prefers_opus('audio/ogg; codecs="vorbis"') is False
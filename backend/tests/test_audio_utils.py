@@ -0,0 +1,81 @@
+# backend/tests/test_audio_utils.py
+"""
+Тесты для разбора и нарезки MP3 и поиска ключевого слова в таймингах.
+"""
+
+from app.services.audio_utils import (
+    find_keyword_span,
+    iter_mp3_frames,
+    mp3_duration_ms,
+    slice_mp3,
+    strip_mp3_metadata,
+)
+
+# MPEG2 Layer III, 48 kbps, 24 kHz, mono - формат Edge TTS: 144 байта и 24 мс на фрейм
+FRAME_HEADER = bytes([0xFF, 0xF3, 0x64, 0xC4])
+FRAME_LENGTH = 144
+
+
+def make_mp3(frame_count: int, id3: bool = False) -> bytes:
+    frames = b"".join(
+        FRAME_HEADER + bytes([index]) * (FRAME_LENGTH - len(FRAME_HEADER))
+        for index in range(frame_count)
+    )
+    if id3:
+        # ID3v2 заголовок с телом 20 байт
+        return b"ID3\x03\x00\x00\x00\x00\x00\x14" + b"\x00" * 20 + frames
+    return frames
+
+
+class TestMp3Frames:
+    """Тесты для разбора фреймов MP3."""
+
+    def test_duration(self):
+        """Длительность считается по фреймам."""
+        assert mp3_duration_ms(make_mp3(10)) == 240.0
+
+    def test_id3_is_skipped(self):
+        """ID3 тег не считается аудио."""
+        data = make_mp3(3, id3=True)
+
+        assert len(list(iter_mp3_frames(data))) == 3
+        assert strip_mp3_metadata(data) == make_mp3(3)
+
+    def test_slice_by_time(self):
+        """Нарезка возвращает фреймы, пересекающие интервал."""
+        clip = slice_mp3(make_mp3(10), 48, 96, padding_ms=0)
+
+        frames = list(iter_mp3_frames(clip))
+        assert len(frames) == 2
+        assert clip[4] == 2 and clip[FRAME_LENGTH + 4] == 3
+
+    def test_slice_padding_is_clamped(self):
+        """Запас не выходит за начало файла."""
+        clip = slice_mp3(make_mp3(10), 0, 10, padding_ms=60)
+
+        assert len(list(iter_mp3_frames(clip))) == 3
+
+
+class TestFindKeywordSpan:
+    """Тесты для поиска ключевого слова в таймингах."""
+
+    TIMINGS = [
+        {"text": "Mój", "start_ms": 100.0, "end_ms": 300.0},
+        {"text": "pies", "start_ms": 300.0, "end_ms": 600.0},
+        {"text": "biega", "start_ms": 650.0, "end_ms": 900.0},
+        {"text": "szybko.", "start_ms": 900.0, "end_ms": 1300.0},
+    ]
+
+    def test_exact_match_ignores_case_and_punctuation(self):
+        assert find_keyword_span(self.TIMINGS, "Szybko") == {"start_ms": 900.0, "end_ms": 1300.0}
+
+    def test_multi_word_keyword(self):
+        assert find_keyword_span(self.TIMINGS, "pies biega") == {"start_ms": 300.0, "end_ms": 900.0}
+
+    def test_inflected_form(self):
+        assert find_keyword_span(self.TIMINGS, "biegać") == {"start_ms": 650.0, "end_ms": 900.0}
+        assert find_keyword_span(self.TIMINGS, "psy") is None
+
+    def test_missing_keyword(self):
+        assert find_keyword_span(self.TIMINGS, "kot") is None
+        assert find_keyword_span([], "pies") is None
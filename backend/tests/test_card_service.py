@@ -0,0 +1,75 @@
+# backend/tests/test_card_service.py
+"""
+Тесты для сервиса карточек.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.card import Card
+from app.services.card_service import card_service
+
+
+class TestCardListing:
+    """Тесты для выборок карточек по колонкам."""
+
+    def test_due_cards_ordered_by_due_date(self, db_session, test_user, test_deck):
+        """В очередь попадают только карточки с наступившим сроком, старые первыми."""
+        now = datetime.utcnow()
+        for phrase, due_date in (("later", now + timedelta(days=2)), ("old", now - timedelta(days=3)), ("today", now - timedelta(hours=1))):
+            db_session.add(Card(deck_id=test_deck.id, phrase=phrase, translation=phrase, due_date=due_date))
+        db_session.commit()
+
+        result = card_service.get_due_cards(test_deck.id, test_user, db_session)
+
+        assert [card["front_text"] for card in result["cards"]] == ["old", "today"]
+        assert result["count"] == 2
+
+    def test_due_cards_foreign_deck(self, db_session, test_deck):
+        """Чужая колода недоступна."""
+        class Stranger:
+            id = test_deck.user_id + 1
+
+        with pytest.raises(HTTPException) as exc_info:
+            card_service.get_due_cards(test_deck.id, Stranger(), db_session)
+        assert exc_info.value.status_code == 403
+
+    def test_export_includes_heavy_columns(self, db_session, test_deck, test_card):
+        """Экспорт отдает examples и параметры SRS, которых нет в списке."""
+        test_card.examples = [{"original": "Hi", "translation": "Привет"}]
+        db_session.commit()
+
+        exported = list(card_service.iter_deck_export(test_deck.id, db_session))
+
+        assert len(exported) == 1
+        assert exported[0]["examples"] == [{"original": "Hi", "translation": "Привет"}]
+        assert exported[0]["ease_factor"] == 2.5
+
+
+class TestConditionalGet:
+    """Тесты для ETag на списках колод и карточек."""
+
+    def test_deck_cards_not_modified_until_review(self, client, auth_headers, test_deck, test_card):
+        """Повторный запрос отвечает 304, оценка карточки меняет ETag."""
+        url = f"/api/cards/deck/{test_deck.id}"
+        first = client.get(url, headers=auth_headers)
+        etag = first.headers["etag"]
+
+        cached = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        client.post("/api/cards/update-status", headers=auth_headers, json={"card_id": test_card.id, "rating": "good"})
+        fresh = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["etag"] != etag
+
+    def test_decks_etag_changes_on_card_delete(self, client, auth_headers, test_card):
+        """Удаление карточки меняет версию списка колод."""
+        etag = client.get("/api/decks/", headers=auth_headers).headers["etag"]
+        assert client.get("/api/decks/", headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+        client.delete(f"/api/cards/delete/{test_card.id}", headers=auth_headers)
+        assert client.get("/api/decks/", headers={**auth_headers, "If-None-Match": etag}).status_code == 200
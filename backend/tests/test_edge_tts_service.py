@@ -0,0 +1,114 @@
+# backend/tests/test_edge_tts_service.py
+"""
+Тесты для хеджированного синтеза Edge TTS.
+"""
+
+import asyncio
+import pytest
+
+from app.services import edge_tts_service as edge_module
+from app.services.edge_tts_service import EdgeTTSService
+
+
+def make_stream(behaviour):
+    """
+    Создает подмену _stream_voice.
+
+    behaviour: {voice: (задержка первого чанка, результат или исключение)}
+    """
+    started = []
+
+    async def fake_stream(text, voice, on_first_chunk):
+        started.append(voice)
+        delay, result = behaviour[voice]
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        on_first_chunk(voice, delay)
+        return result, [{"text": voice, "start_ms": 0.0, "end_ms": 100.0}]
+
+    return fake_stream, started
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    monkeypatch.setattr(edge_module, "AUDIO_DIR", tmp_path)
+    monkeypatch.setattr(edge_module, "HEDGE_MAX_DELAY", 0.05)
+    monkeypatch.setattr(edge_module, "HEDGE_MIN_DELAY", 0.01)
+    service = EdgeTTSService()
+    service.is_available = True
+    return service
+
+
+class TestHedgedSynthesis:
+    """Тесты для хеджирования голосов."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_does_not_start_backup(self, service, monkeypatch):
+        """Быстрый основной голос не запускает резервные."""
+        fake, started = make_stream({"A": (0.0, b"a"), "B": (0.0, b"b")})
+        monkeypatch.setattr(service, "_stream_voice", fake)
+
+        voice, audio, _ = await service._hedged_synthesis("text", ["A", "B"])
+
+        assert (voice, audio) == ("A", b"a")
+        assert started == ["A"]
+
+    @pytest.mark.asyncio
+    async def test_stalled_primary_is_hedged_and_cancelled(self, service, monkeypatch):
+        """Зависший основной голос обгоняется резервным и отменяется."""
+        fake, started = make_stream({"A": (5.0, b"a"), "B": (0.0, b"b")})
+        monkeypatch.setattr(service, "_stream_voice", fake)
+
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        voice, audio, _ = await service._hedged_synthesis("text", ["A", "B"])
+
+        assert (voice, audio) == ("B", b"b")
+        assert started == ["A", "B"]
+        assert loop.time() - started_at < 1.0
+        assert service._get_stats("A").cancelled == 1
+        assert service._get_stats("B").successes == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_launches_backup_immediately(self, service, monkeypatch):
+        """Упавший основной голос сразу заменяется резервным."""
+        fake, started = make_stream({"A": (0.0, RuntimeError("boom")), "B": (0.0, b"b")})
+        monkeypatch.setattr(service, "_stream_voice", fake)
+
+        voice, _, _ = await service._hedged_synthesis("text", ["A", "B"])
+
+        assert voice == "B"
+        assert service._get_stats("A").failures == 1
+
+    @pytest.mark.asyncio
+    async def test_all_voices_fail(self, service, monkeypatch):
+        """Если все голоса упали, возвращается пустой результат."""
+        fake, _ = make_stream({"A": (0.0, RuntimeError("a")), "B": (0.0, RuntimeError("b"))})
+        monkeypatch.setattr(service, "_stream_voice", fake)
+
+        assert await service._hedged_synthesis("text", ["A", "B"]) == (None, b"", [])
+
+    def test_unhealthy_primary_is_demoted(self, service):
+        """Голос с частыми ошибками уходит в конец очереди."""
+        stats = service._get_stats("pl-PL-ZofiaNeural")
+        stats.failures = 5
+        stats.successes = 1
+
+        voices = service._rank_voices(edge_module.EDGE_VOICE_MAPPING["pl"])
+
+        assert voices == ["pl-PL-MarekNeural", "pl-PL-ZofiaNeural"]
+
+    @pytest.mark.asyncio
+    async def test_generate_audio_writes_winner_file(self, service, monkeypatch, tmp_path):
+        """Файл сохраняется под именем победившего голоса."""
+        fake, _ = make_stream({"pl-PL-ZofiaNeural": (5.0, b"z"), "pl-PL-MarekNeural": (0.0, b"m")})
+        monkeypatch.setattr(service, "_stream_voice", fake)
+
+        path = await service.generate_audio("cześć", "pl")
+
+        assert path.startswith("assets/audio/edge_pl_Marek_")
+        assert (tmp_path / path.split("/")[-1]).read_bytes() == b"m"
+        assert service.get_word_timings(path) == [
+            {"text": "pl-PL-MarekNeural", "start_ms": 0.0, "end_ms": 100.0}
+        ]
@@ -0,0 +1,95 @@
+# backend/tests/test_logging_config.py
+"""
+Тесты для логирования через очередь.
+"""
+
+import logging
+import os
+import queue
+
+import pytest
+
+from app.logging_config import (
+    PAYLOAD_LOGGER,
+    DroppingQueueHandler,
+    SamplingFilter,
+    get_logging_config,
+    setup_logging,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Логирование приложения с файлами во временном каталоге."""
+    cwd = os.getcwd()
+    monkeypatch.setenv("LOG_PAYLOAD_SAMPLE_RATE", "0")
+    os.chdir(tmp_path)
+    try:
+        setup_logging()
+        yield tmp_path / "logs"
+    finally:
+        stop_logging()
+        os.chdir(cwd)
+        monkeypatch.delenv("LOG_PAYLOAD_SAMPLE_RATE")
+        setup_logging()
+
+
+class TestQueueLogging:
+    """Тесты для маршрутизации записей в потоке слушателя."""
+
+    def test_records_routed_by_logger(self, log_dir):
+        """Запись попадает в обработчики ближайшего настроенного логгера."""
+        logging.getLogger("app.services.enrichment").info("service record")
+        logging.getLogger("api.requests").info("request record")
+        logging.getLogger("app.services.enrichment").error("service failure")
+        stop_logging()
+
+        app_log = (log_dir / "app.log").read_text(encoding="utf8")
+        assert "service record" in app_log
+        assert "request record" not in app_log
+        assert "request record" in (log_dir / "api_requests.log").read_text(encoding="utf8")
+        # app.services не пишет в error.log (как и до очереди)
+        assert "service failure" not in (log_dir / "error.log").read_text(encoding="utf8")
+
+    def test_payload_sampled(self, log_dir):
+        """Дампы проходят выборку LOG_PAYLOAD_SAMPLE_RATE."""
+        logging.getLogger(PAYLOAD_LOGGER).info("raw payload %s", "{}")
+        logging.getLogger("app").info("kept record")
+        stop_logging()
+
+        app_log = (log_dir / "app.log").read_text(encoding="utf8")
+        assert "kept record" in app_log
+        assert "raw payload" not in app_log
+
+    def test_stdout_only_without_files(self, monkeypatch):
+        """С LOG_TO_FILES=0 (gunicorn) файлы логов не создаются."""
+        monkeypatch.setenv("LOG_TO_FILES", "0")
+        config = get_logging_config()
+
+        assert all("filename" not in handler for handler in config["handlers"].values())
+        assert config["loggers"][PAYLOAD_LOGGER]["handlers"] == ["console"]
+        assert config["loggers"]["api.requests"]["handlers"] == ["console"]
+
+
+class TestLoggingHelpers:
+    """Тесты для фильтра выборки и обработчика очереди."""
+
+    def test_sampling_filter_bounds(self):
+        """Доля 0 отбрасывает все, 1 - пропускает все."""
+        record = logging.LogRecord("app.payload", logging.INFO, __file__, 1, "dump", None, None)
+
+        assert not SamplingFilter(0).filter(record)
+        assert SamplingFilter(1).filter(record)
+
+    def test_full_queue_drops_without_blocking(self):
+        """Переполненная очередь не блокирует поток запроса."""
+        handler = DroppingQueueHandler(queue.SimpleQueue(), maxsize=1)
+        logger = logging.Logger("test.queue")
+        logger.addHandler(handler)
+
+        logger.warning("first")
+        logger.warning("second")
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
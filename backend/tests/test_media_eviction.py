@@ -0,0 +1,108 @@
+# backend/tests/test_media_eviction.py
+"""
+Тесты для LRU вытеснения медиафайлов по бюджету диска.
+"""
+
+import os
+import time
+
+import pytest
+
+from app.services.media_eviction import MediaAccessRecorder, MediaEvictionService
+
+
+@pytest.fixture
+def service(tmp_path):
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+    recorder = MediaAccessRecorder(tmp_path / ".media_access.json")
+    return MediaEvictionService(recorder, {"audio": audio_dir}), audio_dir
+
+
+def make_file(directory, name, size, age_hours):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    timestamp = time.time() - age_hours * 3600
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+class TestMediaEviction:
+    """Тесты для MediaEvictionService."""
+
+    def test_under_budget_keeps_everything(self, service):
+        """В пределах бюджета ничего не удаляется."""
+        eviction, audio_dir = service
+        make_file(audio_dir, "a.mp3", 100, 48)
+
+        stats = eviction.evict_class("audio", 1000, set(), 0)
+
+        assert stats == {"total_bytes": 100, "evicted_files": 0, "reclaimed_bytes": 0}
+
+    def test_least_recently_used_evicted_with_variants(self, service):
+        """Первым удаляется давно не использованный клип вместе с вариантами."""
+        eviction, audio_dir = service
+        make_file(audio_dir, "old.mp3", 100, 72)
+        make_file(audio_dir, "old.ogg", 50, 72)
+        make_file(audio_dir, "recent.mp3", 100, 48)
+
+        stats = eviction.evict_class("audio", 200, set(), 0)
+
+        assert sorted(p.name for p in audio_dir.iterdir()) == ["recent.mp3"]
+        assert stats["reclaimed_bytes"] == 150
+
+    def test_recorded_access_overrides_mtime(self, service):
+        """Записанный доступ продлевает жизнь старому файлу."""
+        eviction, audio_dir = service
+        make_file(audio_dir, "old.mp3", 100, 72)
+        make_file(audio_dir, "recent.mp3", 100, 48)
+        eviction.recorder.record("audio", "assets/audio/old.mp3")
+
+        eviction.evict_class("audio", 150, set(), 0)
+
+        assert [p.name for p in audio_dir.iterdir()] == ["old.mp3"]
+
+    def test_referenced_and_fresh_files_are_protected(self, service):
+        """Файлы карточек и свежие файлы не удаляются даже сверх бюджета."""
+        eviction, audio_dir = service
+        make_file(audio_dir, "card.mp3", 100, 72)
+        make_file(audio_dir, "fresh.mp3", 100, 1)
+
+        stats = eviction.evict_class("audio", 50, {"card"}, grace_seconds=24 * 3600)
+
+        assert stats["evicted_files"] == 0
+        assert len(list(audio_dir.iterdir())) == 2
+
+
+class TestMediaAccessRecorder:
+    """Тесты для учета доступа к медиа."""
+
+    def test_nginx_log_is_ingested_incrementally(self, tmp_path):
+        """Access log дочитывается с прошлой позиции."""
+        log = tmp_path / "access.log"
+        log.write_text(
+            '1.2.3.4 - - [10/Oct/2025:13:55:36 +0000] "GET /static/assets/audio/a.mp3 HTTP/1.1" 200 10\n'
+            '1.2.3.4 - - [10/Oct/2025:13:55:37 +0000] "GET /static/js/app.js HTTP/1.1" 200 10\n'
+        )
+        recorder = MediaAccessRecorder(tmp_path / ".media_access.json")
+
+        assert recorder.ingest_nginx_log(str(log)) == 1
+        assert recorder.ingest_nginx_log(str(log)) == 0
+        assert recorder.last_access("audio", "a.ogg") is not None
+
+
+class TestMediaAccessWorkers:
+    """Тесты для обмена обращениями к медиа между воркерами."""
+
+    def test_pending_access_reaches_other_process(self, tmp_path):
+        """Обращения воркера попадают в recorder, который выполняет вытеснение."""
+        manifest = tmp_path / "media_access.json"
+        worker = MediaAccessRecorder(manifest)
+        leader = MediaAccessRecorder(manifest)
+        worker.record("audio", "assets/audio/clip.mp3", 1000.0)
+
+        assert worker.flush_pending() == 1
+        assert worker.flush_pending() == 0
+        assert leader.ingest_pending() == 1
+        assert leader.last_access("audio", "clip.ogg") == 1000.0
+        assert list(tmp_path.glob("*.worker-*")) == []
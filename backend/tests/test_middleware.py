@@ -0,0 +1,221 @@
+# backend/tests/test_middleware.py
+"""
+Тесты для middleware: сжатие ответов, rate limiting, заголовки и логирование.
+"""
+
+import gzip
+import re
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import (
+    CONTENT_SECURITY_POLICY,
+    CompressionMiddleware,
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware,
+    route_cost,
+    select_encoding,
+)
+from app.monitoring import metrics_collector
+from app.services.utils import redis_client
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+# Сгенерированные медиа и сборка с хешами - не исходники frontend
+FRONTEND_SKIPPED = ("assets", "dist")
+
+PAYLOAD = [{"phrase": "Mój pies biega szybko", "translation": "Моя собака быстро бегает"}] * 50
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/decks")
+    def decks():
+        return PAYLOAD
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/audio")
+    def audio():
+        return Response(b"\xff\xf3" * 2000, media_type="audio/mpeg")
+
+    @app.get("/stream")
+    def stream():
+        async def lines():
+            for index in range(3):
+                yield f'{{"index": {index}}}\n' * 100
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+class TestCompressionMiddleware:
+    """Тесты для CompressionMiddleware."""
+
+    def test_large_json_is_gzipped(self):
+        """Большой JSON сжимается и корректно распаковывается."""
+        response = make_client().get("/decks", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert response.json() == PAYLOAD
+
+    def test_small_and_binary_responses_are_skipped(self):
+        """Маленькие ответы и аудио отдаются без сжатия."""
+        client = make_client()
+
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/audio", headers={"Accept-Encoding": "gzip"}).headers
+
+    def test_streaming_response_is_compressed(self):
+        """Потоковый ответ сжимается по чанкам."""
+        response = make_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.count("\n") == 300
+
+    def test_metrics_are_recorded(self):
+        """Коэффициент сжатия попадает в метрики."""
+        make_client().get("/decks", headers={"Accept-Encoding": "gzip"})
+
+        assert metrics_collector.get_compression_stats()["gzip"]["ratio"] > 1
+
+    def test_encoding_negotiation(self):
+        """Выбор кодировки учитывает q и предпочтение сервера."""
+        assert select_encoding("gzip, br", ["br", "gzip"]) == "br"
+        assert select_encoding("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+        assert select_encoding("identity", ["br", "gzip"]) is None
+        assert select_encoding("gzip;q=0", ["gzip"]) is None
+
+
+class FakeRedisBucket:
+    """Ведро в "Redis": считает вызовы скрипта и выдает токены как Lua скрипт."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.calls = 0
+
+    async def eval(self, script, keys, args):
+        self.calls += 1
+        cost, lease = args[2], args[3]
+        if self.tokens < cost:
+            return [0, 1500]
+        granted = min(max(cost, lease), self.tokens)
+        self.tokens -= granted
+        return [granted, 0]
+
+
+class TestRateLimitMiddleware:
+    """Тесты для RateLimitMiddleware."""
+
+    def test_route_costs(self):
+        """Генерация через AI стоит дороже чтения колод."""
+        assert route_cost("/api/cards/enrich") > route_cost("/api/decks/") == 1
+
+    @pytest.mark.asyncio
+    async def test_lease_absorbs_cheap_requests(self, monkeypatch):
+        """Дешевые запросы тратят арендованные токены без обращения к Redis."""
+        fake = FakeRedisBucket(tokens=100)
+        monkeypatch.setattr(redis_client, "eval", fake.eval)
+        limiter = RateLimitMiddleware(None, capacity=100, lease_tokens=5)
+
+        for _ in range(5):
+            assert await limiter.acquire("user:1", 1) is None
+
+        assert fake.calls == 1
+        assert fake.tokens == 95
+
+    @pytest.mark.asyncio
+    async def test_rejects_with_retry_after(self, monkeypatch):
+        """Пустое ведро в Redis - отказ со сроком повтора."""
+        fake = FakeRedisBucket(tokens=10)
+        monkeypatch.setattr(redis_client, "eval", fake.eval)
+        limiter = RateLimitMiddleware(None, capacity=100)
+
+        assert await limiter.acquire("user:1", 20) == 2
+
+    def test_local_bucket_without_redis(self, monkeypatch):
+        """Без Redis ответ 429 приходит из ведра воркера, статика не ограничивается."""
+        async def unavailable(*args, **kwargs):
+            return None
+        monkeypatch.setattr(redis_client, "eval", unavailable)
+
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, capacity=40, refill_per_minute=1)
+
+        @app.post("/api/cards/enrich")
+        def enrich():
+            return {"ok": True}
+
+        @app.get("/static/app.js")
+        def script():
+            return {"ok": True}
+
+        client = TestClient(app)
+        assert client.post("/api/cards/enrich").status_code == 200
+        assert client.post("/api/cards/enrich").status_code == 200
+        response = client.post("/api/cards/enrich")
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) > 0
+        assert client.get("/static/app.js").status_code == 200
+
+
+class TestHeaderMiddlewares:
+    """Тесты для SecurityHeadersMiddleware и RequestLoggingMiddleware."""
+
+    def test_headers_added_to_streaming_response(self):
+        """Заголовки добавляются, потоковый ответ доходит целиком."""
+        app = FastAPI()
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+
+        @app.get("/app")
+        def page():
+            async def chunks():
+                for index in range(3):
+                    yield f"chunk{index};"
+            return StreamingResponse(chunks(), media_type="text/html")
+
+        response = TestClient(app).get("/app")
+
+        assert response.text == "chunk0;chunk1;chunk2;"
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert "default-src 'self'" in response.headers["content-security-policy"]
+        assert len(response.headers["x-request-id"]) == 8
+
+    def test_pages_embeddable_in_telegram(self, client):
+        """Страницы Mini App можно встроить в веб-клиент Telegram, API - нельзя."""
+        page = client.get("/")
+
+        assert "x-frame-options" not in page.headers
+        assert "frame-ancestors 'self' https://web.telegram.org" in page.headers["content-security-policy"]
+
+        api = client.get("/api/decks/")
+        assert api.headers["x-frame-options"] == "DENY"
+        assert "content-security-policy" not in api.headers
+
+    def test_page_csp_allows_frontend_origins(self):
+        """CSP страниц разрешает все внешние источники из исходников frontend."""
+        policy = CONTENT_SECURITY_POLICY.decode()
+        origins = set()
+        for path in FRONTEND_DIR.rglob("*"):
+            if path.suffix not in (".html", ".css", ".js"):
+                continue
+            if path.relative_to(FRONTEND_DIR).parts[0] in FRONTEND_SKIPPED:
+                continue
+            origins.update(re.findall(r"https://[\w.-]+", path.read_text(encoding="utf-8")))
+
+        assert origins, "в frontend не найдено ни одного внешнего источника"
+        for origin in origins:
+            assert origin in policy, origin
+        # Стили Google Fonts подгружают шрифты с другого домена
+        assert "font-src 'self' https://fonts.gstatic.com" in policy
@@ -0,0 +1,259 @@
+# backend/tests/test_monitoring.py
+"""
+Тесты для метрик и экспорта в формате Prometheus.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import monitoring
+from app.timing import current_timing, finish_request_timing, start_request_timing
+from app.monitoring import (
+    SKETCH_BUCKETS,
+    LatencySketch,
+    MetricsCollector,
+    MinuteRing,
+    aggregate_metrics,
+    instrument_engine,
+    load_worker_snapshots,
+    metrics_collector,
+    render_prometheus,
+    retire_worker_snapshot,
+)
+
+
+class TestLatencyHistograms:
+    """Тесты для гистограмм задержки."""
+
+    def test_route_histogram_rendered_cumulative(self):
+        """Бакеты le накопительные, +Inf равен count."""
+        collector = MetricsCollector()
+        for duration in (0.003, 0.02, 0.02, 30.0):
+            collector.record_request(duration, 200, method="GET", route="/api/decks/{deck_id}")
+
+        body = render_prometheus(collector)
+
+        labels = 'method="GET",route="/api/decks/{deck_id}",status="200"'
+        assert f'phraseweaver_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in body
+        assert f'phraseweaver_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 3' in body
+        assert f'phraseweaver_http_request_duration_seconds_bucket{{{labels},le="10.0"}} 3' in body
+        assert f'phraseweaver_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in body
+        assert f'phraseweaver_http_request_duration_seconds_count{{{labels}}} 4' in body
+        assert "# TYPE phraseweaver_http_request_duration_seconds histogram" in body
+
+    def test_workers_merged(self):
+        """Гистограммы и соединения воркеров суммируются."""
+        first, second = MetricsCollector(), MetricsCollector()
+        first.record_request(0.01, 200, method="GET", route="/api/decks/")
+        second.record_request(0.01, 200, method="GET", route="/api/decks/")
+        second.record_cache_operation("get", hit=True)
+
+        snapshots = [first.snapshot(), second.snapshot()]
+        snapshots[1]["gauges"]["db_pool_checked_out"] = 3
+        merged = aggregate_metrics(snapshots)
+
+        assert merged.route_latency["GET /api/decks/ 200"]["count"] == 2
+        assert merged.cache_hits == 1
+        assert merged.get_application_metrics().database_connections == 3
+
+    def test_label_values_escaped(self):
+        """Кавычки и переводы строк в метках экранируются."""
+        collector = MetricsCollector()
+        collector.record_request(0.01, 404, method="GET", route='/a"b\n')
+
+        assert 'route="/a\\"b\\n"' in render_prometheus(collector)
+
+
+class TestConcurrentSnapshots:
+    """Тесты для снимков при записи метрик из других потоков."""
+
+    def test_snapshot_while_recording(self):
+        """Снимок не падает, пока потоки добавляют новые серии."""
+        collector = MetricsCollector()
+
+        def record(worker):
+            for index in range(3000):
+                collector.record_request(0.01, 200, user_id=worker * 10000 + index, method="GET", route="/api/decks/")
+                collector.record_compression(f"enc-{worker}-{index % 50}", 100, 10, 0.001)
+
+        threads = [threading.Thread(target=record, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            json.dumps(collector.snapshot(refresh_gauges=False))
+        for thread in threads:
+            thread.join()
+
+        assert collector.snapshot(refresh_gauges=False)["total_requests"] == 12000
+
+
+class TestRetiredWorkers:
+    """Тесты для счетчиков завершившихся воркеров."""
+
+    def test_counters_survive_worker_restart(self, tmp_path):
+        """После перезапуска воркеров счетчики не уменьшаются, gauges обнуляются."""
+        for pid in (101, 102):
+            collector = MetricsCollector()
+            collector.record_request(0.01, 200, method="GET", route="/api/decks/")
+            snapshot = collector.snapshot()
+            snapshot["gauges"]["db_pool_checked_out"] = 2
+            (tmp_path / f"{pid}.json").write_text(json.dumps(snapshot))
+            retire_worker_snapshot(tmp_path, pid)
+
+        snapshots = load_worker_snapshots(tmp_path)
+        merged = aggregate_metrics(snapshots)
+
+        assert not (tmp_path / "101.json").exists()
+        assert monitoring.count_workers(snapshots) == 0
+        assert merged.total_requests == 2
+        assert merged.route_latency["GET /api/decks/ 200"]["count"] == 2
+        assert merged.gauges["db_pool_checked_out"] == 0
+
+
+class TestFixedMemorySeries:
+    """Тесты для кольцевых буферов и скетчей задержки."""
+
+    def test_minute_ring_overwrites_old_minutes(self):
+        """Ячейка прошлого круга обнуляется, размер буфера не меняется."""
+        ring = MinuteRing(size=5)
+        for minute in range(100):
+            ring.add(minute, 2)
+
+        assert len(ring.values) == 5
+        assert ring.sum_recent(3, now=99) == 6
+        assert ring.sum_recent(10, now=99) == 10
+        # Минута старше окна при слиянии не портит свежую ячейку
+        ring.add(90, 100)
+        assert ring.sum_recent(5, now=99) == 10
+
+    def test_sketch_quantiles_within_relative_error(self):
+        """p50/p95/p99 совпадают с точными с точностью до ~2%."""
+        values = [(index + 1) / 1000 for index in range(10000)]  # 1 мс .. 10 с
+        sketch = LatencySketch()
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+        assert len(sketch.counts) == SKETCH_BUCKETS
+
+    def test_sketches_merge_across_workers(self):
+        """Слияние снимков дает те же квантили, что один общий скетч."""
+        whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+        for index in range(1, 2001):
+            value = index / 500
+            whole.add(value)
+            (first if index % 2 else second).add(value)
+
+        merged = LatencySketch()
+        merged.merge_snapshot(first.snapshot())
+        merged.merge_snapshot(second.snapshot())
+
+        assert merged.percentiles() == whole.percentiles()
+
+    def test_collector_reports_route_percentiles(self):
+        """Сборщик отдает квантили по маршрутам и в формате summary."""
+        collector = MetricsCollector()
+        for index in range(100):
+            collector.record_request(0.01 * (index + 1), 200, method="GET", route="/api/decks/")
+
+        percentiles = collector.get_latency_percentiles()["GET /api/decks/"]
+        assert percentiles["count"] == 100
+        assert percentiles["p50"] == pytest.approx(0.5, rel=0.03)
+        assert percentiles["p99"] == pytest.approx(0.99, rel=0.03)
+        assert collector.get_application_metrics().response_time_p95 == pytest.approx(0.95, rel=0.03)
+        assert 'phraseweaver_http_request_latency_seconds{method="GET",route="/api/decks/",quantile="0.99"}' \
+            in render_prometheus(collector)
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    """psutil, у которого cpu_percent(interval=1) спал бы секунду."""
+    calls = []
+
+    def cpu_percent(interval=None):
+        calls.append(interval)
+        if interval:
+            time.sleep(interval)
+        return 42.0
+
+    fake = SimpleNamespace(
+        cpu_percent=cpu_percent,
+        virtual_memory=lambda: SimpleNamespace(percent=50.0, used=1024 ** 3, available=1024 ** 3),
+        disk_usage=lambda path: SimpleNamespace(percent=10.0),
+    )
+    monkeypatch.setattr(monitoring, "psutil", fake)
+    monkeypatch.setattr(monitoring, "PSUTIL_AVAILABLE", True)
+    return calls
+
+
+class TestSystemSampler:
+    """Тесты для фонового замера системных метрик."""
+
+    def test_health_reads_latest_sample(self, fake_psutil):
+        """get_health_status не замеряет сам, а берет последний замер."""
+        collector = MetricsCollector()
+        collector.sample_system_metrics()
+        fake_psutil.clear()
+
+        started = time.perf_counter()
+        health = collector.get_health_status()
+
+        assert time.perf_counter() - started < 0.1
+        assert fake_psutil == []
+        assert health["system"]["cpu_percent"] == 42.0
+
+    @pytest.mark.asyncio
+    async def test_sampler_fills_history_without_blocking(self, fake_psutil, monkeypatch):
+        """Сэмплер пишет в system_metrics_history и не вызывает блокирующий замер."""
+        collector = MetricsCollector()
+        monkeypatch.setattr(monitoring, "metrics_collector", collector)
+
+        task = asyncio.create_task(monitoring.run_system_sampler(interval=0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert len(collector.system_metrics_history) >= 2
+        assert all(interval is None for interval in fake_psutil)
+
+
+class TestInstrumentation:
+    """Тесты для подключения метрик к SQLAlchemy и HTTP."""
+
+    def test_sql_queries_timed_by_type(self):
+        """SELECT попадает в гистограмму по типу и в интервал "db" запроса."""
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        before = metrics_collector.db_query_latency["SELECT"]["count"]
+        checkouts = metrics_collector.db_pool_checkouts
+
+        token = start_request_timing("sql00001")
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("select 1"))
+            timing = current_timing()
+        finally:
+            finish_request_timing(token)
+
+        assert metrics_collector.db_query_latency["SELECT"]["count"] == before + 1
+        assert metrics_collector.db_pool_checkouts == checkouts + 1
+        assert timing.spans["db"][1] == 1
+
+    def test_metrics_endpoint(self, client):
+        """/metrics отдает формат Prometheus с шаблоном маршрута, а не путем."""
+        client.get("/health")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'route="/health"' in response.text
+        assert "phraseweaver_cache_operations_total" in response.text
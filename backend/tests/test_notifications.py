@@ -0,0 +1,120 @@
+# backend/tests/test_notifications.py
+"""
+Тесты для напоминаний: подсчет карточек и рассылка с лимитами Telegram.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.card import Card
+from app.models.deck import Deck
+from app.models.user import User
+from app.scheduler import shutdown_scheduler, start_scheduler
+from app.services.notifications import (
+    TelegramSendQueue,
+    count_due_cards_by_user,
+    format_reminder,
+)
+
+
+class RetryAfter(Exception):
+    """Аналог TelegramRetryAfter из aiogram."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too Many Requests: retry after {retry_after}")
+        self.retry_after = retry_after
+
+
+class TestDueCounts:
+    """Тесты для сгруппированного подсчета карточек."""
+
+    def test_counts_per_user(self, db_session, test_user, test_deck):
+        """Считаются только наступившие карточки по всем колодам пользователя."""
+        now = datetime.utcnow()
+        other = User(telegram_id=555, username="other")
+        db_session.add(other)
+        db_session.commit()
+        other_deck = Deck(user_id=other.id, name="Other", lang_from="en", lang_to="ru")
+        second_deck = Deck(user_id=test_user.id, name="Second", lang_from="en", lang_to="ru")
+        db_session.add_all([other_deck, second_deck])
+        db_session.commit()
+
+        for deck, due_date in (
+            (test_deck, now - timedelta(hours=1)),
+            (second_deck, now - timedelta(days=1)),
+            (test_deck, now + timedelta(days=1)),
+            (other_deck, now + timedelta(days=2)),
+        ):
+            db_session.add(Card(deck_id=deck.id, phrase="p", translation="t", due_date=due_date))
+        db_session.commit()
+
+        assert count_due_cards_by_user(db_session, now) == [(test_user.telegram_id, 2)]
+
+    def test_reminder_text(self):
+        """Слово "карточка" склоняется по числу."""
+        assert "1</b> карточка" in format_reminder(1)
+        assert "3</b> карточки" in format_reminder(3)
+        assert "11</b> карточек" in format_reminder(11)
+
+
+class TestTelegramSendQueue:
+    """Тесты для TelegramSendQueue."""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_paces_sends(self):
+        """Отправки стартуют не чаще заданного темпа даже параллельно."""
+        started = []
+
+        async def send(chat_id, text):
+            started.append(time.monotonic())
+
+        queue = TelegramSendQueue(send=send, rate_per_second=50, concurrency=5)
+        stats = await queue.send_all((chat_id, "hi") for chat_id in range(10))
+
+        assert stats["sent"] == 10
+        gaps = [later - earlier for earlier, later in zip(started, started[1:])]
+        assert min(gaps) >= 0.015
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_and_retries(self):
+        """429 ставит рассылку на паузу retry_after и повторяет сообщение."""
+        calls = []
+
+        async def send(chat_id, text):
+            calls.append((chat_id, time.monotonic()))
+            if len(calls) == 1:
+                raise RetryAfter(0.2)
+
+        queue = TelegramSendQueue(send=send, rate_per_second=1000, concurrency=1, per_chat_interval=0)
+        stats = await queue.send_all([(1, "a"), (2, "b")])
+
+        assert stats == {"sent": 2, "retried": 1, "blocked": 0, "failed": 0}
+        assert calls[1][1] - calls[0][1] >= 0.2
+        assert sorted(chat_id for chat_id, _ in calls) == [1, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        """Сообщение, которое снова и снова получает 429, считается неотправленным."""
+        async def send(chat_id, text):
+            raise RetryAfter(0)
+
+        queue = TelegramSendQueue(send=send, rate_per_second=1000, max_attempts=2, per_chat_interval=0)
+        stats = await queue.send_all([(1, "a")])
+
+        assert stats == {"sent": 0, "retried": 1, "blocked": 0, "failed": 1}
+
+
+class TestReminderSchedule:
+    """Тесты для включения напоминаний в планировщике."""
+
+    @pytest.mark.asyncio
+    async def test_reminders_off_by_default(self):
+        """Без NOTIFICATIONS_ENABLED рассылка не планируется."""
+        scheduler = start_scheduler()
+        try:
+            assert scheduler.get_job("daily_reminders") is None
+            assert scheduler.get_job("media_eviction") is not None
+        finally:
+            shutdown_scheduler()
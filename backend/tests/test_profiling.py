@@ -0,0 +1,191 @@
+# backend/tests/test_profiling.py
+"""
+Тесты для профилирования запросов по требованию.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.profiling import (
+    ProfileStore,
+    ProfilingMiddleware,
+    SamplingProfiler,
+    profile_store,
+    profiling_sampler,
+    sign_profile_request,
+    verify_profile_header,
+)
+from app.slow_queries import fingerprint_sql
+
+
+@pytest.fixture
+def isolated_profiles(tmp_path, monkeypatch):
+    """Профили и состояние выборки во временном каталоге."""
+    monkeypatch.setattr(profile_store, "directory", tmp_path)
+    monkeypatch.setattr(profiling_sampler, "state_path", tmp_path / "sampling.json")
+    monkeypatch.setattr(profiling_sampler, "_state", {"sample_rate": 0.0, "until": 0.0})
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "secret")
+    return tmp_path
+
+
+class TestSamplingProfiler:
+    """Тесты для сэмплера стеков."""
+
+    def test_speedscope_profile_contains_hot_function(self):
+        """Горячая функция приложения попадает в кадры профиля потока."""
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            fingerprint_sql("SELECT * FROM cards WHERE id IN (1, 2, 3)")
+        profiler.stop()
+
+        data = profiler.to_speedscope("test")
+
+        names = {frame["name"] for frame in data["shared"]["frames"]}
+        assert "fingerprint_sql" in names
+        profile = data["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"]) > 0
+        assert all(index < len(data["shared"]["frames"]) for stack in profile["samples"] for index in stack)
+
+
+class TestProfileStore:
+    """Тесты для каталога профилей."""
+
+    def test_keeps_newest_files(self, tmp_path):
+        """Старые профили удаляются сверх лимита."""
+        store = ProfileStore(tmp_path, max_files=2)
+        names = []
+        for index in range(3):
+            names.append(store.new_name(f"GET /api/decks/ {index}"))
+            store.save(names[-1], {"profiles": []})
+            time.sleep(0.01)
+
+        listed = [profile["name"] for profile in store.list()]
+        assert listed == [names[2], names[1]]
+
+    def test_path_rejects_traversal(self, tmp_path):
+        """Имя профиля не выводит за пределы каталога."""
+        store = ProfileStore(tmp_path)
+
+        assert store.path("../secret.speedscope.json") is None
+        assert store.path("missing.speedscope.json") is None
+
+
+class TestProfileHeader:
+    """Тесты для подписанного заголовка X-Profile."""
+
+    def test_signature_checked(self):
+        """Принимается только неистекшая подпись этого сервера."""
+        valid = sign_profile_request(int(time.time()) + 60)
+        expired = sign_profile_request(int(time.time()) - 1)
+
+        assert verify_profile_header(valid)
+        assert not verify_profile_header(expired)
+        assert not verify_profile_header(valid[:-1] + ("0" if valid[-1] != "0" else "1"))
+        assert not verify_profile_header("garbage")
+
+
+class TestProfilingEndpoints:
+    """Тесты для middleware и /api/admin/profiles."""
+
+    def test_profiled_request_downloadable(self, client, isolated_profiles):
+        """Запрос с заголовком профилируется, профиль скачивается из админки."""
+        admin = {"X-Admin-Token": "secret"}
+        token = client.post("/api/admin/profiles/token", headers=admin).json()
+
+        response = client.get("/api/decks/", headers={"X-Profile": token["value"]})
+        profile_id = response.headers["x-profile-id"]
+
+        listed = client.get("/api/admin/profiles", headers=admin).json()["profiles"]
+        assert [profile["name"] for profile in listed] == [profile_id]
+        download = client.get(f"/api/admin/profiles/{profile_id}", headers=admin)
+        assert download.status_code == 200
+        assert json.loads(download.content)["$schema"].startswith("https://www.speedscope.app")
+
+    def test_unsigned_request_not_profiled(self, client, isolated_profiles):
+        """Без подписи и выборки профиль не пишется."""
+        response = client.get("/api/decks/", headers={"X-Profile": "1.forged"})
+
+        assert "x-profile-id" not in response.headers
+        assert not list(isolated_profiles.glob("*.speedscope.json"))
+
+    def test_sampling_toggle(self, client, isolated_profiles):
+        """Выборка из админки профилирует запросы без заголовка."""
+        admin = {"X-Admin-Token": "secret"}
+        state = client.put(
+            "/api/admin/profiles/sampling", json={"sample_rate": 1, "duration_seconds": 60}, headers=admin
+        ).json()
+        assert state["sample_rate"] == 1
+
+        response = client.get("/api/decks/")
+
+        assert "x-profile-id" in response.headers
+
+    @pytest.mark.asyncio
+    async def test_profile_written_off_event_loop(self, tmp_path):
+        """Остановка сэмплера и запись файла не выполняются в потоке event loop."""
+        store = ProfileStore(tmp_path)
+        sampler = SimpleNamespace(should_sample=lambda: True)
+        save_threads = []
+        original_save = store.save
+
+        def save(name, data):
+            save_threads.append(threading.get_ident())
+            original_save(name, data)
+
+        store.save = save
+
+        async def endpoint(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"[]"})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        middleware = ProfilingMiddleware(endpoint, store=store, sampler=sampler)
+        scope = {"type": "http", "method": "GET", "path": "/api/decks/", "headers": []}
+        await middleware(scope, None, send)
+
+        name = dict(messages[0]["headers"])[b"x-profile-id"].decode()
+        assert store.path(name) is not None
+        assert save_threads and save_threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_overlapping_requests_recorded(self, tmp_path):
+        """Запросы, шедшие параллельно с профилируемым, отмечаются в профиле."""
+        store = ProfileStore(tmp_path)
+        sampler = SimpleNamespace(should_sample=lambda: True)
+        release = asyncio.Event()
+
+        async def endpoint(scope, receive, send):
+            if scope["path"] == "/api/decks/":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"[]"})
+
+        async def send(message):
+            pass
+
+        middleware = ProfilingMiddleware(endpoint, store=store, sampler=sampler)
+        profiled = asyncio.create_task(
+            middleware({"type": "http", "method": "GET", "path": "/api/decks/", "headers": []}, None, send)
+        )
+        await asyncio.sleep(0)
+        await middleware({"type": "http", "method": "GET", "path": "/api/cards/", "headers": []}, None, send)
+        release.set()
+        await profiled
+
+        name = store.list()[0]["name"]
+        data = json.loads(store.path(name).read_text(encoding="utf-8"))
+        assert data["overlapping_requests"] == ["GET /api/cards/"]
+        assert "+1" in data["name"]
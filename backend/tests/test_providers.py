@@ -0,0 +1,32 @@
+# backend/tests/test_providers.py
+"""
+Тесты для ленивой загрузки тяжелых SDK.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from app.services.providers import LAZY_MODULES
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+class TestLazyImports:
+    """Тесты для старта без тяжелых SDK."""
+
+    def test_app_import_skips_heavy_sdks(self):
+        """Импорт app.main не загружает google.generativeai, aiogram, edge_tts и др."""
+        probe = (
+            "import sys, app.main; "
+            "from app.logging_config import stop_logging; stop_logging(); "
+            f"print('MODULES:' + ','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", probe], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        # Логи старта тоже идут в stdout: поток логирования останавливается до print,
+        # строка со списком модулей ищется по метке
+        modules = [line for line in result.stdout.splitlines() if line.startswith("MODULES:")]
+        assert modules == ["MODULES:"]
@@ -0,0 +1,20 @@
+# backend/tests/test_responses.py
+"""
+Тесты для быстрых JSON ответов.
+"""
+
+import json
+from datetime import datetime
+
+from app.responses import FastJSONResponse
+
+
+class TestFastJSONResponse:
+    """Тесты для FastJSONResponse."""
+
+    def test_renders_prepared_content(self):
+        """Юникод и datetime сериализуются без jsonable_encoder."""
+        response = FastJSONResponse([{"name": "Колода", "created_at": datetime(2025, 1, 2, 3, 4, 5)}])
+
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == [{"name": "Колода", "created_at": "2025-01-02T03:04:05"}]
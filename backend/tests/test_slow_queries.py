@@ -0,0 +1,92 @@
+# backend/tests/test_slow_queries.py
+"""
+Тесты для журнала медленных запросов и админских эндпоинтов.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import get_settings
+from app.monitoring import MetricsCollector, aggregate_metrics, instrument_engine, metrics_collector
+from app.slow_queries import fingerprint_sql, slow_query_log
+
+
+@pytest.fixture
+def slow_threshold(monkeypatch):
+    """Любой запрос считается медленным, частота EXPLAIN не ограничена."""
+    monkeypatch.setattr(get_settings(), "SLOW_QUERY_THRESHOLD_MS", 0)
+    monkeypatch.setattr(get_settings(), "SLOW_QUERY_EXPLAIN", True)
+    monkeypatch.setattr(slow_query_log, "explain_interval", 0)
+
+
+class TestFingerprint:
+    """Тесты для нормализации SQL."""
+
+    def test_literals_and_parameters_stripped(self):
+        """Одинаковые запросы с разными значениями дают один отпечаток."""
+        first = fingerprint_sql("SELECT * FROM cards WHERE deck_id = 12 AND phrase = 'it''s'")
+        second = fingerprint_sql("SELECT *  FROM cards\nWHERE deck_id = ? AND phrase = %(phrase)s")
+
+        assert first == second == "SELECT * FROM cards WHERE deck_id = ? AND phrase = ?"
+
+    def test_in_lists_collapsed(self):
+        """Списки IN любой длины совпадают, приведение типов не ломается."""
+        assert fingerprint_sql("SELECT id FROM decks WHERE id IN (1, 2, 3)") == \
+            "SELECT id FROM decks WHERE id IN (?+)"
+        assert fingerprint_sql("SELECT id FROM decks WHERE id IN (:id_1, :id_2)") == \
+            "SELECT id FROM decks WHERE id IN (?+)"
+        assert fingerprint_sql("SELECT x::int FROM t_1") == "SELECT x::int FROM t_1"
+
+
+class TestSlowQueryLog:
+    """Тесты для записи медленных запросов и фонового EXPLAIN."""
+
+    def test_plan_captured_in_background(self, tmp_path, slow_threshold):
+        """Медленный запрос попадает в отчет с планом EXPLAIN QUERY PLAN."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+        instrument_engine(engine)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE cards (id INTEGER PRIMARY KEY, deck_id INTEGER)"))
+        with engine.connect() as connection:
+            connection.execute(text("SELECT id FROM cards WHERE deck_id = :deck_id"), {"deck_id": 7})
+
+        slow_query_log._queue.join()
+
+        stats = metrics_collector.slow_query_stats["SELECT id FROM cards WHERE deck_id = ?"]
+        assert stats["count"] >= 1
+        assert "SCAN" in stats["plan"]
+        engine.dispose()
+
+    def test_stats_merged_across_workers(self):
+        """Счетчики отпечатка суммируются, берется самый свежий план."""
+        first, second = MetricsCollector(), MetricsCollector()
+        first.record_slow_query("SELECT ?", "SELECT 1", 0.3)
+        second.record_slow_query("SELECT ?", "SELECT 2", 0.5)
+        second.attach_query_plan("SELECT ?", "SCAN t")
+
+        report = aggregate_metrics([first.snapshot(), second.snapshot()]).get_slow_query_report()
+
+        assert report[0]["count"] == 2
+        assert report[0]["max_seconds"] == 0.5
+        assert report[0]["plan"] == "SCAN t"
+
+
+class TestAdminEndpoints:
+    """Тесты для /api/admin."""
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        """Без ADMIN_TOKEN админка не видна."""
+        monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", None)
+
+        assert client.get("/api/admin/slow-queries").status_code == 404
+
+    def test_requires_admin_header(self, client, monkeypatch):
+        """Нужен верный X-Admin-Token."""
+        monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "secret")
+
+        assert client.get("/api/admin/slow-queries").status_code == 403
+        assert client.get("/api/admin/slow-queries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+        response = client.get("/api/admin/slow-queries", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert isinstance(response.json()["queries"], list)
@@ -0,0 +1,64 @@
+# backend/tests/test_static_assets.py
+"""
+Тесты для индекса статических файлов в памяти.
+"""
+
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from app.static_assets import StaticAssetIndex, CACHE_IMMUTABLE, CACHE_REVALIDATE
+
+
+def make_request(headers=None):
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text("console.log('phrase');\n" * 100)
+    (tmp_path / "js" / "app.0123abcd.js").write_text("let a = 1;")
+    (tmp_path / "assets" / "audio").mkdir(parents=True)
+    (tmp_path / "assets" / "audio" / "clip.mp3").write_bytes(b"mp3")
+    (tmp_path / "assets" / ".media_access.json").write_text("{}")
+    return StaticAssetIndex(tmp_path)
+
+
+class TestStaticAssetIndex:
+    """Тесты для StaticAssetIndex."""
+
+    def test_gzip_variant_is_negotiated(self, index):
+        """Сжатый вариант отдается при поддержке gzip."""
+        response = index.respond("js/app.js", make_request({"Accept-Encoding": "gzip"}))
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == index.get("js/app.js").body
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["cache-control"] == CACHE_REVALIDATE
+
+    def test_if_none_match_returns_304(self, index):
+        """Совпавший ETag дает 304 без тела."""
+        etag = index.respond("js/app.js", make_request()).headers["etag"]
+
+        response = index.respond("js/app.js", make_request({"If-None-Match": etag}))
+
+        assert response.status_code == 304
+        assert response.body == b""
+
+    def test_hashed_asset_is_immutable(self, index):
+        """Файлы с хешем в имени кэшируются надолго."""
+        response = index.respond("js/app.0123abcd.js", make_request())
+
+        assert response.headers["cache-control"] == CACHE_IMMUTABLE
+
+    def test_generated_media_is_not_indexed(self, index):
+        """Сгенерированные медиа не попадают в индекс."""
+        assert index.get("assets/audio/clip.mp3") is None
+        assert index.respond("missing.js", make_request()) is None
+
+    def test_dotfiles_are_not_indexed(self, index):
+        """Служебные файлы с точкой в начале имени не раздаются."""
+        assert index.get("assets/.media_access.json") is None
@@ -0,0 +1,132 @@
+# backend/tests/test_telegram_updates.py
+"""
+Тесты для приема обновлений Telegram: дедупликация, очередь и секрет webhook.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import telegram as telegram_router
+from app.services import telegram_updates
+from app.services.telegram_updates import TelegramUpdateQueue
+from app.services.utils import redis_client
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """Redis недоступен: дедупликация только по LRU процесса."""
+    async def unavailable(*args, **kwargs):
+        return None
+    monkeypatch.setattr(redis_client, "set_nx", unavailable)
+    monkeypatch.setattr(redis_client, "delete", unavailable)
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """Подменяет обработку aiogram списком обработанных update_id."""
+    handled = []
+
+    async def process(update_data):
+        handled.append(update_data["update_id"])
+
+    from app.services import telegram_bot
+    monkeypatch.setattr(telegram_bot, "process_webhook_update", process)
+    return handled
+
+
+class TestTelegramUpdateQueue:
+    """Тесты для TelegramUpdateQueue."""
+
+    @pytest.mark.asyncio
+    async def test_duplicates_are_dropped(self, no_redis, processed):
+        """Повторная доставка того же update_id не обрабатывается."""
+        queue = TelegramUpdateQueue(workers=2)
+
+        assert await queue.enqueue({"update_id": 1}) is True
+        assert await queue.enqueue({"update_id": 1}) is False
+        assert await queue.enqueue({"update_id": 2}) is True
+        await queue.stop()
+
+        assert sorted(processed) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_redis_marks_shared_between_workers(self, monkeypatch, processed):
+        """Обновление, принятое другим воркером (ключ в Redis), пропускается."""
+        async def taken(*args, **kwargs):
+            return False
+        monkeypatch.setattr(redis_client, "set_nx", taken)
+        queue = TelegramUpdateQueue(workers=1)
+
+        assert await queue.enqueue({"update_id": 7}) is False
+        await queue.stop()
+        assert processed == []
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_and_forgets(self, no_redis):
+        """Переполненная очередь отклоняет обновление, повтор потом принимается."""
+        queue = TelegramUpdateQueue(workers=1, maxsize=1)
+        queue.start()
+        for task in queue._consumers:
+            task.cancel()
+        await asyncio.gather(*queue._consumers, return_exceptions=True)
+        queue._consumers = []
+
+        assert await queue.enqueue({"update_id": 1}) is True
+        assert await queue.enqueue({"update_id": 2}) is None
+
+        queue._queue.get_nowait()
+        queue._queue.task_done()
+        assert await queue.enqueue({"update_id": 2}) is True
+
+
+class TestTelegramWebhook:
+    """Тесты для эндпоинта webhook."""
+
+    @pytest.fixture
+    def client(self, monkeypatch, no_redis):
+        accepted = []
+
+        async def enqueue(update_data):
+            accepted.append(update_data)
+            return True
+
+        monkeypatch.setattr(telegram_router.telegram_update_queue, "enqueue", enqueue)
+        app = FastAPI()
+        app.include_router(telegram_router.router, prefix="/api")
+        client = TestClient(app)
+        client.accepted = accepted
+        return client
+
+    def test_secret_token_required(self, client, monkeypatch):
+        """С заданным секретом запрос без верного заголовка отклоняется."""
+        monkeypatch.setattr(telegram_router.settings, "TELEGRAM_WEBHOOK_SECRET", "s3cret")
+
+        response = client.post("/api/telegram/webhook", json={"update_id": 1})
+        assert response.status_code == 401
+        response = client.post(
+            "/api/telegram/webhook", json={"update_id": 1},
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}
+        )
+        assert response.status_code == 401
+        assert client.accepted == []
+
+        response = client.post(
+            "/api/telegram/webhook", json={"update_id": 1},
+            headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert client.accepted == [{"update_id": 1}]
+
+    def test_queue_full_returns_503(self, client, monkeypatch):
+        """При переполненной очереди Telegram получает 503 и повторит доставку."""
+        async def full(update_data):
+            return None
+        monkeypatch.setattr(telegram_router.settings, "TELEGRAM_WEBHOOK_SECRET", None)
+        monkeypatch.setattr(telegram_router.telegram_update_queue, "enqueue", full)
+
+        response = client.post("/api/telegram/webhook", json={"update_id": 1})
+        assert response.status_code == 503
@@ -0,0 +1,70 @@
+# backend/tests/test_timing.py
+"""
+Тесты для разбивки времени запроса (Server-Timing).
+"""
+
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import RequestLoggingMiddleware
+from app.timing import current_timing, finish_request_timing, span, start_request_timing, timed
+
+
+class TestRequestTiming:
+    """Тесты для контекста интервалов."""
+
+    @pytest.mark.asyncio
+    async def test_spans_from_tasks_and_threads(self):
+        """Интервалы из gather и to_thread попадают в контекст запроса."""
+        @timed("tts-edge")
+        async def synthesize():
+            await asyncio.sleep(0)
+
+        def query():
+            with span("db"):
+                pass
+
+        token = start_request_timing("abc12345")
+        try:
+            await asyncio.gather(synthesize(), synthesize(), asyncio.to_thread(query))
+            timing = current_timing()
+        finally:
+            finish_request_timing(token)
+
+        assert timing.spans["tts-edge"][1] == 2
+        assert timing.spans["db"][1] == 1
+        assert 'tts-edge;dur=' in timing.server_timing()
+        assert timing.server_timing().split(", ")[-1].startswith("total;dur=")
+
+    def test_span_outside_request_is_noop(self):
+        """Вне запроса span() ничего не записывает."""
+        with span("ai"):
+            pass
+        assert current_timing() is None
+
+
+class TestServerTimingHeader:
+    """Тесты для Server-Timing в RequestLoggingMiddleware."""
+
+    def test_header_and_structured_log(self, caplog):
+        """Sync эндпоинт в threadpool пишет интервалы в заголовок и лог."""
+        app = FastAPI()
+        app.add_middleware(RequestLoggingMiddleware)
+
+        @app.get("/api/decks/")
+        def decks():
+            with span("db"):
+                return []
+
+        with caplog.at_level(logging.INFO, logger="api.requests"):
+            response = TestClient(app).get("/api/decks/")
+
+        assert "db;dur=" in response.headers["server-timing"]
+        records = [json.loads(r.message) for r in caplog.records if r.message.startswith("{")]
+        assert records[0]["request_id"] == response.headers["x-request-id"]
+        assert records[0]["spans"]["db"]["count"] == 1
@@ -0,0 +1,83 @@
+# backend/tests/test_tts_service.py
+"""
+Тесты для фасада TTS сервиса.
+"""
+
+import asyncio
+import pytest
+
+from app.services.tts_service import TTSService, batch_key
+
+
+class FakeSynthesizer:
+    """Подменяет синтез: считает вызовы и параллелизм."""
+
+    def __init__(self, delays=None):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.delays = delays or {}
+
+    async def __call__(self, text, language_id, prefix):
+        self.calls.append((text, language_id))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(text, 0.01))
+        finally:
+            self.active -= 1
+        return f"assets/audio/{language_id}_{text}.mp3"
+
+
+class TestTTSServiceBatch:
+    """Тесты для пакетной генерации."""
+
+    @pytest.mark.asyncio
+    async def test_batch_dedupes_identical_pairs(self, monkeypatch):
+        """Одинаковые (text, lang) синтезируются один раз."""
+        service = TTSService(max_concurrency=4)
+        fake = FakeSynthesizer()
+        monkeypatch.setattr(service, "_synthesize", fake)
+
+        results = await service.generate_batch_audio([
+            ("hello", "en"), ("hello", "en"), ("hello", "pl"), ("world", "en")
+        ])
+
+        assert sorted(fake.calls) == [("hello", "en"), ("hello", "pl"), ("world", "en")]
+        assert results[batch_key("hello", "en")] == "assets/audio/en_hello.mp3"
+        assert len(results) == 3
+
+    @pytest.mark.asyncio
+    async def test_batch_respects_concurrency_limit(self, monkeypatch):
+        """Одновременно выполняется не больше max_concurrency синтезов."""
+        service = TTSService(max_concurrency=2)
+        fake = FakeSynthesizer()
+        monkeypatch.setattr(service, "_synthesize", fake)
+
+        await service.generate_batch_audio([(f"text {i}", "en") for i in range(8)])
+
+        assert len(fake.calls) == 8
+        assert fake.max_active <= 2
+
+    @pytest.mark.asyncio
+    async def test_iter_batch_yields_in_completion_order(self, monkeypatch):
+        """Результаты отдаются по мере готовности, а не в порядке запроса."""
+        service = TTSService(max_concurrency=4)
+        fake = FakeSynthesizer(delays={"slow": 0.2, "fast": 0.01})
+        monkeypatch.setattr(service, "_synthesize", fake)
+
+        order = [text async for text, _, _ in service.iter_batch_audio([("slow", "en"), ("fast", "en")])]
+
+        assert order == ["fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_inflight_synthesis(self, monkeypatch):
+        """Параллельные запросы одного текста ждут один синтез."""
+        service = TTSService(max_concurrency=4)
+        fake = FakeSynthesizer()
+        monkeypatch.setattr(service, "_synthesize", fake)
+
+        paths = await asyncio.gather(*[service.generate_audio("same", "en") for _ in range(5)])
+
+        assert fake.calls == [("same", "en")]
+        assert set(paths) == {"assets/audio/en_same.mp3"}
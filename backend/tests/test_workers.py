@@ -0,0 +1,70 @@
+# backend/tests/test_workers.py
+"""
+Тесты для координации воркеров: выборы лидера и сводные метрики.
+"""
+
+import pytest
+
+from app.monitoring import MetricsCollector, aggregate_metrics
+from app.services.utils import redis_client
+from app.workers import LeaderElection
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """Redis недоступен: лидер выбирается только по flock."""
+    async def unavailable(*args, **kwargs):
+        return None
+    monkeypatch.setattr(redis_client, "set_nx", unavailable)
+    monkeypatch.setattr(redis_client, "eval", unavailable)
+
+
+class TestLeaderElection:
+    """Тесты для LeaderElection."""
+
+    @pytest.mark.asyncio
+    async def test_single_leader_and_failover(self, tmp_path, no_redis):
+        """Лидер один; после его остановки лидерство получает другой."""
+        first = LeaderElection(lock_path=tmp_path / "leader.lock")
+        second = LeaderElection(lock_path=tmp_path / "leader.lock")
+
+        assert await first.try_acquire() is True
+        assert await second.try_acquire() is False
+        # Продление не теряет лидерство
+        assert await first.try_acquire() is True
+
+        await first.stop()
+        assert await second.try_acquire() is True
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_redis_lock_held_elsewhere(self, tmp_path, monkeypatch):
+        """Ключ в Redis у другого контейнера - flock отпускается."""
+        async def taken(*args, **kwargs):
+            return False
+        monkeypatch.setattr(redis_client, "set_nx", taken)
+        election = LeaderElection(lock_path=tmp_path / "leader.lock")
+
+        assert await election.try_acquire() is False
+        assert election._lock_fd is None
+
+
+class TestMetricsAggregation:
+    """Тесты для сводки метрик по воркерам."""
+
+    def test_counters_are_summed(self):
+        """Запросы, ошибки и сжатие складываются, пользователи объединяются."""
+        first, second = MetricsCollector(), MetricsCollector()
+        first.record_request(0.1, 200, user_id=1)
+        second.record_request(0.3, 500, user_id=2)
+        second.record_request(0.2, 200, user_id=1)
+        first.record_compression("gzip", 2000, 500, 0.01)
+        second.record_compression("gzip", 1000, 250, 0.01)
+
+        aggregated = aggregate_metrics([first.snapshot(), second.snapshot()])
+        app_metrics = aggregated.get_application_metrics()
+
+        assert app_metrics.total_requests == 3
+        assert app_metrics.active_users == 2
+        assert app_metrics.error_rate == pytest.approx(100 / 3)
+        assert aggregated.get_compression_stats()["gzip"]["ratio"] == 4.0
@@ -8,6 +8,10 @@ echo "🚀 Деплой исправлений конфигурации..."
 echo "⏹️  Остановка контейнеров..."
 docker-compose -f docker-compose.prod.yml down
 
+# Хешированные имена JS/CSS для nginx (frontend монтируется с хоста)
+echo "🔖 Сборка хешированных ассетов..."
+(cd backend && python3 -m app.asset_fingerprint)
+
 # Пересборка и запуск с новой конфигурацией
 echo "🔨 Пересборка и запуск контейнеров..."
 docker-compose -f docker-compose.prod.yml up -d --build